@@ -15,23 +15,19 @@ from marshmallow import Schema, fields, ValidationError
 from dotenv import load_dotenv
 from datetime import timedelta
 from models import  Employee, Product, Transaction, SaleItem, Category, InventoryTransaction, MpesaToken, Customer
-from flask_limiter import Limiter
-from flask_limiter.util import get_remote_address
-from extensions import db
+from extensions import db, limiter, AUTH_RATE_LIMIT, failed_login
+from exports import stream_response, transaction_rows
+from identity_cache import identity_cache
+from password_pool import password_pool, PasswordPoolBusy
+from mpesa_client import get_mpesa_client, MpesaError
+from shared_state import revoke_token, is_token_revoked
 # Load environment variables from .env file
 load_dotenv()
 
-# Initialize Flask-Limiter for rate-limiting
-limiter = Limiter(get_remote_address)
-
-# JWT blacklist for token revocation (Consider replacing with Redis for scalability)
-blacklist = set()
-
-# Correct way to register token_in_blocklist_loader with JWTManager
+# Revoked tokens live in shared_state (SHARED_STATE_URL) so every worker sees them
 def check_if_token_in_blacklist(jwt_header, jwt_payload):
     """Check if the JWT token is blacklisted (revoked), returns True if it is."""
-    jti = jwt_payload['jti']
-    return jti in blacklist
+    return is_token_revoked(jwt_header, jwt_payload)
 
 
 # Input validation schema for login
@@ -47,6 +43,8 @@ def error_response(message, status_code):
 
 # Login route for generating tokens
 class LoginResource(Resource):
+    decorators = [limiter.limit(AUTH_RATE_LIMIT, deduct_when=failed_login)]
+
     def post(self):
         """Authenticate user and generate JWT tokens."""
         schema = LoginSchema()
@@ -59,8 +57,13 @@ class LoginResource(Resource):
         password = data['password']
 
         # Authenticate user
-        employee = Employee.query.filter_by(name=username).first()
-        if employee and employee.check_password(password):
+        employee = Employee.query.filter_by(username=username).first()
+        try:
+            authenticated = employee is not None and password_pool.check_password(employee, password)
+        except PasswordPoolBusy as e:
+            return error_response(str(e), 503)
+        if authenticated:
+            db.session.commit()  # persists a rehash, if one happened
             access_token = create_access_token(identity=employee.id, expires_delta=timedelta(hours=1))
             refresh_token = create_refresh_token(identity=employee.id)
             return {
@@ -76,8 +79,9 @@ class LogoutResource(Resource):
     @jwt_required()
     def delete(self):
         """Revoke the current JWT token."""
-        jti = get_jwt()['jti']
-        blacklist.add(jti)
+        claims = get_jwt()
+        revoke_token(claims)
+        identity_cache.invalidate(claims['sub'])
         return jsonify({'message': 'Logged out successfully'}), 200
 
 
@@ -105,10 +109,12 @@ class EmployeeResource(Resource):
                 email=args['email'],
                 role=args['role']
             )
-            employee.password = args['password']  # Hashes the password
+            password_pool.set_password(employee, args['password'])
             db.session.add(employee)
             db.session.commit()
             return {'message': 'Employee created', 'employee_id': employee.id}, 201
+        except PasswordPoolBusy as e:
+            return {'error': str(e)}, 503
         except Exception as e:
             logging.error(f"Error creating employee: {str(e)}")
             db.session.rollback()
@@ -195,16 +201,10 @@ class TransactionResource(Resource):
 
     @jwt_required()
     def get(self):
-        """Fetch all transactions."""
+        """Fetch all transactions as a streamed JSON array."""
         try:
-            transactions = Transaction.query.all()
-            return jsonify([
-                {
-                    'id': t.id,
-                    'employee_id': t.employee_id,
-                    'total_amount': t.total_amount
-                } for t in transactions
-            ]), 200
+            columns = ('id', 'employee_id', 'total_amount')
+            return stream_response(transaction_rows(columns=columns), columns, 'json')
         except Exception as e:
             logging.error(f"Error fetching transactions: {str(e)}")
             return error_response('Internal server error', 500)
@@ -213,20 +213,9 @@ class TransactionResource(Resource):
 # Function to fetch M-Pesa token
 def mpesaToken():
     """Fetch access token for M-Pesa API."""
-    ckey = os.getenv('MPESA_CKEY')
-    csecret = os.getenv('MPESA_CSECRET')
-    apiurl = 'https://sandbox.safaricom.co.ke/oauth/v1/generate?grant_type=client_credentials'
-
-    if not ckey or not csecret:
-        logging.error("M-Pesa credentials are missing in environment variables.")
-        return None
-
     try:
-        r = requests.get(apiurl, auth=HTTPBasicAuth(ckey, csecret))
-        r.raise_for_status()
-        mptoken = r.json()
-        return mptoken['access_token']
-    except requests.exceptions.RequestException as e:
+        return get_mpesa_client().access_token()
+    except MpesaError as e:
         logging.error(f"M-Pesa token request failed: {str(e)}")
         return None
 
@@ -234,32 +223,11 @@ def mpesaToken():
 # Function to process payment via M-Pesa
 def lipaOnline(order):
     """Process payment via M-Pesa."""
-    accesstoken = mpesaToken()
-    if not accesstoken:
-        return error_response('Failed to get M-Pesa token', 500)
-
-    apiurl = "https://sandbox.safaricom.co.ke/mpesa/stkpush/v1/processrequest"
-    headers = {"Authorization": f"Bearer {accesstoken}"}
-
-    request_body = {
-        "BusinessShortCode": os.getenv('BUSINESS_SHORTCODE'),
-        "Password": os.getenv('ENCODED_PASSWORD'),
-        "Timestamp": os.getenv('TIMESTAMP'),
-        "TransactionType": "CustomerPayBillOnline",
-        "Amount": order.get_cart_total(),
-        "PartyA": order.phone_number,
-        "PartyB": os.getenv('BUSINESS_SHORTCODE'),
-        "PhoneNumber": order.phone_number,
-        "CallBackURL": "https://yourdomain.com/callback",
-        "AccountReference": "HAC",
-        "TransactionDesc": "testeltd"
-    }
-
     try:
-        response = requests.post(apiurl, json=request_body, headers=headers)
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
+        return get_mpesa_client().stk_push(
+            order.phone_number, order.get_cart_total(), "HAC", description="testeltd"
+        )
+    except MpesaError as e:
         logging.error(f"M-Pesa payment request failed: {str(e)}")
         return error_response('Failed to process payment via M-Pesa', 500)
 
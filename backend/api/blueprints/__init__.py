@@ -0,0 +1,21 @@
+# blueprints - the API's routes, grouped by area and registered by create_app()
+import os
+from importlib import import_module
+
+# Module names under blueprints/, each exposing `bp`. URLs carry no prefix,
+# so every route keeps the path it had before the split.
+BLUEPRINTS = ('auth', 'products', 'sales', 'inventory', 'reports', 'admin', 'mpesa')
+OPTIONAL_BLUEPRINTS = {
+    'holographic': 'HOLOGRAPHIC_ROUTES_ENABLED',  # the 3D POS client's /api/* routes
+}
+
+
+def _enabled(variable):
+    return os.getenv(variable, 'true').lower() in ('1', 'true', 'yes', 'on')
+
+
+def register_blueprints(app):
+    """Import and register every blueprint (optional ones unless switched off)."""
+    names = list(BLUEPRINTS) + [name for name, variable in OPTIONAL_BLUEPRINTS.items() if _enabled(variable)]
+    for name in names:
+        app.register_blueprint(import_module(f'blueprints.{name}').bp)
@@ -0,0 +1,53 @@
+# admin.py - admin check and cache/replica/password-pool stats
+from flask import Blueprint, jsonify
+from flask_jwt_extended import jwt_required
+from identity_cache import identity_cache
+from receipts import receipt_cache
+from employee_analytics import performance_cache
+from password_pool import password_pool
+import db_routing
+from blueprints.common import current_principal, handle_errors
+
+bp = Blueprint('admin', __name__)
+
+# Admin route
+@bp.route('/admin', methods=['GET'])
+@jwt_required()
+def admin_only():
+    """Admin-only route, restricted to users with the admin role."""
+    current_user = current_principal()
+    if current_user.role != 'admin':
+        return jsonify({'message': 'Access denied'}), 403
+
+    return jsonify({'message': 'Welcome, admin!'}), 200
+
+@bp.route('/admin/cache-stats', methods=['GET'])
+@jwt_required()
+@handle_errors
+def cache_stats():
+    """Hit/miss counters for the in-process caches."""
+    if current_principal().role not in ['admin', 'manager']:
+        raise PermissionError("Access denied")
+    return jsonify({
+        'identity_cache': identity_cache.stats(),
+        'receipt_cache': receipt_cache.stats(),
+        'employee_performance_cache': performance_cache.stats()
+    }), 200
+
+@bp.route('/admin/replicas', methods=['GET'])
+@jwt_required()
+@handle_errors
+def replica_stats():
+    """Lag per read replica and how many reads they served."""
+    if current_principal().role not in ['admin', 'manager']:
+        raise PermissionError("Access denied")
+    return jsonify(db_routing.router.stats()), 200
+
+@bp.route('/admin/password-pool', methods=['GET'])
+@jwt_required()
+@handle_errors
+def password_pool_stats():
+    """Concurrency, queue depth and timing of the password hashing pool."""
+    if current_principal().role not in ['admin', 'manager']:
+        raise PermissionError("Access denied")
+    return jsonify(password_pool.stats()), 200
@@ -0,0 +1,140 @@
+# auth.py - signup, login, logout and user updates
+from flask import Blueprint, current_app, jsonify, request
+from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity, create_access_token
+from models import Employee
+from extensions import db, limiter, AUTH_RATE_LIMIT, failed_login
+from identity_cache import identity_cache
+from shared_state import revoke_token
+from password_pool import password_pool, PasswordPoolBusy
+from blueprints.common import current_principal, handle_errors, validate_password
+
+bp = Blueprint('auth', __name__)
+
+# Sign up route
+@bp.route('/auth/signup', methods=['POST'])
+@limiter.limit(AUTH_RATE_LIMIT)
+def signup():
+    try:
+        data = request.get_json()
+        
+        # Validate role
+        role = data.get("role", "").strip().lower()
+        if role not in {"cashier", "manager"}:
+            return jsonify({
+                "error": "Validation failed",
+                "errors": {"role": ["Must be one of: cashier, manager"]}
+            }), 400
+        
+        # Validate password
+        if (password_error := validate_password(data.get("password", ""))):
+            return jsonify({
+                "error": "Validation failed",
+                "errors": {"password": [password_error]}
+            }), 400
+
+        # Clean and normalize data
+        clean_data = {
+            'username': data.get('username', '').strip(),
+            'email': data.get('email', '').lower().strip(),
+            'password': data.get('password', ''),
+            'role': role
+        }
+
+        # Check for existing user
+        if existing := Employee.find_by_username_or_email(clean_data['username'], clean_data['email']):
+            errors = {}
+            if existing.username == clean_data['username']:
+                errors['username'] = ["Username already exists"]
+            if existing.email == clean_data['email']:
+                errors['email'] = ["Email already exists"]
+            return jsonify({"error": "Validation failed", "errors": errors}), 400
+
+        # Create new employee
+        new_employee = Employee(
+            username=clean_data['username'],
+            email=clean_data['email'],
+            role=role
+        )
+        password_pool.set_password(new_employee, clean_data['password'])
+
+        db.session.add(new_employee)
+        db.session.commit()
+
+        return jsonify({
+            'message': 'User created successfully',
+            'user': {
+                'id': new_employee.id,
+                'username': new_employee.username,
+                'email': new_employee.email,
+                'role': new_employee.role
+            }
+        }), 201
+
+    except PasswordPoolBusy:
+        raise
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f'Error: {str(e)}')
+        return jsonify({'error': 'Internal server error'}), 500
+
+@bp.route('/login', methods=['POST'])
+@limiter.limit(AUTH_RATE_LIMIT, deduct_when=failed_login)
+def login():
+    if request.is_json:
+        data = request.get_json()
+        username = data.get('username')
+        password = data.get('password')
+    else:
+        username = request.form.get('username')
+        password = request.form.get('password')
+
+    if not username or not password:
+        return jsonify({'message': 'Username and password are required'}), 400
+
+    employee = Employee.query.filter_by(username=username).first()
+    current_app.logger.debug(f"Found employee: {employee}")
+    if employee and password_pool.check_password(employee, password):
+        db.session.commit()  # persists a rehash, if one happened
+        access_token = create_access_token(identity={'id': employee.id, 'role': employee.role})
+        return jsonify({'message': 'Login successful', 'token': access_token}), 200
+    else:
+        return jsonify({'message': 'Invalid credentials'}), 401
+
+# Logout route
+@bp.route('/logout', methods=['POST'])
+@jwt_required()
+def logout():
+    """Logs the user out and revokes the token on every worker."""
+    revoke_token(get_jwt())
+    identity_cache.invalidate(get_jwt_identity()['id'])
+    return jsonify({'message': 'Successfully logged out'}), 200
+
+@bp.route('/users/<int:user_id>', methods=['PUT'])
+@jwt_required()
+@handle_errors
+def update_user(user_id):
+    current_user = current_principal()
+    if current_user.role != 'admin' and current_user.id != user_id:
+        raise PermissionError("Unauthorized access")
+
+    user = Employee.query.get_or_404(user_id)
+    data = request.get_json()
+    
+    if 'password' in data:
+        if validate_password(data['password']):
+            raise ValueError("Password does not meet security requirements")
+        password_pool.set_password(user, data['password'])
+    
+    if 'role' in data and current_user.role == 'admin':
+        user.role = data['role']
+    
+    db.session.commit()
+    
+    return jsonify({
+        'message': 'User updated successfully',
+        'user': {
+            'id': user.id,
+            'username': user.username,
+            'role': user.role
+        }
+    }), 200
@@ -0,0 +1,94 @@
+# common.py - auth helpers and error handling shared by the blueprints
+import logging
+import re
+import sys
+from functools import wraps
+import jwt
+from flask import current_app, jsonify, request
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy.exc import DatabaseError
+from identity_cache import identity_cache
+
+
+def token_required(f):
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        token = request.headers.get('X-3D-POS-TOKEN')
+        if not token:
+            return jsonify({'message': 'Token is missing!'}), 403
+        try:
+            data = jwt.decode(token, current_app.config['SECRET_KEY'], algorithms=['HS256'])
+            current_user = identity_cache.get(data['user_id'])
+        except:
+            return jsonify({'message': 'Token is invalid!'}), 403
+        if current_user is None:
+            return jsonify({'message': 'Token is invalid!'}), 403
+        return f(current_user, *args, **kwargs)
+    return decorated
+
+
+def current_principal():
+    """Resolve the JWT caller through the identity cache (authoritative role)."""
+    identity = get_jwt_identity()
+    principal = identity_cache.get(identity['id']) if identity else None
+    if principal is None:
+        raise PermissionError("Unknown user")
+    return principal
+
+
+def _validation_errors():
+    # marshmallow is only loaded by code that validates with it, so only
+    # then can its ValidationError reach here.
+    marshmallow = sys.modules.get('marshmallow')
+    return marshmallow.ValidationError if marshmallow else ()
+
+
+def handle_errors(f):
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        try:
+            return f(*args, **kwargs)
+        except _validation_errors() as e:
+            logging.error(f"Validation error: {e.messages}")
+            return jsonify({"error": e.messages}), 400
+        except PermissionError as e:
+            return jsonify({"error": str(e)}), 403
+        except DatabaseError:
+            logging.error("Database failure")
+            return jsonify({"error": "Database failure"}), 500
+    return wrapper
+
+
+# Password validation function
+def validate_password(password):
+    if len(password) < 8:
+        return "Password must be at least 8 characters long."
+    if not re.search(r"[A-Z]", password):
+        return "Password must contain at least one uppercase letter."
+    if not re.search(r"\d", password):
+        return "Password must contain at least one number."
+    if not re.search(r"[!@#$%^&*(),.?\":{}|<>]", password):
+        return "Password must contain at least one special character."
+    return None  # No errors
+
+
+# Function to validate input fields
+def validate_required_fields(data, required_fields):
+    """Validate that all required fields are present in the request data."""
+    missing_fields = [field for field in required_fields if field not in data]
+    if missing_fields:
+        return f"Missing required fields: {', '.join(missing_fields)}"
+    return None
+
+
+# Function to send notifications (example function)
+def send_notification(message, recipient):
+    """Send notifications (e.g., via email or SMS)."""
+    # Placeholder: Can integrate email/SMS APIs here
+    logging.info(f"Notification sent to {recipient}: {message}")
+
+
+# Utility to format error messages consistently
+def format_error(message):
+    """Format error messages for API response."""
+    return {"status": "error", "message": message}
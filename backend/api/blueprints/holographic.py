@@ -0,0 +1,93 @@
+# holographic.py - routes for the 3D POS client (X-3D-POS-TOKEN auth)
+import secrets
+from datetime import timedelta, datetime
+import jwt
+from flask import Blueprint, current_app, jsonify, request
+from models import Employee, Product
+from extensions import db, limiter, AUTH_RATE_LIMIT, failed_login
+from utils import process_transaction, validate_inventory_levels, resolve_skus
+from exports import TRANSACTION_COLUMNS, stream_response, transaction_rows
+from low_stock import reorder_quantity
+from password_pool import password_pool
+from db_routing import read_replica
+from blueprints.common import token_required
+
+bp = Blueprint('holographic', __name__)
+
+@bp.route('/api/3d-auth', methods=['POST'])
+@limiter.limit(AUTH_RATE_LIMIT, deduct_when=failed_login)
+def quantum_auth():
+    auth_data = request.get_json()
+    user = Employee.query.filter_by(username=auth_data['username']).first()
+    
+    if user and password_pool.check_password(user, auth_data['password']):
+        db.session.commit()
+        token = jwt.encode({
+            'user_id': user.id,
+            'exp': datetime.utcnow() + timedelta(hours=8)
+        }, current_app.config['SECRET_KEY'])
+        return jsonify({
+            'token': token,
+            'hologram_token': secrets.token_hex(32),
+            'user_role': user.role
+        })
+    return jsonify({'message': 'Invalid credentials'}), 401
+
+@bp.route('/api/quantum-products', methods=['GET'])
+@token_required
+def get_quantum_products(current_user):
+    sorted_products = Product.query.order_by(Product.sku).all()
+    return jsonify([{
+        'id': p.id,
+        'sku': p.sku,
+        'name': p.name,
+        'price': p.price,
+        'stock': p.stock_quantity,
+        'hologram': f'3d_{p.sku}_model.glb'
+    } for p in sorted_products])
+
+@bp.route('/api/neuro-transaction', methods=['POST'])
+@token_required
+def create_neuro_transaction(current_user):
+    data = request.get_json()
+    try:
+        products = resolve_skus(data['items'])
+        transaction = process_transaction(products, current_user.id)
+        return jsonify({
+            'id': transaction.transaction_id,
+            'total': transaction.total_amount,
+            'hologram_summary': {
+                'item_count': transaction.item_count,
+                'total_amount': transaction.total_amount
+            }
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 400
+
+@bp.route('/api/tesseract-report/<report_type>', methods=['GET'])
+@token_required
+@read_replica
+def generate_tesseract_report(current_user, report_type):
+    days = int(request.args.get('days', 7))
+    start_date = datetime.utcnow() - timedelta(days=days)
+    
+    end_date = datetime.utcnow()
+    import sales_analytics  # NumPy is only loaded once a report needs it
+    analytics = sales_analytics.sales_analytics(start_date, end_date, 'day', compare=False)
+    summary = dict(analytics['totals'], daily=analytics['series'], top_products=analytics['top_products'])
+    return stream_response(
+        transaction_rows(start_date, end_date), TRANSACTION_COLUMNS, 'json', envelope='report',
+        extra={'3d_visualization': summary}
+    )
+
+@bp.route('/api/singularity-inventory', methods=['GET'])
+@token_required
+def check_singularity_inventory(current_user):
+    inventory_status = validate_inventory_levels()
+    return jsonify([{
+        'sku': p.sku,
+        'name': p.name,
+        'stock': p.stock_quantity,
+        'status': 'critical',
+        'quantum_restock': reorder_quantity(p)
+    } for p in inventory_status])
@@ -0,0 +1,104 @@
+# inventory.py - stock history, low-stock monitoring and the live event stream
+from flask import Blueprint, Response, jsonify, request
+from flask_jwt_extended import jwt_required, verify_jwt_in_request
+from models import Product
+from extensions import limiter
+from exports import stream_response, inventory_history_rows, http_date_value
+from low_stock import low_stock, reorder_quantity
+from events import event_bus, stream
+from db_routing import read_replica
+from blueprints.common import handle_errors
+
+bp = Blueprint('inventory', __name__)
+
+# Fields and date format of the original jsonify() response
+INVENTORY_LIST_COLUMNS = ('id', 'product_name', 'change_quantity', 'transaction_type', 'reason', 'timestamp')
+
+@bp.route('/inventory', methods=['GET'])
+def get_inventory_transactions():
+    # Stream inventory transactions with product names joined in; a database
+    # error mid-stream ends the document with an "error" member.
+    return stream_response(
+        inventory_history_rows(), INVENTORY_LIST_COLUMNS, 'json',
+        envelope='transactions', to_value=http_date_value
+    )
+
+@bp.route('/inventory-monitoring', methods=['POST'])
+@jwt_required()
+def post_inventory_monitoring():
+    try:
+        return inventory_monitoring()
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@bp.route('/reorder-alerts', methods=['GET'])
+def reorder_alerts():
+    """API endpoint to get products that need restocking."""
+    alerts = low_stock.critical_items()
+    return jsonify([{
+        "id": p.id,
+        "name": p.name,
+        "stock_quantity": p.stock_quantity,
+        "reorder_quantity": reorder_quantity(p)
+    } for p in alerts])
+
+@bp.route('/inventory-monitoring', methods=['GET'])
+@read_replica
+def inventory_monitoring():
+    """API endpoint to get inventory monitoring summary."""
+    summary = low_stock.summary()
+    return jsonify({
+        "total_products": summary["total_products"],
+        "critical_stock": summary["critical_stock"],
+        "critical_items": [
+            {"id": p.id, "name": p.name, "stock_quantity": p.stock_quantity}
+            for p in summary["critical_items"]
+        ]
+    })
+
+@bp.route('/events/stream', methods=['GET'])
+@limiter.exempt  # one long-lived connection per dashboard
+def event_stream():
+    """Server-Sent Events: sale, stock, alert, cleared and resync deltas.
+
+    EventSource cannot send headers, so the JWT may also be passed as
+    ?token= (JWT_QUERY_STRING_NAME). Clients resume with Last-Event-ID; on
+    'resync' they reload their snapshot (e.g. /inventory-monitoring).
+    """
+    try:
+        # Same checks as @jwt_required, revocation included
+        verify_jwt_in_request(locations=['headers', 'query_string'])
+    except Exception:
+        return jsonify({'message': 'Token is invalid!'}), 401
+
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_event_id = None
+
+    # Load the low-stock set now so alert transitions are tracked from here on.
+    low_stock.critical_items()
+    subscriber = event_bus.subscribe(last_event_id)
+    if subscriber is None:
+        response = jsonify({'message': 'Too many event stream clients'})
+        response.headers['Retry-After'] = '10'
+        return response, 503
+    response = Response(stream(event_bus, subscriber), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@bp.route('/inventory/alerts', methods=['GET'])
+@jwt_required()
+@handle_errors
+def get_inventory_alerts():
+    threshold = request.args.get('threshold', default=10, type=int)
+    products = Product.query.filter(Product.stock_quantity < threshold).all()
+    
+    return jsonify([{
+        'product_id': p.id,
+        'product_name': p.name,
+        'current_stock': p.stock_quantity,
+        'recommended_reorder': reorder_quantity(p)
+    } for p in products]), 200
@@ -0,0 +1,125 @@
+# mpesa.py - M-Pesa payments: STK push, status long-poll and callbacks
+import logging
+from flask import Blueprint, jsonify, request
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy.exc import SQLAlchemyError
+from models import Transaction, MpesaPayment
+from extensions import db, limiter
+from mpesa_client import get_mpesa_client, MpesaError
+from payments import initiate_payment, apply_callback, callback_authorized, wait_for_payment, payment_dict
+from blueprints.common import handle_errors
+
+bp = Blueprint('mpesa', __name__)
+
+@bp.route('/payments', methods=['POST'])
+def process_payment():
+    """Process a payment using M-Pesa."""
+    try:
+        # Fetch request data
+        data = request.get_json()
+        payment_method = data.get('paymentMethod')
+        amount = data.get('amount')
+
+        if not payment_method or not amount:
+            return jsonify({'message': 'Payment method and amount are required'}), 400
+
+        # Fetch M-Pesa access token
+        access_token = fetch_mpesa_token()
+        if not access_token:
+            return jsonify({'message': 'Failed to fetch M-Pesa access token'}), 500
+
+        # Simulate payment processing (replace with actual M-Pesa API calls)
+        payment_response = {
+            'status': 'success',
+            'paymentMethod': payment_method,
+            'amount': amount,
+            'transaction_id': '1234567890',
+        }
+
+        return jsonify({'message': 'Payment processed successfully', 'data': payment_response}), 200
+
+    except Exception as e:
+        logging.error(f"Error processing payment: {str(e)}")
+        return jsonify({'message': 'An error occurred', 'error': str(e)}), 500
+
+# Fetch M-Pesa token
+def fetch_mpesa_token():
+    """
+    Fetch and return M-Pesa access token.
+
+    The token is cached in memory by the shared M-Pesa client and refreshed
+    shortly before it expires.
+
+    Returns:
+    str: The M-Pesa access token if successful, None otherwise.
+    """
+    try:
+        return get_mpesa_client().access_token()
+    except MpesaError as e:
+        logging.error(f"Error fetching M-Pesa token: {str(e)}")
+        return None
+
+@bp.route('/payments/mpesa', methods=['POST'])
+@jwt_required()
+@handle_errors
+def process_mpesa_payment():
+    """Queue an STK push and return the payment id straight away (202)."""
+    data = request.get_json()
+    phone = data.get('phone')
+    transaction_id = data.get('transaction_id')
+    if not phone or not transaction_id:
+        return jsonify({'message': 'phone and transaction_id are required'}), 400
+
+    # Validate transaction
+    transaction = db.session.get(Transaction, transaction_id)
+    if transaction is None:
+        return jsonify({'message': 'Transaction not found'}), 404
+    amount = data.get('amount') or transaction.total_amount
+
+    payment = initiate_payment(phone, amount, transaction_id, get_jwt_identity()['id'])
+    response = jsonify({
+        'message': 'Payment queued, check your phone to complete',
+        'payment': payment_dict(payment),
+        'status_url': f"/payments/mpesa/{payment.id}"
+    })
+    response.headers['Location'] = f"/payments/mpesa/{payment.id}"
+    return response, 202
+
+@bp.route('/payments/mpesa/<int:payment_id>', methods=['GET'])
+@limiter.exempt  # long-polled by the till until the payment settles
+@jwt_required()
+@handle_errors
+def get_mpesa_payment(payment_id):
+    """Payment status. With ?wait=N, long-poll up to N seconds for a change
+    from ?status= (defaults to the current status)."""
+    wait = request.args.get('wait', 0, type=float)
+    known_status = request.args.get('status')
+    if wait > 0:
+        if known_status is None:
+            current = db.session.get(MpesaPayment, payment_id)
+            known_status = current.status if current else None
+        payment = wait_for_payment(payment_id, known_status, wait)
+    else:
+        payment = db.session.get(MpesaPayment, payment_id)
+    if payment is None:
+        return jsonify({'message': 'Payment not found'}), 404
+    return jsonify(payment_dict(payment)), 200
+
+@bp.route('/mpesa-callback', methods=['POST'])
+def mpesa_callback():
+    """Handle M-Pesa callback: reconcile the result with its payment."""
+    if not callback_authorized(request.args.get('token')):
+        logging.warning(f"Rejected M-Pesa callback without a valid token from {request.remote_addr}")
+        return jsonify({'ResultCode': 1, 'ResultDesc': 'Rejected'}), 403
+    data = request.get_json(silent=True)
+    try:
+        payment = apply_callback(data)
+    except (SQLAlchemyError, ValueError, TypeError, AttributeError) as e:
+        db.session.rollback()
+        logging.error(f"Failed to apply M-Pesa callback: {str(e)}")
+        payment = None
+    if payment is None:
+        logging.info(f"Unmatched M-Pesa callback data received: {data}")
+
+    # Safaricom only needs an acknowledgement; it does not act on failures.
+    return jsonify({'ResultCode': 0, 'ResultDesc': 'Accepted'}), 200
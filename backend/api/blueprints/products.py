@@ -0,0 +1,191 @@
+# products.py - catalog CRUD, bulk import, search and typeahead
+from decimal import Decimal
+from flask import Blueprint, jsonify, request
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from models import Product
+from extensions import db
+from pagination import MAX_PAGE_SIZE, keyset_page, cached_count, encode_cursor, decode_cursor
+from search_index import search_index
+from product_import import IMPORT_FORMATS, CHUNK_SIZE, generate_skus, import_products, read_rows, text_stream
+from blueprints.common import current_principal, handle_errors
+
+bp = Blueprint('products', __name__)
+
+# Keyset over the (category_id, name, id) index: sort columns and cursor decoders
+PRODUCT_PAGE_KEY = ((Product.name, Product.id), (str, int))
+
+def filtered_products(min_price=None, max_price=None, category_id=None):
+    """Product.query narrowed by the optional price range and category."""
+    query = Product.query
+    if min_price:
+        query = query.filter(Product.price >= min_price)
+    if max_price:
+        query = query.filter(Product.price <= max_price)
+    if category_id:
+        query = query.filter(Product.category_id == category_id)
+    return query
+
+@bp.route('/products', methods=['GET', 'POST'])
+@jwt_required()
+def manage_products():
+    try:
+        # Verify valid JWT exists
+        current_user = get_jwt_identity()
+        if not current_user:
+            return jsonify({"message": "Invalid credentials"}), 401
+
+        if request.method == 'GET':
+            products = Product.query.all()
+            product_list = [
+                {
+                    'id': product.id,
+                    'name': product.name,
+                    'price': float(product.price),  # Convert Decimal to float
+                    'stock': product.stock_quantity,
+                    'category_id': product.category_id or None
+                } for product in products
+            ]
+            return jsonify({'products': product_list}), 200
+
+        elif request.method == 'POST':
+            data = request.get_json()
+            
+            # Validate required fields
+            required_fields = ['name', 'price', 'stock']
+            if not all(field in data for field in required_fields):
+                return jsonify({'message': 'Missing required fields'}), 400
+
+            # Generate unique SKU if not provided
+            sku = data.get('sku')
+            if not sku:
+                # Name prefix + random suffix, checked against the SKU index in one query
+                sku = generate_skus([data['name']])[0]
+
+            try:
+                new_product = Product(
+                    sku=sku,  # Add generated SKU
+                    name=data['name'],
+                    price=Decimal(str(data['price'])),
+                    stock_quantity=int(data['stock']),
+                    category_id=data.get('category_id')
+                )
+                db.session.add(new_product)
+                db.session.commit()
+                
+                return jsonify({
+                    'message': 'Product added',
+                    'product': {
+                        'id': new_product.id,
+                        'name': new_product.name,
+                        'price': float(new_product.price),
+                        'sku': new_product.sku  # Return generated SKU
+                    }
+                }), 201
+                
+            except (ValueError, TypeError) as e:
+                db.session.rollback()
+                return jsonify({'message': 'Invalid data format', 'error': str(e)}), 422
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'message': 'Server error', 'error': str(e)}), 500
+
+@bp.route('/products/import', methods=['POST'])
+@jwt_required()
+@handle_errors
+def import_products_route():
+    """Bulk upsert products from a CSV or NDJSON body (or multipart 'file').
+
+    ?format=csv|ndjson (default from the content type), ?on_conflict=update|skip.
+    """
+    if current_principal().role not in ['admin', 'manager']:
+        raise PermissionError("Access denied")
+    fmt = request.args.get('format')
+    if fmt is None:
+        fmt = 'ndjson' if 'ndjson' in (request.mimetype or '') else 'csv'
+    if fmt not in IMPORT_FORMATS:
+        return jsonify({'message': f"Unsupported format: {fmt}"}), 400
+    on_conflict = request.args.get('on_conflict', 'update')
+    if on_conflict not in ('update', 'skip'):
+        return jsonify({'message': 'on_conflict must be update or skip'}), 400
+
+    upload = request.files.get('file')
+    stream = text_stream(upload.stream if upload else request.stream)
+    result = import_products(
+        read_rows(stream, fmt),
+        chunk_size=request.args.get('chunk_size', CHUNK_SIZE, type=int),
+        update_existing=on_conflict == 'update'
+    )
+    return jsonify(result._asdict()), 200
+
+@bp.route('/products_search', methods=['GET'])
+@jwt_required()
+@handle_errors
+def get_products():
+    cursor = request.args.get('cursor')
+    per_page = request.args.get('per_page', 20, type=int)
+    include_total = request.args.get('include_total', 'false').lower() == 'true'
+    search = request.args.get('search')
+    min_price = request.args.get('min_price', type=float)
+    max_price = request.args.get('max_price', type=float)
+    category_id = request.args.get('category_id', type=int)
+
+    if search:
+        return search_products(search, cursor, per_page, include_total, min_price, max_price, category_id)
+
+    query = filtered_products(min_price, max_price, category_id)
+
+    try:
+        products, next_cursor = keyset_page(query, *PRODUCT_PAGE_KEY, cursor=cursor, limit=per_page)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    response = {
+        'products': [product.to_dict() for product in products],
+        'next_cursor': next_cursor,
+        'has_more': next_cursor is not None
+    }
+    if include_total:
+        count_key = ('products', min_price, max_price, category_id)
+        response['total'] = cached_count(count_key, query)
+    return jsonify(response), 200
+
+def search_products(search, cursor, per_page, include_total, min_price, max_price, category_id):
+    """Relevance-ranked page from the search index, paged on (score, id)."""
+    try:
+        after = decode_cursor(cursor, (float, int)) if cursor else None
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    per_page = max(1, min(per_page, MAX_PAGE_SIZE))
+    hits, total = search_index.search(
+        search, limit=per_page + 1, after=after,
+        min_price=min_price, max_price=max_price, category_id=category_id
+    )
+    next_cursor = None
+    if len(hits) > per_page:
+        hits = hits[:per_page]
+        next_cursor = encode_cursor([hits[-1][0], hits[-1][1].id])
+
+    # Stock changes on every sale, so the page itself is read by primary key.
+    by_id = {p.id: p for p in Product.query.filter(Product.id.in_([doc.id for _, doc in hits]))}
+    response = {
+        'products': [by_id[doc.id].to_dict() for _, doc in hits if doc.id in by_id],
+        'next_cursor': next_cursor,
+        'has_more': next_cursor is not None
+    }
+    if include_total:
+        response['total'] = total
+    return jsonify(response), 200
+
+@bp.route('/products/typeahead', methods=['GET'])
+@jwt_required()
+def product_typeahead():
+    """Top matches for the POS search box, served entirely from memory."""
+    q = request.args.get('q', '')
+    limit = max(1, min(request.args.get('limit', 10, type=int), 50))
+    hits, _ = search_index.search(q, limit=limit)
+    return jsonify([
+        {'id': doc.id, 'sku': doc.sku, 'name': doc.name, 'price': doc.price, 'score': round(score, 3)}
+        for score, doc in hits
+    ]), 200
@@ -0,0 +1,199 @@
+# reports.py - sales reports, audit logs and streamed exports (replica reads)
+from datetime import timedelta, datetime
+from flask import Blueprint, jsonify, request
+from flask_jwt_extended import jwt_required
+from models import AuditLog
+from exports import (
+    EXPORT_FORMATS, TRANSACTION_COLUMNS, INVENTORY_COLUMNS,
+    stream_response, transaction_rows, inventory_history_rows
+)
+from pagination import keyset_page, cached_count
+from rollups import DIMENSIONS, query_rollups, rollups_updated_at
+from employee_analytics import IDLE_GAP, performance_cache, period_window, compute_performance
+from db_routing import read_replica
+from blueprints.common import current_principal, handle_errors
+
+bp = Blueprint('reports', __name__)
+
+@bp.route('/exports/transactions', methods=['GET'])
+@jwt_required()
+@read_replica
+def export_transactions():
+    """Stream every transaction (optionally within a date range) as NDJSON or CSV."""
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'message': f"Unsupported format: {fmt}"}), 400
+    try:
+        start = datetime.fromisoformat(request.args['start_date']) if 'start_date' in request.args else None
+        end = datetime.fromisoformat(request.args['end_date']) if 'end_date' in request.args else None
+    except ValueError:
+        return jsonify({'message': 'Invalid date format. Use ISO format (YYYY-MM-DDTHH:MM:SS)'}), 400
+    return stream_response(transaction_rows(start, end), TRANSACTION_COLUMNS, fmt, filename='transactions')
+
+@bp.route('/exports/inventory-history', methods=['GET'])
+@jwt_required()
+@read_replica
+def export_inventory_history():
+    """Stream inventory movements as NDJSON or CSV."""
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'message': f"Unsupported format: {fmt}"}), 400
+    product_id = request.args.get('product_id', type=int)
+    return stream_response(
+        inventory_history_rows(product_id), INVENTORY_COLUMNS, fmt, filename='inventory_history'
+    )
+
+# Routes
+# Newest first by id: ids follow insertion order, and unlike the stored
+# timestamp text they round-trip through a cursor exactly.
+AUDIT_LOG_PAGE_KEY = ((AuditLog.id,), (int,))
+REPORT_GRANULARITIES = {'hourly': 'hour', 'daily': 'day', 'monthly': 'month'}
+REPORT_DEFAULT_RANGES = {'hour': timedelta(hours=24), 'day': timedelta(days=30), 'month': timedelta(days=365)}
+
+@bp.route('/reports/sales', methods=['GET'])
+@jwt_required()
+@handle_errors
+@read_replica
+def get_sales_report():
+    """Sales per hour/day/month, read from the pre-aggregated rollup tables."""
+    granularity = request.args.get('granularity', 'hourly')
+    group_by = request.args.get('group_by', 'all')
+    bucket = REPORT_GRANULARITIES.get(granularity)
+    if bucket is None:
+        return jsonify({"error": "Invalid granularity"}), 400
+    if group_by not in DIMENSIONS:
+        return jsonify({"error": "Invalid group_by"}), 400
+
+    try:
+        end = datetime.fromisoformat(request.args['end_date']) if 'end_date' in request.args else datetime.utcnow()
+        start = (datetime.fromisoformat(request.args['start_date']) if 'start_date' in request.args
+                 else end - REPORT_DEFAULT_RANGES[bucket])
+    except ValueError:
+        return jsonify({"error": "Invalid date format. Use ISO format (YYYY-MM-DDTHH:MM:SS)"}), 400
+
+    # Read-only: the rollups are kept current by the background refresher
+    # (ROLLUP_REFRESH_INTERVAL) or `flask refresh-rollups`.
+    rows = query_rollups(bucket, start.replace(tzinfo=None), end.replace(tzinfo=None), group_by)
+
+    report = [
+        {
+            'timestamp': row.bucket_start.isoformat(),
+            'total_sales': row.total_sales,
+            'transaction_count': row.transaction_count,
+            'items_sold': row.items_sold,
+            **({'key': row.dimension_key} if group_by != 'all' else {})
+        } for row in rows
+    ]
+    updated_at = rollups_updated_at()
+
+    return jsonify({
+        'start_date': start.isoformat(),
+        'end_date': end.isoformat(),
+        'granularity': granularity,
+        'group_by': group_by,
+        'rollups_updated_at': updated_at.isoformat() if updated_at else None,
+        'report': report
+    }), 200
+
+@bp.route('/reports/analytics', methods=['GET'])
+@jwt_required()
+@handle_errors
+@read_replica
+def get_sales_analytics():
+    """Sales series with a moving average, breakdown, top products and the
+    change against the previous period, computed column-wise with NumPy."""
+    import sales_analytics  # NumPy is only loaded once a report needs it
+    granularity = request.args.get('granularity', 'daily')
+    bucket = REPORT_GRANULARITIES.get(granularity)
+    if bucket is None:
+        return jsonify({"error": "Invalid granularity"}), 400
+    group_by = request.args.get('group_by', 'all')
+    if group_by not in sales_analytics.GROUP_BY:
+        return jsonify({"error": "Invalid group_by"}), 400
+    window = request.args.get('window', 7, type=int)
+    top_n = request.args.get('top', 10, type=int)
+    compare = request.args.get('compare', 'true').lower() == 'true'
+
+    try:
+        end = datetime.fromisoformat(request.args['end_date']) if 'end_date' in request.args else datetime.utcnow()
+        start = (datetime.fromisoformat(request.args['start_date']) if 'start_date' in request.args
+                 else end - REPORT_DEFAULT_RANGES[bucket])
+    except ValueError:
+        return jsonify({"error": "Invalid date format. Use ISO format (YYYY-MM-DDTHH:MM:SS)"}), 400
+    try:
+        report = sales_analytics.sales_analytics(
+            start.replace(tzinfo=None), end.replace(tzinfo=None), bucket, group_by, window, top_n, compare
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    report['granularity'] = granularity
+    return jsonify(report), 200
+
+@bp.route('/reports/employees', methods=['GET'])
+@jwt_required()
+@handle_errors
+@read_replica
+def get_employee_report():
+    """Sales, basket size, pace and hourly trend for every cashier, ranked.
+
+    `period` is 'today' or '7d'/'30d'/'365d'-style (default 30d); explicit
+    start_date/end_date bypass the cache, as does refresh=true for a period.
+    """
+    if current_principal().role not in ['admin', 'manager']:
+        raise PermissionError("Access denied")
+    idle_gap = request.args.get('idle_minutes', IDLE_GAP // 60, type=int) * 60
+    if idle_gap <= 0:
+        return jsonify({"error": "idle_minutes must be positive"}), 400
+    employee_id = request.args.get('employee_id', type=int)
+    refresh = request.args.get('refresh', 'false').lower() == 'true'
+
+    try:
+        if 'start_date' in request.args or 'end_date' in request.args:
+            end = datetime.fromisoformat(request.args['end_date']) if 'end_date' in request.args else datetime.utcnow()
+            start = (datetime.fromisoformat(request.args['start_date']) if 'start_date' in request.args
+                     else end - timedelta(days=30))
+            report = compute_performance(start.replace(tzinfo=None), end.replace(tzinfo=None), idle_gap, employee_id)
+        else:
+            start, end = period_window(request.args.get('period', '30d'))
+            report = performance_cache.report(start, end, idle_gap, refresh)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    if employee_id is not None:
+        report = dict(report, employees=[e for e in report['employees'] if e['employee_id'] == employee_id])
+    return jsonify(report), 200
+
+@bp.route('/audit-logs', methods=['GET'])
+@jwt_required()
+@handle_errors
+@read_replica
+def get_audit_logs():
+    current_user = current_principal()
+    if current_user.role != 'admin':
+        raise PermissionError("Access denied")
+    
+    cursor = request.args.get('cursor')
+    per_page = request.args.get('per_page', 50, type=int)
+    include_total = request.args.get('include_total', 'false').lower() == 'true'
+
+    try:
+        logs, next_cursor = keyset_page(
+            AuditLog.query, *AUDIT_LOG_PAGE_KEY, cursor=cursor, limit=per_page, descending=True
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    response = {
+        'logs': [{
+            'id': log.id,
+            'user_id': log.user_id,
+            'action': log.action,
+            'timestamp': log.timestamp.isoformat(),
+            'details': log.details
+        } for log in logs],
+        'next_cursor': next_cursor,
+        'has_more': next_cursor is not None
+    }
+    if include_total:
+        response['total'] = cached_count(('audit_logs',), AuditLog.query)
+    return jsonify(response), 200
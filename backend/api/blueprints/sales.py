@@ -0,0 +1,161 @@
+# sales.py - cart, checkout, sales, receipts and customers
+from flask import Blueprint, Response, jsonify, request, session
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from models import Customer
+from extensions import db
+from checkout import checkout_cart, CheckoutError
+from receipts import receipt_cache
+from blueprints.common import current_principal, handle_errors
+
+bp = Blueprint('sales', __name__)
+
+# Cart route
+@bp.route('/cart', methods=['GET'])
+@jwt_required()
+def cart():
+    """Fetch the cart details for the current user."""
+    cart_items = session.get('cart', [])
+    total_amount = sum(item['price'] * item['quantity'] for item in cart_items)
+
+    return jsonify({'cart_items': cart_items, 'total_amount': total_amount}), 200
+
+# Checkout route
+@bp.route('/checkout', methods=['POST'])
+@jwt_required()
+def checkout():
+    """Process the checkout for the current user's cart."""
+    current_user = get_jwt_identity()
+    employee_id = current_user['id']
+
+    # Retrieve cart from session, falling back to the cart posted by the till.
+    # A posted cart is charged at catalog prices; its prices are not trusted.
+    cart = session.get('cart')
+    from_session = bool(cart)
+    if not from_session:
+        cart = (request.get_json(silent=True) or {}).get('items', [])
+    if not cart:
+        return jsonify({'message': 'Cart is empty!'}), 400
+    if not isinstance(cart, list) or not all(isinstance(item, dict) for item in cart):
+        return jsonify({'message': 'items must be a list of cart lines'}), 400
+
+    items = [
+        {
+            'product_id': item.get('product_id', item.get('id')),
+            'quantity': item.get('quantity'),
+            'price': item.get('price') if from_session else None
+        } for item in cart
+    ]
+    try:
+        result = checkout_cart(employee_id, items)
+    except CheckoutError as e:
+        return jsonify({'message': e.message}), e.status_code
+
+    if from_session:
+        session.pop('cart', None)  # Clear the cart after checkout
+
+    return jsonify({'message': 'Transaction completed successfully!', 'transaction_id': result.transaction_id}), 200
+
+# Receipt route
+@bp.route('/receipt/<int:transaction_id>', methods=['GET'])
+@jwt_required()
+def receipt(transaction_id):
+    """Retrieve the receipt for a specific transaction (?format=text for printing)."""
+    rendered = receipt_cache.get(transaction_id)
+    if rendered is None:
+        return jsonify({'message': 'Transaction not found'}), 404
+    if request.args.get('format') == 'text':
+        return Response(rendered.text, mimetype='text/plain')
+    return jsonify(rendered.data), 200
+
+@bp.route('/customers/<int:customer_id>/loyalty', methods=['POST'])
+@jwt_required()
+@handle_errors
+def update_loyalty(customer_id):
+    current_user = current_principal()
+    if current_user.role not in ['admin', 'manager']:
+        raise PermissionError("Insufficient privileges")
+    
+    data = request.get_json()
+    customer = Customer.query.get_or_404(customer_id)
+    points = data.get('points')
+    
+    if not isinstance(points, int):
+        raise ValueError("Invalid points value")
+    
+    customer.loyalty_points += points
+    db.session.commit()
+    
+    return jsonify({
+        'customer_id': customer_id,
+        'new_balance': customer.loyalty_points,
+        'message': 'Loyalty points updated successfully'
+    }), 200
+
+@bp.route('/sales', methods=['POST'])
+@jwt_required()
+def add_sale():
+    data = request.get_json()
+    customer_id = data.get('customerId')
+    products = data.get('products')  # Assuming products is a list of dictionaries with `productId`, `quantity`, and `price`
+
+    # Validation
+    if not customer_id or not products:
+        return jsonify({'message': 'Customer ID and product list are required'}), 400
+
+    # Check if the customer exists
+    customer = Customer.query.get(customer_id)
+    if not customer:
+        return jsonify({'message': 'Customer not found'}), 404
+
+    items = []
+    for item in products:
+        product_id = item.get('productId')
+        quantity = item.get('quantity')
+        price = item.get('price')
+
+        if not product_id or not quantity or not price:
+            return jsonify({'message': 'Each product must have productId, quantity, and price'}), 400
+
+        items.append({'product_id': product_id, 'quantity': quantity, 'price': price})
+
+    try:
+        result = checkout_cart(get_jwt_identity()['id'], items, customer_id=customer_id)
+    except CheckoutError as e:
+        return jsonify({'message': e.message}), e.status_code
+
+    return jsonify({'message': 'Sale added successfully', 'transaction_id': result.transaction_id, 'total_amount': result.total_amount}), 200
+
+# Route to add a new customer
+@bp.route('/addcustomer', methods=['POST'])
+def add_customer():
+    try:
+        # Get the data from the incoming request
+        data = request.get_json()
+
+        # Extract fields
+        name = data.get('name')
+        email = data.get('email')
+        phone = data.get('phone')
+
+        # Check if all required fields are provided
+        if not name or not email or not phone:
+            return jsonify({'message': 'Name, email, and phone are required'}), 400
+
+        # Check for an existing customer by email
+        existing_customer = Customer.query.filter_by(email=email).first()
+        if existing_customer:
+            return jsonify({'message': 'Customer with this email already exists'}), 400
+
+        # Create a new customer object
+        new_customer = Customer(name=name, email=email, phone=phone)
+
+        # Add the new customer to the database
+        db.session.add(new_customer)
+        db.session.commit()
+
+        return jsonify({'message': 'Customer added successfully', 'customer': {'id': new_customer.id, 'name': new_customer.name}}), 201
+
+    except Exception as e:
+        # Handle unexpected errors
+        db.session.rollback()  # Rollback any partial changes to the database
+        return jsonify({'message': 'An error occurred', 'error': str(e)}), 500
@@ -0,0 +1,128 @@
+# checkout.py - single-transaction checkout shared by /checkout, /sales and the 3D till
+import logging
+import math
+from collections import namedtuple, OrderedDict
+from datetime import datetime
+from types import SimpleNamespace
+from sqlalchemy import case, insert, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from extensions import db
+from models import Product, Transaction, SaleItem, InventoryTransaction
+import model_events
+
+CheckoutResult = namedtuple('CheckoutResult', ['transaction_id', 'total_amount', 'item_count'])
+
+
+class CheckoutError(Exception):
+    """Raised when a basket cannot be sold; nothing has been written."""
+
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+def _normalize_lines(items):
+    """Merge cart lines into product_id -> {'quantity', 'price'} in basket order."""
+    lines = OrderedDict()
+    for item in items:
+        product_id = item.get('product_id')
+        quantity = item.get('quantity')
+        if not isinstance(product_id, int) or not isinstance(quantity, int) or quantity <= 0:
+            raise CheckoutError('Each item must have an integer product_id and a positive quantity')
+        price = item.get('price')
+        if price is not None and (isinstance(price, bool) or not isinstance(price, (int, float))
+                                  or not math.isfinite(price) or price < 0):
+            raise CheckoutError('Each item price must be a non-negative number')
+        line = lines.setdefault(product_id, {'quantity': 0, 'price': price})
+        line['quantity'] += quantity
+    if not lines:
+        raise CheckoutError('Cart is empty!')
+    return lines
+
+
+def checkout_cart(employee_id, items, customer_id=None, payment_method=None, discount=0.0):
+    """Sell a basket atomically with a constant number of round-trips.
+
+    Products are read with one IN query, stock is decremented by a single
+    conditional UPDATE ... RETURNING (stock_quantity >= qty) so concurrent
+    tills cannot oversell, and sale/inventory rows are bulk inserted. Everything commits
+    together or not at all.
+    """
+    lines = _normalize_lines(items)
+    product_ids = list(lines)
+
+    try:
+        rows = db.session.execute(
+            select(Product.id, Product.price).where(Product.id.in_(product_ids))
+        ).all()
+        catalog_prices = dict(rows)
+        missing = [pid for pid in product_ids if pid not in catalog_prices]
+        if missing:
+            raise CheckoutError(f"Product(s) not found: {', '.join(map(str, missing))}", 404)
+
+        quantity_by_id = {pid: line['quantity'] for pid, line in lines.items()}
+        requested = case(quantity_by_id, value=Product.id)
+        updated = db.session.execute(
+            update(Product)
+            .where(Product.id.in_(product_ids), Product.stock_quantity >= requested)
+            .values(stock_quantity=Product.stock_quantity - requested)
+            .returning(*Product.__table__.columns)
+            .execution_options(synchronize_session=False)
+        ).all()
+        if len(updated) != len(product_ids):
+            raise CheckoutError('Not enough stock for one or more products', 409)
+        # The bulk UPDATE skips the ORM, so tell the caches (low-stock set,
+        # indexes) about the new stock levels; delivered only on commit.
+        for row in updated:
+            model_events.record(db.session, Product, 'upsert', row)
+
+        total_amount = 0.0
+        for pid, line in lines.items():
+            if line['price'] is None:
+                line['price'] = catalog_prices[pid]
+            total_amount += line['price'] * line['quantity']
+        total_amount -= discount or 0.0
+
+        transaction = Transaction(
+            employee_id=employee_id,
+            customer_id=customer_id,
+            total_amount=total_amount,
+            discount=discount or 0.0,
+            payment_method=payment_method,
+            transaction_date=datetime.utcnow()
+        )
+        db.session.add(transaction)
+        db.session.flush()
+
+        db.session.execute(insert(SaleItem), [
+            {
+                'transaction_id': transaction.id,
+                'product_id': pid,
+                'quantity': line['quantity'],
+                'price': line['price']
+            } for pid, line in lines.items()
+        ])
+        movements = [
+            {
+                'product_id': pid,
+                'change_quantity': -line['quantity'],
+                'transaction_type': 'remove',
+                'reason': 'sale'
+            } for pid, line in lines.items()
+        ]
+        db.session.execute(insert(InventoryTransaction), movements)
+        for movement in movements:
+            model_events.record(db.session, InventoryTransaction, 'upsert', SimpleNamespace(**movement))
+
+        transaction_id = transaction.id
+        db.session.commit()
+    except CheckoutError:
+        db.session.rollback()
+        raise
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        logging.error(f"Checkout failed: {str(e)}")
+        raise CheckoutError('Error processing sale', 500)
+
+    return CheckoutResult(transaction_id, total_amount, sum(quantity_by_id.values()))
@@ -0,0 +1,74 @@
+# commands.py - flask CLI commands registered by create_app()
+import click
+from extensions import db
+from product_import import IMPORT_FORMATS, CHUNK_SIZE, import_products, read_rows
+from rollups import refresh_rollups, rebuild_rollups
+import db_routing
+
+
+def register_commands(app):
+    @app.cli.command('init-db')
+    def init_db_command():
+        """Create any missing tables (use `flask db upgrade` for migrations)."""
+        db.create_all()
+        print("Tables created")
+
+    @app.cli.command('refresh-rollups')
+    def refresh_rollups_command():
+        """Fold new transactions into the sales rollup tables."""
+        print(f"Processed {refresh_rollups()} transactions")
+
+    @app.cli.command('rebuild-rollups')
+    def rebuild_rollups_command():
+        """Recompute the sales rollup tables from scratch."""
+        print(f"Processed {rebuild_rollups()} transactions")
+
+    @app.cli.command('import-products')
+    @click.argument('path', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--format', 'fmt', type=click.Choice(IMPORT_FORMATS), default=None,
+                  help='Defaults to the file extension.')
+    @click.option('--chunk-size', default=CHUNK_SIZE, show_default=True)
+    @click.option('--skip-existing', is_flag=True, help='Leave products whose SKU already exists untouched.')
+    def import_products_command(path, fmt, chunk_size, skip_existing):
+        """Bulk upsert products from a CSV or NDJSON file."""
+        fmt = fmt or ('ndjson' if path.endswith(('.ndjson', '.jsonl')) else 'csv')
+
+        def report(p):
+            print(f"{p['rows']} rows, {p['imported']} imported, {p['invalid']} invalid, "
+                  f"{p['rows_per_sec']} rows/s")
+
+        with open(path, encoding='utf-8-sig', newline='') as f:
+            result = import_products(read_rows(f, fmt), chunk_size, not skip_existing, report)
+        for error in result.errors:
+            print(f"row {error['row']}: {error['error']}")
+        print(f"Imported {result.imported} of {result.rows} rows in {result.elapsed}s "
+              f"({result.rows_per_sec} rows/s)")
+
+    @app.cli.command('snapshot-replica')
+    @click.argument('bind', required=False)
+    def snapshot_replica_command(bind):
+        """Refresh SQLite read replicas (all, or one bind key) from the primary."""
+        replicas = {k: e for k, e in db.engines.items() if k and k.startswith(db_routing.REPLICA_PREFIX)}
+        for key, engine in sorted(replicas.items()):
+            if bind not in (None, key):
+                continue
+            if engine.dialect.name != 'sqlite':
+                print(f"{key}: not a SQLite replica, skipped")
+                continue
+            db_routing.snapshot_sqlite(db.engine, engine.url.database)
+            print(f"{key}: snapshot written to {engine.url.database}")
+
+    @app.cli.command('check-query-plans')
+    @click.argument('names', nargs=-1)
+    @click.option('--verbose', is_flag=True, help='Print the full plan of every query.')
+    def check_query_plans_command(names, verbose):
+        """Fail if a hot report/receipt/history query scans a whole table."""
+        from query_plans import check_query_plans  # only this command needs it
+        failed = 0
+        for result in check_query_plans(names):
+            print(f"{'ok  ' if result.ok else 'SCAN'} {result.name}")
+            for line in (result.plan if verbose else result.problems):
+                print(f"     {line}")
+            failed += not result.ok
+        if failed:
+            raise SystemExit(f"{failed} queries fall back to a table scan")
@@ -0,0 +1,97 @@
+# database.py - engine URI, pool options and SQLite pragmas from the environment
+import os
+import sqlite3
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from db_routing import replica_uris
+
+DEFAULT_DATABASE_URI = 'sqlite:///pos.db'
+
+
+def _env_bool(name, default):
+    return os.getenv(name, str(default)).strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def database_uri():
+    """DATABASE_URL, accepting the postgres:// form many hosts hand out."""
+    uri = os.getenv('DATABASE_URL', DEFAULT_DATABASE_URI)
+    if uri.startswith('postgres://'):
+        uri = 'postgresql://' + uri[len('postgres://'):]
+    return uri
+
+
+def _is_memory_sqlite(url):
+    return url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+
+
+def engine_options(uri):
+    """SQLALCHEMY_ENGINE_OPTIONS for uri.
+
+    DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE and
+    DB_POOL_PRE_PING tune the connection pool. In-memory SQLite keeps its
+    single-connection pool.
+    """
+    url = make_url(uri)
+    if _is_memory_sqlite(url):
+        return {}
+    options = {
+        'pool_size': int(os.getenv('DB_POOL_SIZE', '10')),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', '20')),
+        'pool_timeout': int(os.getenv('DB_POOL_TIMEOUT', '30')),
+        'pool_pre_ping': _env_bool('DB_POOL_PRE_PING', True),
+    }
+    if url.get_backend_name() == 'sqlite':
+        # The driver waits this long on a locked database (busy_timeout is
+        # also set per connection below).
+        options['connect_args'] = {'timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT', '5000')) / 1000}
+    else:
+        options['pool_recycle'] = int(os.getenv('DB_POOL_RECYCLE', '1800'))
+        statement_timeout = os.getenv('DB_STATEMENT_TIMEOUT')
+        if url.get_backend_name() == 'postgresql' and statement_timeout:
+            options['connect_args'] = {'options': f'-c statement_timeout={int(statement_timeout)}'}
+    return options
+
+
+def sqlite_pragmas():
+    """PRAGMAs applied to every new SQLite connection."""
+    return (
+        ('journal_mode', os.getenv('SQLITE_JOURNAL_MODE', 'WAL')),
+        ('synchronous', os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')),
+        ('busy_timeout', int(os.getenv('SQLITE_BUSY_TIMEOUT', '5000'))),
+        ('mmap_size', int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)))),
+        ('cache_size', int(os.getenv('SQLITE_CACHE_SIZE', '-20000'))),  # negative = KiB
+    )
+
+
+def install_sqlite_pragmas(engine):
+    """Apply sqlite_pragmas() on connect. WAL lets tills read while one writes."""
+    if engine.dialect.name != 'sqlite' or _is_memory_sqlite(engine.url):
+        return
+    pragmas = sqlite_pragmas()
+
+    @event.listens_for(engine, 'connect')
+    def _set_pragmas(dbapi_connection, connection_record):
+        if not isinstance(dbapi_connection, sqlite3.Connection):
+            return
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas:
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+def configure_database(app):
+    """Point app at DATABASE_URL (and any replicas) with pool options; call before db.init_app."""
+    uri = database_uri()
+    app.config['SQLALCHEMY_DATABASE_URI'] = uri
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(uri)
+    app.config['SQLALCHEMY_BINDS'] = {
+        # connect_args are driver-specific: never inherit the primary's.
+        key: {'url': replica, 'connect_args': {}, **engine_options(replica)}
+        for key, replica in replica_uris().items()
+    }
+
+
+def init_engine(app, db):
+    """Engine-level hooks that need the engine itself (after db.init_app)."""
+    with app.app_context():
+        install_sqlite_pragmas(db.engine)
@@ -0,0 +1,268 @@
+# db_routing.py - send reporting reads to read replicas, everything else to the primary
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from flask import g, has_request_context, request
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, text
+from sqlalchemy.sql.dml import UpdateBase
+from sqlalchemy.sql.selectable import CompoundSelect, Select
+from shared_state import shared_values
+
+REPLICA_PREFIX = 'replica_'
+
+
+def replica_uris():
+    """DATABASE_REPLICA_URLS (comma separated) as SQLALCHEMY_BINDS entries."""
+    uris = [u.strip() for u in os.getenv('DATABASE_REPLICA_URLS', '').split(',') if u.strip()]
+    return {
+        f'{REPLICA_PREFIX}{i}': 'postgresql://' + uri[len('postgres://'):] if uri.startswith('postgres://') else uri
+        for i, uri in enumerate(uris)
+    }
+
+
+def _sqlite_path(engine):
+    database = engine.url.database
+    if not database or database == ':memory:':
+        return None
+    return database
+
+
+def measure_lag(engine):
+    """Seconds the replica is behind the primary, or None if it cannot serve.
+
+    A SQLite replica is a snapshot file; snapshot_sqlite() stamps its mtime
+    with the time the copy started, so its lag is the file's age.
+    """
+    name = engine.dialect.name
+    if name == 'sqlite':
+        path = _sqlite_path(engine)
+        if path is None or not os.path.exists(path) or os.path.getsize(path) == 0:
+            return None
+        return max(time.time() - os.path.getmtime(path), 0.0)
+    with engine.connect() as conn:
+        if name == 'postgresql':
+            lag = conn.execute(text(
+                "SELECT CASE WHEN pg_is_in_recovery() "
+                "THEN EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) ELSE 0 END"
+            )).scalar()
+            return None if lag is None else max(float(lag), 0.0)
+        conn.execute(text('SELECT 1'))
+    return 0.0
+
+
+class ReplicaRouter:
+    """Picks a replica engine for a read, or None to stay on the primary.
+
+    A replica is used only while its lag is at most `max_lag` seconds (lag
+    is re-measured every `check_interval`) and only for users whose last
+    write is already visible on it: a cashier who just rang up a sale sees
+    that sale in their own report. Last-write times are kept per user id
+    and client address in shared_state, so a write on one worker routes
+    reads on every other; they expire after `max_lag`, when no eligible
+    replica can be older than them anyway.
+    """
+
+    def __init__(self, max_lag=30, check_interval=5):
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._fresh_as_of = {}   # bind key -> (wall time the replica's data is current to, checked_at)
+        self._files = {}         # bind key -> inode of a SQLite snapshot
+        self._next = 0
+        self.replica_reads = 0
+        self.stale_skips = 0
+
+    def _fresh_time(self, key, engine):
+        now = time.monotonic()
+        cached = self._fresh_as_of.get(key)
+        if cached is not None and now - cached[1] < self.check_interval:
+            return cached[0]
+        try:
+            if engine.dialect.name == 'sqlite':
+                self._reopen_if_replaced(key, engine)
+            lag = measure_lag(engine)
+        except Exception as e:
+            logging.warning(f"Replica {key} lag check failed: {e}")
+            lag = None
+        fresh = None if lag is None else time.time() - lag
+        self._fresh_as_of[key] = (fresh, now)
+        return fresh
+
+    def _reopen_if_replaced(self, key, engine):
+        # Pooled connections keep reading the old file after a new snapshot
+        # is swapped in; drop them so the next checkout opens the new one.
+        path = _sqlite_path(engine)
+        inode = os.stat(path).st_ino if path and os.path.exists(path) else None
+        if self._files.get(key) != inode:
+            engine.dispose()
+        self._files[key] = inode
+
+    def note_write(self, user_keys):
+        now = time.time()
+        for key in user_keys:
+            shared_values.set(f'last_write:{key}', now, ttl=self.max_lag + self.check_interval)
+
+    def last_write_time(self, user_keys):
+        return max((shared_values.get(f'last_write:{key}', 0.0) for key in user_keys), default=0.0)
+
+    def choose(self, engines, last_write=0.0):
+        replicas = sorted((k, e) for k, e in engines.items() if k and k.startswith(REPLICA_PREFIX))
+        if not replicas:
+            return None
+        now = time.time()
+        with self._lock:
+            start = self._next
+            self._next += 1
+        for i in range(len(replicas)):
+            key, engine = replicas[(start + i) % len(replicas)]
+            fresh = self._fresh_time(key, engine)
+            if fresh is None or now - fresh > self.max_lag or fresh < last_write:
+                continue
+            self.replica_reads += 1
+            return engine
+        self.stale_skips += 1
+        return None
+
+    def stats(self):
+        now = time.time()
+        return {
+            'max_lag': self.max_lag,
+            'replicas': {
+                key: None if fresh is None else round(now - fresh, 1)
+                for key, (fresh, _) in sorted(self._fresh_as_of.items())
+            },
+            'replica_reads': self.replica_reads,
+            'stale_skips': self.stale_skips
+        }
+
+
+router = ReplicaRouter(
+    max_lag=float(os.getenv('REPLICA_MAX_LAG', '30')),
+    check_interval=float(os.getenv('REPLICA_LAG_CHECK_INTERVAL', '5'))
+)
+
+
+# ------------------- Request routing -------------------
+def read_replica(f):
+    """Let the view's SELECTs run on a replica (streamed bodies included)."""
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        g.db_route = 'replica'
+        return f(*args, **kwargs)
+    return decorated
+
+
+@contextmanager
+def use_primary():
+    """Force the primary inside a read_replica view.
+
+    Writes made here (e.g. refreshing rollups) are treated as system work:
+    they do not pin the rest of the request or the user to the primary.
+    """
+    if not has_request_context():
+        yield
+        return
+    previous = g.get('db_route')
+    g.db_route = 'primary'
+    try:
+        yield
+    finally:
+        g.db_route = previous
+
+
+def _user_keys():
+    keys = g.get('db_user_keys')
+    if keys is None:
+        keys = [f'addr:{request.remote_addr}']
+        try:
+            verify_jwt_in_request(optional=True)
+            identity = get_jwt_identity()
+            if isinstance(identity, dict):
+                identity = identity.get('id')
+            if identity is not None:
+                keys.append(f'user:{identity}')
+        except Exception:
+            pass
+        g.db_user_keys = keys
+    return keys
+
+
+def _last_write():
+    """The caller's last write time, looked up once per request."""
+    last_write = g.get('db_last_write')
+    if last_write is None:
+        last_write = g.db_last_write = router.last_write_time(_user_keys())
+    return last_write
+
+
+class RoutingSession(Session):
+    """Flask-SQLAlchemy session that sends eligible reads to a replica.
+
+    Only plain SELECTs issued under @read_replica qualify; flushes and DML
+    always go to the primary, and once this session has written, its
+    remaining reads stay there too.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is not None or not has_request_context():
+            return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+        route = g.get('db_route')
+        if self._flushing or isinstance(clause, UpdateBase):
+            if route != 'primary':
+                self.info['wrote'] = True
+                g.db_wrote = True
+        elif route == 'replica' and isinstance(clause, (Select, CompoundSelect)) and not self.info.get('wrote'):
+            engine = router.choose(self._db.engines, _last_write())
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def init_app(app, db):
+    """Query-only replica connections and read-your-writes bookkeeping."""
+    with app.app_context():
+        for key, engine in db.engines.items():
+            if key and key.startswith(REPLICA_PREFIX) and engine.dialect.name == 'sqlite':
+                event.listen(engine, 'connect', _sqlite_query_only)
+
+    @app.after_request
+    def record_writes(response):
+        if g.get('db_wrote'):
+            router.note_write(_user_keys())
+        return response
+
+
+def _sqlite_query_only(dbapi_connection, connection_record):
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        dbapi_connection.execute('PRAGMA query_only=1')
+
+
+def snapshot_sqlite(source_engine, target_path):
+    """Copy the primary SQLite database to target_path as a consistent snapshot.
+
+    Uses the online backup API, so tills keep writing meanwhile; the copy is
+    swapped in atomically. Its mtime is set to when the copy started (the
+    backup may take a while and holds nothing newer), which measure_lag
+    reads as the replica's freshness.
+    """
+    source_path = _sqlite_path(source_engine)
+    if source_engine.dialect.name != 'sqlite' or source_path is None:
+        raise ValueError('snapshots need a file-backed SQLite primary')
+    tmp_path = f'{target_path}.tmp'
+    started = time.time()
+    source = sqlite3.connect(source_path)
+    target = sqlite3.connect(tmp_path)
+    try:
+        source.backup(target)
+        target.execute('PRAGMA journal_mode=DELETE')
+    finally:
+        target.close()
+        source.close()
+    os.utime(tmp_path, (started, started))
+    os.replace(tmp_path, target_path)
@@ -0,0 +1,225 @@
+# employee_analytics.py - per-cashier sales, basket size, pace and hourly trend from one windowed query
+import os
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from datetime import datetime, timedelta
+from sqlalchemy import case, func, literal, select
+from extensions import db
+from models import Employee, Transaction, SaleItem
+import model_events
+
+IDLE_GAP = 10 * 60  # seconds between two sales beyond which the till counts as idle
+
+
+def _seconds_between(later, earlier):
+    if db.engine.dialect.name == 'sqlite':
+        return (func.julianday(later) - func.julianday(earlier)) * 86400.0
+    return func.extract('epoch', later - earlier)
+
+
+def performance_query(start, end, idle_gap=IDLE_GAP, employee_id=None):
+    """One row per (employee, hour of day) in [start, end).
+
+    LAG() over each employee's sales gives the gap since their previous
+    sale; gaps up to `idle_gap` seconds count as active till time, so pace
+    is measured over time spent serving rather than the whole shift.
+    """
+    items = select(func.coalesce(func.sum(SaleItem.quantity), 0)).where(
+        SaleItem.transaction_id == Transaction.id
+    ).scalar_subquery()
+    window = [Transaction.transaction_date >= start, Transaction.transaction_date < end]
+    if employee_id is not None:
+        window.append(Transaction.employee_id == employee_id)
+    sales = select(
+        Transaction.employee_id,
+        Transaction.transaction_date.label('sold_at'),
+        Transaction.total_amount.label('amount'),
+        items.label('item_count'),
+        func.lag(Transaction.transaction_date).over(
+            partition_by=Transaction.employee_id, order_by=Transaction.transaction_date
+        ).label('previous_sale')
+    ).where(*window).subquery('sales')
+
+    gap = _seconds_between(sales.c.sold_at, sales.c.previous_sale)
+    hour = func.extract('hour', sales.c.sold_at)
+    return select(
+        sales.c.employee_id,
+        hour.label('hour'),
+        func.count().label('transactions'),
+        func.coalesce(func.sum(sales.c.amount), 0.0).label('sales'),
+        func.coalesce(func.sum(sales.c.item_count), 0).label('items_sold'),
+        func.coalesce(func.sum(case((gap <= literal(idle_gap), gap), else_=0.0)), 0.0).label('active_seconds')
+    ).group_by(sales.c.employee_id, hour)
+
+
+def compute_partial(start, end, idle_gap=IDLE_GAP, employee_id=None):
+    """{(employee_id, hour): [transactions, sales, items, active seconds]}.
+    Partials of adjacent windows add up to the partial of their union."""
+    return {
+        (row.employee_id, int(row.hour)): [row.transactions, row.sales, int(row.items_sold), row.active_seconds]
+        for row in db.session.execute(performance_query(start, end, idle_gap, employee_id))
+    }
+
+
+def _ratio(numerator, denominator, digits=2):
+    return round(numerator / denominator, digits) if denominator else None
+
+
+def build_report(partials, start, end, idle_gap=IDLE_GAP):
+    """Merge partials into per-employee metrics, best seller first."""
+    merged = defaultdict(lambda: [0, 0.0, 0, 0.0])
+    for partial in partials:
+        for key, values in partial.items():
+            totals = merged[key]
+            for i, value in enumerate(values):
+                totals[i] += value
+
+    employees = {}
+    for (employee_id, hour), (transactions, sales, items, active) in sorted(merged.items()):
+        e = employees.setdefault(employee_id, {
+            'employee_id': employee_id, 'transactions': 0, 'total_sales': 0.0,
+            'items_sold': 0, 'active_seconds': 0.0, 'hourly': []
+        })
+        e['transactions'] += transactions
+        e['total_sales'] += sales
+        e['items_sold'] += items
+        e['active_seconds'] += active
+        e['hourly'].append({'hour': hour, 'transactions': transactions, 'sales': round(sales, 2), 'items': items})
+
+    names = dict(db.session.execute(
+        select(Employee.id, Employee.username).where(Employee.id.in_(list(employees)))
+    ).all()) if employees else {}
+    team_sales = sum(e['total_sales'] for e in employees.values())
+    ranked = sorted(employees.values(), key=lambda e: e['total_sales'], reverse=True)
+    for rank, e in enumerate(ranked, 1):
+        active_minutes = e.pop('active_seconds') / 60
+        e.update({
+            'username': names.get(e['employee_id']),
+            'rank': rank,
+            'total_sales': round(e['total_sales'], 2),
+            'share_of_sales': _ratio(e['total_sales'], team_sales, 4),
+            'avg_basket_value': _ratio(e['total_sales'], e['transactions']),
+            'items_per_transaction': _ratio(e['items_sold'], e['transactions']),
+            'active_minutes': round(active_minutes, 1),
+            'items_per_minute': _ratio(e['items_sold'], active_minutes),
+            'transactions_per_hour': _ratio(e['transactions'] * 60, active_minutes),
+        })
+    return {
+        'start_date': start.isoformat(),
+        'end_date': end.isoformat(),
+        'idle_gap_seconds': idle_gap,
+        'team': {
+            'employees': len(ranked),
+            'transactions': sum(e['transactions'] for e in ranked),
+            'total_sales': round(team_sales, 2),
+            'items_sold': sum(e['items_sold'] for e in ranked)
+        },
+        'employees': ranked
+    }
+
+
+def compute_performance(start, end, idle_gap=IDLE_GAP, employee_id=None):
+    """Uncached report for every employee (or just `employee_id`)."""
+    return build_report([compute_partial(start, end, idle_gap, employee_id)], start, end, idle_gap)
+
+
+class PerformanceCache:
+    """(start, end, idle gap) -> partial, least recently used evicted.
+
+    A report window is split at today's midnight. The part before it only
+    changes when one of its transactions does, so it stays cached until a
+    committed Transaction dated inside it drops it: a year of history is
+    aggregated once a day rather than on every dashboard load. Today's part
+    is small and also expires after `ttl` seconds, which is how sales made
+    by other workers show up. The first sale after midnight does not see
+    the gap to the previous day's last one and counts as idle.
+    """
+
+    def __init__(self, maxsize=128, ttl=30):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (partial, expires_at or None)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def report(self, start, end, idle_gap=IDLE_GAP, refresh=False):
+        """Metrics for every employee who sold in [start, end)."""
+        midnight = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        parts = [(start, midnight), (midnight, end)] if start < midnight < end else [(start, end)]
+        partials = [self.partial(s, e, idle_gap, refresh) for s, e in parts]
+        return build_report(partials, start, end, idle_gap)
+
+    def partial(self, start, end, idle_gap=IDLE_GAP, refresh=False):
+        key = (start, end, idle_gap)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and not refresh and (entry[1] is None or entry[1] > now):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        partial = compute_partial(start, end, idle_gap)
+        expires_at = now + self.ttl if end > datetime.utcnow() - timedelta(seconds=self.ttl) else None
+        with self._lock:
+            self._entries[key] = (partial, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return partial
+
+    def invalidate(self, timestamp):
+        """Drop every window containing timestamp."""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] <= timestamp < k[1]]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+    def on_change(self, kind, timestamp):
+        if kind == 'reset' or timestamp is None:
+            self.clear()
+        else:
+            self.invalidate(timestamp)
+
+
+performance_cache = PerformanceCache(
+    maxsize=int(os.getenv('ANALYTICS_CACHE_SIZE', '128')),
+    ttl=int(os.getenv('ANALYTICS_CACHE_TTL', '30'))
+)
+model_events.subscribe(Transaction, lambda t: t.transaction_date, performance_cache.on_change)
+
+
+def period_window(period, now=None):
+    """(start, end) for 'today' or 'Nd' (the N days before today plus
+    today so far). Starts fall on midnight and the end is the next hour,
+    so the cached part before today is shared all day."""
+    now = now or datetime.utcnow()
+    midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    if period == 'today':
+        start = midnight
+    elif period.endswith('d') and period[:-1].isdigit() and int(period[:-1]) > 0:
+        start = midnight - timedelta(days=int(period[:-1]))
+    else:
+        raise ValueError("period must be 'today' or a number of days like '30d'")
+    return start, now.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
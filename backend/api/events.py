@@ -0,0 +1,152 @@
+# events.py - in-process pub/sub feeding the Server-Sent Events stream
+import json
+import os
+import queue
+import threading
+from collections import deque
+from datetime import date, datetime
+from models import Transaction, InventoryTransaction
+from low_stock import low_stock
+import model_events
+
+KEEPALIVE_SECONDS = 15
+
+
+class Subscriber:
+    """One connected client: a bounded queue the publisher never blocks on."""
+
+    def __init__(self, maxsize):
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+
+class EventBus:
+    """Fan-out of change events to SSE clients.
+
+    publish() runs on the committing thread (checkout, restock, ...), so it
+    only does put_nowait. A client whose queue is full has its backlog
+    replaced by a single 'resync' event and is expected to reload its
+    snapshot; checkout never waits on a slow dashboard. The last `history`
+    events are kept so reconnecting clients can resume from Last-Event-ID.
+    """
+
+    def __init__(self, queue_size=256, history=1000, max_clients=100):
+        self.queue_size = queue_size
+        self.max_clients = max_clients
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._history = deque(maxlen=history)
+        self._next_id = 1
+        self.published = 0
+
+    def publish(self, event_type, data):
+        with self._lock:
+            event = (self._next_id, event_type, data)
+            self._next_id += 1
+            self.published += 1
+            self._history.append(event)
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.queue.put_nowait(event)
+            except queue.Full:
+                subscriber.dropped += 1
+                with subscriber.queue.mutex:
+                    subscriber.queue.queue.clear()
+                subscriber.queue.put_nowait((event[0], 'resync', {'reason': 'client too slow'}))
+
+    def subscribe(self, last_event_id=None):
+        """Register a client; returns None when max_clients is reached."""
+        subscriber = Subscriber(self.queue_size)
+        with self._lock:
+            if len(self._subscribers) >= self.max_clients:
+                return None
+            if last_event_id is not None:
+                missed = [e for e in self._history if e[0] > last_event_id]
+                if missed:
+                    expired = missed[0][0] != last_event_id + 1
+                else:
+                    expired = last_event_id != self._next_id - 1  # e.g. server restarted
+                if expired or len(missed) > self.queue_size:
+                    # The gap is older than our history: the client must resync.
+                    missed = [(self._next_id - 1, 'resync', {'reason': 'history expired'})]
+                for event in missed:
+                    subscriber.queue.put_nowait(event)
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'clients': len(self._subscribers),
+                'published': self.published,
+                'dropped': sum(s.dropped for s in self._subscribers),
+                'last_event_id': self._next_id - 1
+            }
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def format_sse(event_id, event_type, data):
+    return f"id: {event_id}\nevent: {event_type}\ndata: {json.dumps(data, default=_json_default)}\n\n"
+
+
+def stream(bus, subscriber, keepalive=KEEPALIVE_SECONDS):
+    """Yield SSE frames for one client until it disconnects."""
+    try:
+        yield "retry: 3000\n\n"
+        while True:
+            try:
+                event = subscriber.queue.get(timeout=keepalive)
+            except queue.Empty:
+                yield ": keepalive\n\n"
+                continue
+            yield format_sse(*event)
+    finally:
+        bus.unsubscribe(subscriber)
+
+
+event_bus = EventBus(
+    queue_size=int(os.getenv('EVENTS_QUEUE_SIZE', '256')),
+    max_clients=int(os.getenv('EVENTS_MAX_CLIENTS', '100'))
+)
+
+
+# ------------------- Commit-time producers -------------------
+def _on_transaction(kind, data):
+    # New sales only, not updates such as payments._reconcile's payment_method
+    if kind == 'upsert' and data[0]:
+        event_bus.publish('sale', data[1])
+
+
+def _on_inventory_transaction(kind, data):
+    if kind == 'upsert':
+        event_bus.publish('stock', data)
+
+
+def _on_low_stock(transition, item):
+    event_bus.publish(transition, item._asdict())
+
+
+model_events.subscribe(Transaction, lambda t: (model_events.is_insert(t), {
+    'id': t.id,
+    'employee_id': t.employee_id,
+    'total_amount': t.total_amount,
+    'payment_method': t.payment_method,
+    'transaction_date': t.transaction_date
+}), _on_transaction)
+model_events.subscribe(InventoryTransaction, lambda it: {
+    'product_id': it.product_id,
+    'change_quantity': it.change_quantity,
+    'transaction_type': it.transaction_type,
+    'reason': it.reason
+}, _on_inventory_transaction)
+low_stock.add_listener(_on_low_stock)
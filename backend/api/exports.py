@@ -0,0 +1,162 @@
+# exports.py - streaming NDJSON/CSV/JSON exports with flat memory use
+import csv
+import io
+import json
+import logging
+from datetime import date, datetime
+from flask import Response, stream_with_context
+from werkzeug.http import http_date
+from sqlalchemy import select
+from extensions import db
+from models import Transaction, InventoryTransaction, Product
+
+YIELD_PER = 1000
+CHUNK_SIZE = 64 * 1024
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+    'json': 'application/json',
+}
+
+TRANSACTION_COLUMNS = (
+    'id', 'employee_id', 'customer_id', 'total_amount', 'discount', 'payment_method', 'transaction_date'
+)
+INVENTORY_COLUMNS = (
+    'id', 'product_id', 'product_name', 'change_quantity', 'transaction_type', 'reason', 'timestamp'
+)
+
+
+def _stream(statement):
+    """Execute a Core select through a server-side cursor, yielding mappings."""
+    result = db.session.execute(statement.execution_options(yield_per=YIELD_PER))
+    for row in result.mappings():
+        yield row
+
+
+def transactions_query(start=None, end=None, columns=TRANSACTION_COLUMNS):
+    statement = select(*(getattr(Transaction, c) for c in columns)).order_by(Transaction.id)
+    if start is not None:
+        statement = statement.where(Transaction.transaction_date >= start)
+    if end is not None:
+        statement = statement.where(Transaction.transaction_date <= end)
+    return statement
+
+
+def transaction_rows(start=None, end=None, columns=TRANSACTION_COLUMNS):
+    """Yield transactions in id order, optionally limited to a date range."""
+    return _stream(transactions_query(start, end, columns))
+
+
+def inventory_history_query(product_id=None):
+    statement = select(
+        InventoryTransaction.id,
+        InventoryTransaction.product_id,
+        Product.name.label('product_name'),
+        InventoryTransaction.change_quantity,
+        InventoryTransaction.transaction_type,
+        InventoryTransaction.reason,
+        InventoryTransaction.timestamp
+    ).outerjoin(Product, Product.id == InventoryTransaction.product_id).order_by(InventoryTransaction.id)
+    if product_id is not None:
+        statement = statement.where(InventoryTransaction.product_id == product_id)
+    return statement
+
+
+def inventory_history_rows(product_id=None):
+    """Yield inventory movements with the product name joined in (no lazy loads)."""
+    return _stream(inventory_history_query(product_id))
+
+
+def _to_json_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def http_date_value(value):
+    """Format dates the way jsonify() does, for routes that predate the exports."""
+    if isinstance(value, (datetime, date)):
+        return http_date(value)
+    return value
+
+
+def _chunked(pieces):
+    """Coalesce many small strings into ~CHUNK_SIZE writes.
+
+    The first piece goes out on its own so clients see bytes immediately.
+    """
+    pieces = iter(pieces)
+    first = next(pieces, None)
+    if first is not None:
+        yield first
+    buffer = []
+    size = 0
+    for piece in pieces:
+        buffer.append(piece)
+        size += len(piece)
+        if size >= CHUNK_SIZE:
+            yield ''.join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def encode_ndjson(rows, columns):
+    for row in rows:
+        yield json.dumps({c: _to_json_value(row[c]) for c in columns}) + '\n'
+
+
+def encode_csv(rows, columns):
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(columns)
+    for row in rows:
+        writer.writerow([_to_json_value(row[c]) for c in columns])
+        yield out.getvalue()
+        out.seek(0)
+        out.truncate()
+    yield out.getvalue()
+
+
+def encode_json(rows, columns, envelope=None, extra=None, to_value=_to_json_value):
+    """Stream a JSON array, optionally wrapped as {**extra, envelope: [...]}.
+
+    The status line is already sent when rows fail mid-stream, so the document
+    is closed with an "error" member ({..., envelope: [...], "error": ...}, or
+    a final {"error": ...} element for a bare array) instead of being cut off.
+    """
+    if envelope is not None:
+        head = json.dumps(extra or {})[:-1]
+        yield head + (', ' if extra else '') + json.dumps(envelope) + ': ['
+    else:
+        yield '['
+    separator = ''
+    try:
+        for row in rows:
+            yield separator + json.dumps({c: to_value(row[c]) for c in columns})
+            separator = ', '
+    except Exception as e:
+        logging.error(f"JSON export failed mid-stream: {str(e)}")
+        if envelope is not None:
+            yield '], ' + json.dumps({'error': str(e)})[1:]
+        else:
+            yield separator + json.dumps({'error': str(e)}) + ']'
+        return
+    yield ']}' if envelope is not None else ']'
+
+
+def stream_response(rows, columns, fmt='ndjson', filename=None, envelope=None, extra=None,
+                    to_value=_to_json_value):
+    """Build a streaming Flask response; the first byte leaves before the query ends."""
+    if fmt == 'csv':
+        pieces = encode_csv(rows, columns)
+    elif fmt == 'json':
+        pieces = encode_json(rows, columns, envelope, extra, to_value)
+    else:
+        pieces = encode_ndjson(rows, columns)
+    response = Response(stream_with_context(_chunked(pieces)), mimetype=EXPORT_FORMATS[fmt])
+    if filename:
+        response.headers['Content-Disposition'] = f'attachment; filename="{filename}.{fmt}"'
+    return response
@@ -1,12 +1,24 @@
+import os
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address  # Import missing function
+from db_routing import RoutingSession
+from shared_state import limiter_storage_uri
 
-db = SQLAlchemy()  # Initialize SQLAlchemy here
-migrate = Migrate()
+db = SQLAlchemy(session_options={'class_': RoutingSession})  # reads may go to replicas, see db_routing
+
+# No default limits: a till behind one address makes far more requests than
+# any global cap allows. Only the credential-checking routes are limited, and
+# logins count only rejected credentials (failed_login), so tills sharing a
+# NAT can all log in at shift start.
+AUTH_RATE_LIMIT = os.getenv('AUTH_RATE_LIMIT', '10 per minute')
 limiter = Limiter(
     key_func=get_remote_address,
-    default_limits=["200 per day", "50 per hour"],
-    storage_uri="memory://"  # Use in-memory storage if no Redis or other backend is set
+    storage_uri=limiter_storage_uri(),  # SHARED_STATE_URL: memory://, sqlite:///... or redis://...
+    strategy="sliding-window-counter"
 )
+
+
+def failed_login(response):
+    """deduct_when for AUTH_RATE_LIMIT on login routes."""
+    return response.status_code == 401
@@ -0,0 +1,106 @@
+# identity_cache.py - bounded TTL/LRU cache of authenticated employee principals
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from extensions import db
+from models import Employee
+from shared_state import shared_values
+import model_events
+
+Principal = namedtuple('Principal', ['id', 'username', 'role', 'verified'])
+
+
+class IdentityCache:
+    """Maps employee id -> Principal so auth checks skip the database.
+
+    Entries expire after `ttl` seconds, the least recently used entry is
+    evicted beyond `maxsize`, and Employee commits or token revocation drop
+    the entry immediately. Commits also bump the user's version in
+    shared_values; a hit older than `check_interval` seconds compares it,
+    so other workers drop the entry too.
+    """
+
+    def __init__(self, maxsize=1024, ttl=300, check_interval=1):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.check_interval = check_interval
+        self._entries = OrderedDict()  # user_id -> [principal, expires_at, version, checked_at]
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, user_id):
+        """Return the Principal for user_id, loading it on a miss (None if unknown)."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+        if entry is not None and entry[1] > now and now - entry[3] > self.check_interval:
+            if shared_values.get(_version_key(user_id), 0) == entry[2]:
+                entry[3] = now
+            else:
+                entry = None  # changed on another worker
+        with self._lock:
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        # Read the version first: a change committed after this point bumps
+        # it past the one stored with the row loaded below.
+        version = shared_values.get(_version_key(user_id), 0)
+        row = db.session.query(
+            Employee.id, Employee.username, Employee.role, Employee.verified
+        ).filter(Employee.id == user_id).first()
+        if row is None:
+            return None
+        principal = Principal(*row)
+        with self._lock:
+            self._entries[user_id] = [principal, now + self.ttl, version, now]
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return principal
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+    def on_employee_change(self, kind, user_id):
+        if kind == 'reset':
+            self.clear()
+        else:
+            shared_values.incr(_version_key(user_id))
+            self.invalidate(user_id)
+
+
+def _version_key(user_id):
+    return f'identity:{user_id}:version'
+
+
+identity_cache = IdentityCache(
+    maxsize=int(os.getenv('IDENTITY_CACHE_SIZE', '1024')),
+    ttl=int(os.getenv('IDENTITY_CACHE_TTL', '300')),
+    check_interval=float(os.getenv('IDENTITY_CACHE_CHECK_INTERVAL', '1'))
+)
+model_events.subscribe(Employee, lambda e: e.id, identity_cache.on_employee_change)
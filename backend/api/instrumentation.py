@@ -0,0 +1,199 @@
+# instrumentation.py - per-route latency, SQL counts/time and an N+1 detector, exposed as /metrics
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from flask import Response, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.orm import Mapper
+from extensions import limiter
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 250)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+class RequestStats:
+    """What one request did; lives on flask.g."""
+
+    __slots__ = ('started', 'queries', 'sql_time', 'rows', 'statements')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.sql_time = 0.0
+        self.rows = 0
+        self.statements = Counter()
+
+
+class Metrics:
+    """Per-process aggregates by (route, method).
+
+    Each gunicorn worker keeps its own numbers; Prometheus scrapes every
+    worker (or sums them) as usual for multi-process exporters. Latency is
+    measured to the end of the view, not to the last byte of a streamed body.
+    """
+
+    def __init__(self, n_plus_one_threshold=0):
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self._lock = threading.Lock()
+        self.requests = Counter()   # (route, method, status) -> count
+        self.latency = defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+        self.queries_per_request = defaultdict(lambda: Histogram(QUERY_COUNT_BUCKETS))
+        self.sql_time = Counter()
+        self.sql_rows = Counter()
+        self.n_plus_one = Counter()
+        self._reported = set()
+
+    def record(self, route, method, status, stats):
+        elapsed = time.perf_counter() - stats.started
+        key = (route, method)
+        suspects = self._n_plus_one(stats)
+        with self._lock:
+            self.requests[(route, method, status)] += 1
+            self.latency[key].observe(elapsed)
+            self.queries_per_request[key].observe(stats.queries)
+            self.sql_time[key] += stats.sql_time
+            self.sql_rows[key] += stats.rows
+            if suspects:
+                self.n_plus_one[key] += 1
+                new = [s for s in suspects if (key, s[0]) not in self._reported]
+                if len(self._reported) < 10000:
+                    self._reported.update((key, s[0]) for s in new)
+            else:
+                new = []
+        for statement, times in new:
+            logging.warning(f"Possible N+1 in {method} {route}: {times} executions of {statement!r}")
+
+    def _n_plus_one(self, stats):
+        if not self.n_plus_one_threshold:
+            return []
+        return [(s, n) for s, n in stats.statements.items() if n >= self.n_plus_one_threshold]
+
+    def render(self):
+        """Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            lines += ['# HELP pos_http_requests_total Requests by route, method and status.',
+                      '# TYPE pos_http_requests_total counter']
+            for (route, method, status), n in sorted(self.requests.items()):
+                lines.append(f'pos_http_requests_total{{route="{route}",method="{method}",status="{status}"}} {n}')
+            _histogram(lines, 'pos_http_request_duration_seconds', 'Time spent in the view.', self.latency)
+            _histogram(lines, 'pos_sql_queries_per_request', 'SQL statements executed per request.',
+                       self.queries_per_request)
+            for name, help_text, values in (
+                ('pos_sql_duration_seconds_total', 'Time spent executing SQL.', self.sql_time),
+                ('pos_sql_rows_total', 'Rows written by DML plus ORM rows loaded.', self.sql_rows),
+                ('pos_n_plus_one_requests_total', 'Requests that repeated one statement past the threshold.',
+                 self.n_plus_one),
+            ):
+                lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+                for (route, method), value in sorted(values.items()):
+                    lines.append(f'{name}{{route="{route}",method="{method}"}} {_number(value)}')
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        with self._lock:
+            for values in (self.requests, self.latency, self.queries_per_request,
+                           self.sql_time, self.sql_rows, self.n_plus_one):
+                values.clear()
+            self._reported.clear()
+
+
+def _number(value):
+    return repr(round(value, 6)) if isinstance(value, float) else str(value)
+
+
+def _histogram(lines, name, help_text, histograms):
+    lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+    for (route, method), h in sorted(histograms.items()):
+        labels = f'route="{route}",method="{method}"'
+        cumulative = 0
+        for bound, n in zip(h.buckets, h.counts):
+            cumulative += n
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {h.count}')
+        lines.append(f'{name}_sum{{{labels}}} {_number(h.total)}')
+        lines.append(f'{name}_count{{{labels}}} {h.count}')
+
+
+metrics = Metrics(n_plus_one_threshold=int(os.getenv('N_PLUS_ONE_THRESHOLD', '0')))
+
+
+# ------------------- Hooks -------------------
+def _current():
+    return g.get('request_stats') if has_request_context() else None
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current() is not None:
+        conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current()
+    if stats is None:
+        return
+    started = conn.info.get('query_started')
+    if started:
+        stats.sql_time += time.perf_counter() - started.pop()
+    stats.queries += 1
+    stats.statements[statement] += 1
+    if cursor.rowcount > 0:  # DML; SELECTs report -1 on most drivers
+        stats.rows += cursor.rowcount
+
+
+def _on_load(target, context):
+    stats = _current()
+    if stats is not None:
+        stats.rows += 1
+
+
+def init_app(app, db):
+    """Time every request and count the SQL it runs on every bound engine."""
+    with app.app_context():
+        for engine in db.engines.values():
+            event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+    if not event.contains(Mapper, 'load', _on_load):
+        event.listen(Mapper, 'load', _on_load)
+
+    @app.before_request
+    def start_request_stats():
+        g.request_stats = RequestStats()
+
+    @app.after_request
+    def note_status(response):
+        g.response_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def record_request_stats(exc):
+        stats = g.pop('request_stats', None)
+        if stats is not None:
+            route = request.url_rule.rule if request.url_rule else 'unmatched'
+            metrics.record(route, request.method, g.get('response_status', 500), stats)
+
+    token = os.getenv('METRICS_TOKEN')
+
+    @app.route('/metrics', methods=['GET'])
+    @limiter.exempt  # scraped every few seconds
+    def prometheus_metrics():
+        """Prometheus scrape endpoint; set METRICS_TOKEN to require a bearer token."""
+        if token and request.headers.get('Authorization') != f'Bearer {token}':
+            return Response('forbidden\n', status=403, mimetype='text/plain')
+        return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
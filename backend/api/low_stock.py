@@ -0,0 +1,102 @@
+# low_stock.py - materialized set of products at or below their minimum stock level
+import os
+import threading
+import time
+from collections import namedtuple
+from extensions import db
+from models import Product
+from pagination import cached_count
+from db_routing import use_primary
+import model_events
+
+LowStockItem = namedtuple('LowStockItem', ['id', 'sku', 'name', 'stock_quantity', 'min_stock_level'])
+
+
+def _snapshot(product):
+    return LowStockItem(product.id, product.sku, product.name, product.stock_quantity, product.min_stock_level)
+
+
+def is_critical(item):
+    # Mirrors the SQL predicate: NULL on either side is never critical.
+    return (item.stock_quantity is not None and item.min_stock_level is not None
+            and item.stock_quantity <= item.min_stock_level)
+
+
+def reorder_quantity(item):
+    """Suggested restock: bring stock back up to twice the minimum level."""
+    return max((item.min_stock_level or 0) * 2 - (item.stock_quantity or 0), 0)
+
+
+class LowStockTracker:
+    """product id -> LowStockItem for every product with stock <= min level.
+
+    Loaded once through the partial index ix_products_low_stock, then kept
+    current from committed Product changes: ORM edits and restocks arrive
+    via model_events, checkout records its UPDATE ... RETURNING rows. Reads
+    cost O(critical items), never O(catalog). Other worker processes'
+    changes are picked up by a periodic reload every `max_age` seconds.
+    """
+
+    def __init__(self, max_age=300):
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._critical = None
+        self._loaded_at = 0.0
+        self._listeners = []
+
+    def _load(self):
+        # Kept current from primary commits, so it must not start from a stale replica.
+        with use_primary():
+            rows = db.session.query(
+                Product.id, Product.sku, Product.name, Product.stock_quantity, Product.min_stock_level
+            ).filter(Product.stock_quantity <= Product.min_stock_level).order_by(Product.name).all()
+        self._critical = {row.id: _snapshot(row) for row in rows}
+        self._loaded_at = time.monotonic()
+
+    def _items(self):
+        with self._lock:
+            if self._critical is None or time.monotonic() - self._loaded_at > self.max_age:
+                self._load()
+            return list(self._critical.values())
+
+    def critical_items(self):
+        """Critical products ordered by name."""
+        return sorted(self._items(), key=lambda item: (item.name, item.id))
+
+    def summary(self):
+        items = self.critical_items()
+        return {
+            'total_products': cached_count('products:total', Product.query),
+            'critical_stock': len(items),
+            'critical_items': items
+        }
+
+    def add_listener(self, callback):
+        """Call callback('alert' | 'cleared', item) when a product enters or leaves the set."""
+        self._listeners.append(callback)
+
+    def on_product_change(self, kind, item):
+        with self._lock:
+            if self._critical is None:
+                return
+            if kind == 'reset':
+                self._critical = None
+                return
+            was_critical = item.id in self._critical
+            if kind == 'upsert' and is_critical(item):
+                self._critical[item.id] = item
+                transition = None if was_critical else 'alert'
+            else:
+                self._critical.pop(item.id, None)
+                transition = 'cleared' if was_critical else None
+        if transition:
+            for callback in self._listeners:
+                callback(transition, item)
+
+    def invalidate(self):
+        with self._lock:
+            self._critical = None
+
+
+low_stock = LowStockTracker(max_age=int(os.getenv('LOW_STOCK_MAX_AGE', '300')))
+model_events.subscribe(Product, _snapshot, low_stock.on_product_change)
@@ -0,0 +1,26 @@
+"""Drop the (timestamp, id) audit log index; /audit-logs pages by id
+
+Revision ID: 0c6b3e8d9a41
+Revises: f2c8e5a1b7d3
+Create Date: 2025-08-19 10:12:44.503117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0c6b3e8d9a41'
+down_revision = 'f2c8e5a1b7d3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('audit_logs', schema=None) as batch_op:
+        batch_op.drop_index('ix_audit_logs_timestamp_id')
+
+
+def downgrade():
+    with op.batch_alter_table('audit_logs', schema=None) as batch_op:
+        batch_op.create_index('ix_audit_logs_timestamp_id', ['timestamp', 'id'], unique=False)
@@ -0,0 +1,34 @@
+"""Add indexes backing ORDER BY in reports and product listings
+
+Revision ID: 3f9c2b7d41e8
+Revises: aa2038b07000
+Create Date: 2025-07-28 10:12:41.208317
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9c2b7d41e8'
+down_revision = 'aa2038b07000'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('transactions', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_transactions_transaction_date'), ['transaction_date'], unique=False)
+        batch_op.create_index(batch_op.f('ix_transactions_employee_id'), ['employee_id'], unique=False)
+
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_products_name'), ['name'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_products_name'))
+
+    with op.batch_alter_table('transactions', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_transactions_employee_id'))
+        batch_op.drop_index(batch_op.f('ix_transactions_transaction_date'))
@@ -0,0 +1,31 @@
+"""Add partial index over low-stock products
+
+Revision ID: 5a9d04c7e1b2
+Revises: e3b8f61d2a97
+Create Date: 2025-08-02 16:05:09.481337
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5a9d04c7e1b2'
+down_revision = 'e3b8f61d2a97'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        # Only rows at or below their minimum are indexed
+        batch_op.create_index(
+            'ix_products_low_stock', ['name'], unique=False,
+            sqlite_where=sa.text('stock_quantity <= min_stock_level'),
+            postgresql_where=sa.text('stock_quantity <= min_stock_level')
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.drop_index('ix_products_low_stock')
@@ -0,0 +1,42 @@
+"""Add sales rollup and watermark tables
+
+Revision ID: 8d41a6c0e2f5
+Revises: 3f9c2b7d41e8
+Create Date: 2025-07-29 14:03:12.554120
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d41a6c0e2f5'
+down_revision = '3f9c2b7d41e8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('sales_rollups',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('granularity', sa.String(length=10), nullable=False),
+    sa.Column('bucket_start', sa.DateTime(), nullable=False),
+    sa.Column('dimension', sa.String(length=20), nullable=False),
+    sa.Column('dimension_key', sa.String(length=64), nullable=False),
+    sa.Column('total_sales', sa.Float(), nullable=False),
+    sa.Column('transaction_count', sa.Integer(), nullable=False),
+    sa.Column('items_sold', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('granularity', 'dimension', 'bucket_start', 'dimension_key', name='uq_sales_rollups_bucket')
+    )
+    op.create_table('rollup_watermarks',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('last_transaction_id', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade():
+    op.drop_table('rollup_watermarks')
+    op.drop_table('sales_rollups')
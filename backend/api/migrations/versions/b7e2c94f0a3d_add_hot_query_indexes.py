@@ -0,0 +1,66 @@
+"""Add composite and covering indexes for report, receipt and history queries
+
+Revision ID: b7e2c94f0a3d
+Revises: 5a9d04c7e1b2
+Create Date: 2025-08-04 11:26:37.603915
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e2c94f0a3d'
+down_revision = '5a9d04c7e1b2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('transactions', schema=None) as batch_op:
+        # The composites lead with the same columns, so the old single-column
+        # indexes become redundant
+        batch_op.drop_index('ix_transactions_transaction_date')
+        batch_op.drop_index('ix_transactions_employee_id')
+        batch_op.create_index('ix_transactions_date_amount', ['transaction_date', 'total_amount'], unique=False)
+        batch_op.create_index('ix_transactions_employee_date', ['employee_id', 'transaction_date'], unique=False)
+        batch_op.create_index('ix_transactions_customer_date', ['customer_id', 'transaction_date'], unique=False)
+
+    with op.batch_alter_table('sale_items', schema=None) as batch_op:
+        batch_op.create_index(
+            'ix_sale_items_transaction_covering', ['transaction_id', 'product_id', 'quantity', 'price'], unique=False
+        )
+        batch_op.create_index('ix_sale_items_product_id', ['product_id'], unique=False)
+
+    with op.batch_alter_table('inventory_transactions', schema=None) as batch_op:
+        batch_op.create_index('ix_inventory_transactions_product_timestamp', ['product_id', 'timestamp'], unique=False)
+        batch_op.create_index('ix_inventory_transactions_timestamp', ['timestamp'], unique=False)
+
+    with op.batch_alter_table('audit_logs', schema=None) as batch_op:
+        batch_op.create_index('ix_audit_logs_user_timestamp', ['user_id', 'timestamp'], unique=False)
+
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.create_index('ix_products_category_name_id', ['category_id', 'name', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.drop_index('ix_products_category_name_id')
+
+    with op.batch_alter_table('audit_logs', schema=None) as batch_op:
+        batch_op.drop_index('ix_audit_logs_user_timestamp')
+
+    with op.batch_alter_table('inventory_transactions', schema=None) as batch_op:
+        batch_op.drop_index('ix_inventory_transactions_timestamp')
+        batch_op.drop_index('ix_inventory_transactions_product_timestamp')
+
+    with op.batch_alter_table('sale_items', schema=None) as batch_op:
+        batch_op.drop_index('ix_sale_items_product_id')
+        batch_op.drop_index('ix_sale_items_transaction_covering')
+
+    with op.batch_alter_table('transactions', schema=None) as batch_op:
+        batch_op.drop_index('ix_transactions_customer_date')
+        batch_op.drop_index('ix_transactions_employee_date')
+        batch_op.drop_index('ix_transactions_date_amount')
+        batch_op.create_index('ix_transactions_employee_id', ['employee_id'], unique=False)
+        batch_op.create_index('ix_transactions_transaction_date', ['transaction_date'], unique=False)
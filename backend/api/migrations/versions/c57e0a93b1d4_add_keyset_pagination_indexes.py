@@ -0,0 +1,35 @@
+"""Add composite indexes for keyset pagination
+
+Revision ID: c57e0a93b1d4
+Revises: 8d41a6c0e2f5
+Create Date: 2025-07-30 09:47:55.018834
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c57e0a93b1d4'
+down_revision = '8d41a6c0e2f5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        # (name, id) covers everything the single-column name index did
+        batch_op.drop_index('ix_products_name')
+        batch_op.create_index('ix_products_name_id', ['name', 'id'], unique=False)
+
+    with op.batch_alter_table('audit_logs', schema=None) as batch_op:
+        batch_op.create_index('ix_audit_logs_timestamp_id', ['timestamp', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('audit_logs', schema=None) as batch_op:
+        batch_op.drop_index('ix_audit_logs_timestamp_id')
+
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.drop_index('ix_products_name_id')
+        batch_op.create_index('ix_products_name', ['name'], unique=False)
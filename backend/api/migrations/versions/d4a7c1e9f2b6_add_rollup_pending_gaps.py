@@ -0,0 +1,26 @@
+"""Track ids the rollup watermark skipped, for late-committing transactions
+
+Revision ID: d4a7c1e9f2b6
+Revises: b7e2c94f0a3d
+Create Date: 2025-08-11 09:42:18.271604
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4a7c1e9f2b6'
+down_revision = 'b7e2c94f0a3d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('rollup_watermarks', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('pending_gaps', sa.Text(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('rollup_watermarks', schema=None) as batch_op:
+        batch_op.drop_column('pending_gaps')
@@ -0,0 +1,49 @@
+"""Add mpesa_payments table
+
+Revision ID: e3b8f61d2a97
+Revises: c57e0a93b1d4
+Create Date: 2025-08-01 10:22:41.307652
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3b8f61d2a97'
+down_revision = 'c57e0a93b1d4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('mpesa_payments',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('transaction_id', sa.Integer(), nullable=True),
+    sa.Column('employee_id', sa.Integer(), nullable=True),
+    sa.Column('phone', sa.String(length=20), nullable=False),
+    sa.Column('amount', sa.Float(), nullable=False),
+    sa.Column('reference', sa.String(length=20), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('checkout_request_id', sa.String(length=64), nullable=True),
+    sa.Column('merchant_request_id', sa.String(length=64), nullable=True),
+    sa.Column('result_code', sa.Integer(), nullable=True),
+    sa.Column('result_desc', sa.String(length=255), nullable=True),
+    sa.Column('mpesa_receipt', sa.String(length=32), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['employee_id'], ['employees.id'], ),
+    sa.ForeignKeyConstraint(['transaction_id'], ['transactions.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('mpesa_payments', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_mpesa_payments_checkout_request_id'), ['checkout_request_id'], unique=True)
+        batch_op.create_index(batch_op.f('ix_mpesa_payments_transaction_id'), ['transaction_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('mpesa_payments', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_mpesa_payments_transaction_id'))
+        batch_op.drop_index(batch_op.f('ix_mpesa_payments_checkout_request_id'))
+
+    op.drop_table('mpesa_payments')
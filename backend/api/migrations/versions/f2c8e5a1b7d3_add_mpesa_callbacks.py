@@ -0,0 +1,35 @@
+"""Hold M-Pesa callbacks that arrive before their CheckoutRequestID is committed
+
+Revision ID: f2c8e5a1b7d3
+Revises: d4a7c1e9f2b6
+Create Date: 2025-08-12 14:05:37.918244
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2c8e5a1b7d3'
+down_revision = 'd4a7c1e9f2b6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('mpesa_callbacks',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('checkout_request_id', sa.String(length=64), nullable=False),
+    sa.Column('payload', sa.Text(), nullable=False),
+    sa.Column('received_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('mpesa_callbacks', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_mpesa_callbacks_checkout_request_id'), ['checkout_request_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('mpesa_callbacks', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_mpesa_callbacks_checkout_request_id'))
+
+    op.drop_table('mpesa_callbacks')
@@ -0,0 +1,77 @@
+# model_events.py - commit-time change feed for in-process caches
+import logging
+from collections import defaultdict
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+# model class -> list of (snapshot, callback) subscriptions
+_subscribers = defaultdict(list)
+
+_PENDING_KEY = 'model_events.pending'
+
+
+def subscribe(model, snapshot, callback):
+    """Register callback(kind, data) for committed changes to rows of model.
+
+    ``snapshot(obj)`` is called at flush time, while the row is still loaded,
+    and must return plain data. ``kind`` is 'upsert', 'delete' or 'reset'.
+    """
+    _subscribers[model].append((snapshot, callback))
+
+
+def is_insert(obj):
+    """For use in snapshots: True if obj is an ORM row this flush inserts.
+
+    Objects passed to record() are never inserts by this test.
+    """
+    state = inspect(obj, raiseerr=False)
+    return state is not None and state.pending
+
+
+def record(session, model, kind, obj=None):
+    """Queue a change that bypassed the unit of work (bulk/Core writes).
+
+    ``obj`` is anything exposing the model's attributes (e.g. a Row from
+    ``UPDATE ... RETURNING``); each subscriber's snapshot is taken from it
+    now. It is ignored for 'reset'. The change is delivered after the
+    session commits, like ORM changes.
+    """
+    pending = session.info.setdefault(_PENDING_KEY, [])
+    for snapshot, callback in _subscribers.get(model, ()):
+        data = snapshot(obj) if obj is not None else None
+        pending.append((model, callback, kind, data))
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_changes(session, flush_context):
+    changes = [(obj, 'upsert') for obj in session.new]
+    changes += [
+        (obj, 'upsert') for obj in session.dirty
+        if session.is_modified(obj, include_collections=False)
+    ]
+    changes += [(obj, 'delete') for obj in session.deleted]
+
+    for obj, kind in changes:
+        model = type(obj)
+        for snapshot, callback in _subscribers.get(model, ()):
+            # Snapshot now: after commit the instances are expired and reading
+            # them would issue a SELECT per row.
+            session.info.setdefault(_PENDING_KEY, []).append(
+                (model, callback, kind, snapshot(obj))
+            )
+
+
+@event.listens_for(Session, 'after_commit')
+def _dispatch_changes(session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    for model, callback, kind, data in pending or ():
+        try:
+            callback(kind, data)
+        except Exception as e:
+            logging.error(f"Change subscriber for {model.__name__} failed: {str(e)}")
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_changes(session, previous_transaction):
+    if previous_transaction.parent is None:
+        session.info.pop(_PENDING_KEY, None)
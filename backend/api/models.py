@@ -7,6 +7,7 @@ import logging
 import secrets
 import random
 from extensions import db
+from password_pool import PASSWORD_HASH_METHOD
 
 
 metadata = MetaData(naming_convention={
@@ -29,23 +30,45 @@ class Inventory(db.Model):
     stock = db.Column(db.Integer, nullable=False)
     critical_threshold = db.Column(db.Integer, nullable=False, default=5)
 def generate_sample_data():
-    if not SalesReport.query.first():
-        for i in range(24):
-            db.session.add(SalesReport(
-                timestamp=datetime.now() - timedelta(hours=i),
-                total_sales=random.uniform(500, 2000),
-                transaction_count=random.randint(10, 50)
-            ))
-        db.session.commit()
-
     if not Inventory.query.first():
-        for i in range(50):
-            db.session.add(Inventory(
-                product_name=f'Product {i+1}',
-                stock=random.randint(0, 100),
-                critical_threshold=random.randint(3, 10)
-            ))
+        db.session.execute(db.insert(Inventory), [{
+            'product_name': f'Product {i+1}',
+            'stock': random.randint(0, 100),
+            'critical_threshold': random.randint(3, 10)
+        } for i in range(50)])
         db.session.commit()
+
+class SalesRollup(db.Model):
+    """Pre-aggregated sales per time bucket and dimension, kept by rollups.py."""
+    __tablename__ = 'sales_rollups'
+
+    id = db.Column(db.Integer, primary_key=True)
+    granularity = db.Column(db.String(10), nullable=False)  # hour, day or month
+    bucket_start = db.Column(db.DateTime, nullable=False)
+    dimension = db.Column(db.String(20), nullable=False)  # all, employee, category, payment_method
+    dimension_key = db.Column(db.String(64), nullable=False, default='')
+    total_sales = db.Column(db.Float, nullable=False, default=0.0)
+    transaction_count = db.Column(db.Integer, nullable=False, default=0)
+    items_sold = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.UniqueConstraint('granularity', 'dimension', 'bucket_start', 'dimension_key',
+                            name='uq_sales_rollups_bucket'),
+    )
+
+    def __repr__(self):
+        return f"<SalesRollup {self.granularity} {self.bucket_start} {self.dimension}={self.dimension_key}>"
+
+class RollupWatermark(db.Model):
+    __tablename__ = 'rollup_watermarks'
+
+    name = db.Column(db.String(50), primary_key=True)
+    last_transaction_id = db.Column(db.Integer, nullable=False, default=0)
+    # JSON [[low_id, high_id, first_seen_epoch], ...]: ids below the watermark
+    # that were not committed yet when it passed them (see rollups.py)
+    pending_gaps = db.Column(db.Text, nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
 class RoleEnum(db.TypeDecorator):
     impl = db.String(20)
     def process_bind_param(self, value, dialect):
@@ -85,7 +108,7 @@ class Employee(db.Model):
         self.salt = secrets.token_hex(16)  # Generate salt
         self.password_hash = generate_password_hash(
             f"{password}{self.salt}",  # Salted password
-            method='pbkdf2:sha256:100000'
+            method=PASSWORD_HASH_METHOD
         )
 
     def verify_password(self, password):
@@ -105,12 +128,18 @@ class Transaction(db.Model):
     total_amount = db.Column(db.Float, nullable=False)
     transaction_date = db.Column(db.DateTime, default=db.func.current_timestamp())
     discount = db.Column(db.Float, default=0.0)
-    payment_method = Column(Enum('cash', 'mpesa', 'card'))
+    payment_method = Column(Enum('cash', 'mpesa', 'card', name='payment_method_enum'))
     customer_id = db.Column(db.Integer, db.ForeignKey('customers.id'), nullable=True)
     
     employee = db.relationship('Employee', back_populates='transactions')
     sale_items = db.relationship('SaleItem', back_populates='transaction', cascade='all, delete-orphan')
-    
+
+    __table_args__ = (
+        # Covers SUM/COUNT over a date range without touching the table
+        db.Index('ix_transactions_date_amount', 'transaction_date', 'total_amount'),
+        db.Index('ix_transactions_employee_date', 'employee_id', 'transaction_date'),
+        db.Index('ix_transactions_customer_date', 'customer_id', 'transaction_date'),
+    )
 
     def __repr__(self):
         return f"<Transaction {self.id} - {self.total_amount}>"  
@@ -126,8 +155,14 @@ class SaleItem(db.Model):
     transaction = db.relationship('Transaction', back_populates='sale_items')
     product = db.relationship('Product')
 
+    __table_args__ = (
+        # Receipts and rollups read only these columns: index-only lookups
+        db.Index('ix_sale_items_transaction_covering', 'transaction_id', 'product_id', 'quantity', 'price'),
+        db.Index('ix_sale_items_product_id', 'product_id'),
+    )
+
     def __repr__(self):
-        return f"<SaleItem {self.product.name} - {self.quantity}>"
+        return f"<SaleItem {self.product_id} - {self.quantity}>"  # no lazy load of product
 
 
 
@@ -153,6 +188,11 @@ class InventoryTransaction(db.Model):
     reason = db.Column(db.String(255), nullable=True)
     timestamp = db.Column(db.DateTime, default=db.func.current_timestamp())
 
+    __table_args__ = (
+        db.Index('ix_inventory_transactions_product_timestamp', 'product_id', 'timestamp'),
+        db.Index('ix_inventory_transactions_timestamp', 'timestamp'),
+    )
+
     # Relationship back to Product (using backref)
     # No need for separate relationship definition here if using backref
 
@@ -185,6 +225,15 @@ class Product(db.Model):
     stock_quantity = db.Column(db.Integer, default=0)
     min_stock_level = db.Column(db.Integer, default=5)
     category_id = db.Column(db.Integer, db.ForeignKey('categories.id'), nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_products_name_id', 'name', 'id'),  # keyset pagination on (name, id)
+        db.Index('ix_products_category_name_id', 'category_id', 'name', 'id'),  # same, within a category
+        # Only critical rows are indexed, so loading the low-stock set is O(critical)
+        db.Index('ix_products_low_stock', 'name',
+                 sqlite_where=db.text('stock_quantity <= min_stock_level'),
+                 postgresql_where=db.text('stock_quantity <= min_stock_level')),
+    )
     
     def to_dict(self):
         return {
@@ -212,17 +261,16 @@ class Product(db.Model):
     def __repr__(self):
         return f"<Product {self.name}>"
 
-    # Keep your inventory monitoring methods
+    # Keep your inventory monitoring methods (the live set is low_stock.py)
     @staticmethod
     def get_reorder_alerts():
         return Product.query.filter(Product.stock_quantity <= Product.min_stock_level).all()
 
     @staticmethod
     def monitor_inventory():
-        products = Product.query.all()
-        critical_stock = [p for p in products if p.stock_quantity <= p.min_stock_level]
+        critical_stock = Product.get_reorder_alerts()
         return {
-            "total_products": len(products),
+            "total_products": db.session.query(db.func.count(Product.id)).scalar(),
             "critical_stock": len(critical_stock),
             "critical_items": critical_stock
         }
@@ -257,6 +305,40 @@ class MpesaToken(db.Model):
         db.session.commit()
 
 
+class MpesaPayment(db.Model):
+    """One STK push and its outcome, driven by payments.py."""
+    __tablename__ = 'mpesa_payments'
+
+    id = db.Column(db.Integer, primary_key=True)
+    transaction_id = db.Column(db.Integer, db.ForeignKey('transactions.id'), nullable=True, index=True)
+    employee_id = db.Column(db.Integer, db.ForeignKey('employees.id'), nullable=True)
+    phone = db.Column(db.String(20), nullable=False)
+    amount = db.Column(db.Float, nullable=False)
+    reference = db.Column(db.String(20), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, pending, completed, failed
+    checkout_request_id = db.Column(db.String(64), unique=True, nullable=True, index=True)
+    merchant_request_id = db.Column(db.String(64), nullable=True)
+    result_code = db.Column(db.Integer, nullable=True)
+    result_desc = db.Column(db.String(255), nullable=True)
+    mpesa_receipt = db.Column(db.String(32), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<MpesaPayment {self.id} {self.status}>"
+
+
+class MpesaCallback(db.Model):
+    """A callback that arrived before its STK push recorded the
+    CheckoutRequestID; applied by payments.py once the id is committed."""
+    __tablename__ = 'mpesa_callbacks'
+
+    id = db.Column(db.Integer, primary_key=True)
+    checkout_request_id = db.Column(db.String(64), nullable=False, index=True)
+    payload = db.Column(db.Text, nullable=False)
+    received_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+
 
 class AuditLog(db.Model):
     __tablename__ = 'audit_logs'
@@ -269,6 +351,10 @@ class AuditLog(db.Model):
     employee = db.relationship('Employee', back_populates='audit_logs')  # Fixed missing relationship
     details = Column(db.JSON)
 
+    __table_args__ = (
+        db.Index('ix_audit_logs_user_timestamp', 'user_id', 'timestamp'),
+    )
+
     def __repr__(self):
         return f"<AuditLog {self.id} - {self.action}>"
 
@@ -0,0 +1,197 @@
+# mpesa_client.py - pooled HTTP client for the M-Pesa (Daraja) API
+import base64
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from urllib.parse import urlencode
+
+DEFAULT_BASE_URL = 'https://sandbox.safaricom.co.ke'
+TOKEN_PATH = '/oauth/v1/generate?grant_type=client_credentials'
+STK_PUSH_PATH = '/mpesa/stkpush/v1/processrequest'
+
+
+class MpesaError(Exception):
+    """Raised when the M-Pesa API cannot be reached or rejects a request."""
+
+
+def callback_url():
+    """MPESA_CALLBACK (default BASE_URL/mpesa-callback) carrying
+    MPESA_CALLBACK_TOKEN, which the callback route checks."""
+    url = os.getenv('MPESA_CALLBACK') or f"{os.getenv('BASE_URL', '')}/mpesa-callback"
+    token = os.getenv('MPESA_CALLBACK_TOKEN')
+    if token and 'token=' not in url:
+        url += ('&' if '?' in url else '?') + urlencode({'token': token})
+    return url
+
+
+class MpesaClient:
+    """One keep-alive session and one cached OAuth token per process.
+
+    Requests carry (connect, read) timeouts. Connection failures are retried
+    with exponential backoff for every method; 429/5xx responses are only
+    retried for GETs, so an STK push is never sent twice. The access token
+    is refreshed `refresh_margin` seconds before it expires, and only one
+    thread fetches it while the others wait for the result. `requests` is
+    imported with the first client, so workers that never take a payment
+    do not load it.
+    """
+
+    def __init__(self, base_url=DEFAULT_BASE_URL, consumer_key=None, consumer_secret=None,
+                 shortcode=None, passkey=None, callback_url=None, timeout=(3.05, 10),
+                 retries=3, backoff=0.5, pool_size=10, refresh_margin=60):
+        self.base_url = base_url.rstrip('/')
+        self.consumer_key = consumer_key
+        self.consumer_secret = consumer_secret
+        self.shortcode = shortcode
+        self.passkey = passkey
+        self.callback_url = callback_url
+        self.timeout = timeout
+        self.refresh_margin = refresh_margin
+
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+        self.request_errors = requests.exceptions.RequestException
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=Retry(
+                total=retries,
+                connect=retries,
+                read=retries,
+                status=retries,
+                backoff_factor=backoff,
+                status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=frozenset(['GET']),
+                raise_on_status=False
+            )
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self._token = None
+        self._token_expires_at = 0.0
+        self._token_lock = threading.Lock()
+        self.token_fetches = 0
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            base_url=os.getenv('MPESA_BASE_URL', DEFAULT_BASE_URL),
+            consumer_key=os.getenv('MPESA_CKEY'),
+            consumer_secret=os.getenv('MPESA_CSECRET'),
+            shortcode=os.getenv('MPESA_SHORTCODE'),
+            passkey=os.getenv('MPESA_PASSKEY'),
+            callback_url=callback_url(),
+            timeout=(float(os.getenv('MPESA_CONNECT_TIMEOUT', '3.05')),
+                     float(os.getenv('MPESA_READ_TIMEOUT', '10'))),
+            retries=int(os.getenv('MPESA_RETRIES', '3')),
+            pool_size=int(os.getenv('MPESA_POOL_SIZE', '10'))
+        )
+
+    # ------------------- OAuth token -------------------
+    def _token_is_fresh(self, now):
+        return self._token is not None and now < self._token_expires_at - self.refresh_margin
+
+    def access_token(self):
+        """Return a valid access token, fetching a new one at most once at a time."""
+        if self._token_is_fresh(time.monotonic()):
+            return self._token
+        with self._token_lock:
+            # Whoever held the lock before us may already have refreshed it.
+            now = time.monotonic()
+            if self._token_is_fresh(now):
+                return self._token
+            if not self.consumer_key or not self.consumer_secret:
+                raise MpesaError("M-Pesa credentials are missing")
+            try:
+                response = self.session.get(
+                    self.base_url + TOKEN_PATH,
+                    auth=(self.consumer_key, self.consumer_secret),  # HTTP basic auth
+                    timeout=self.timeout
+                )
+                response.raise_for_status()
+                token_data = response.json()
+                token = token_data['access_token']
+                expires_in = int(token_data['expires_in'])
+            except (self.request_errors, ValueError, KeyError) as e:
+                if self._token is not None and now < self._token_expires_at:
+                    # Still valid, just inside the refresh margin: keep using it.
+                    logging.warning(f"M-Pesa token refresh failed, using current token: {str(e)}")
+                    return self._token
+                raise MpesaError(f"Failed to fetch M-Pesa access token: {str(e)}")
+            self._token = token
+            self._token_expires_at = now + expires_in
+            self.token_fetches += 1
+            return token
+
+    def invalidate_token(self):
+        with self._token_lock:
+            self._token = None
+            self._token_expires_at = 0.0
+
+    # ------------------- Requests -------------------
+    def request(self, method, path, json=None, headers=None):
+        """Authenticated JSON request against the API; returns the decoded body."""
+        url = path if path.startswith('http') else self.base_url + path
+        for attempt in range(2):
+            request_headers = {'Authorization': f'Bearer {self.access_token()}'}
+            request_headers.update(headers or {})
+            try:
+                response = self.session.request(
+                    method, url, json=json, headers=request_headers, timeout=self.timeout
+                )
+            except self.request_errors as e:
+                raise MpesaError(f"M-Pesa request failed: {str(e)}")
+            if response.status_code == 401 and attempt == 0:
+                # Token revoked or rotated early: fetch a new one and retry once.
+                self.invalidate_token()
+                continue
+            try:
+                response.raise_for_status()
+                return response.json()
+            except (self.request_errors, ValueError) as e:
+                raise MpesaError(f"M-Pesa request failed: {str(e)}")
+
+    def password(self, timestamp):
+        """The base64(shortcode + passkey + timestamp) STK push password."""
+        raw = f"{self.shortcode}{self.passkey}{timestamp}"
+        return base64.b64encode(raw.encode('utf-8')).decode('utf-8')
+
+    def stk_push(self, phone, amount, reference, description='POS Payment', callback_url=None):
+        """Send a Lipa Na M-Pesa Online (STK push) request."""
+        timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
+        payload = {
+            'BusinessShortCode': self.shortcode,
+            'Password': self.password(timestamp),
+            'Timestamp': timestamp,
+            'TransactionType': 'CustomerPayBillOnline',
+            'Amount': amount,
+            'PartyA': phone,
+            'PartyB': self.shortcode,
+            'PhoneNumber': phone,
+            'CallBackURL': callback_url or self.callback_url,
+            'AccountReference': reference,
+            'TransactionDesc': description
+        }
+        return self.request('POST', STK_PUSH_PATH, json=payload)
+
+    def close(self):
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_mpesa_client():
+    """The process-wide client, built from the environment on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = MpesaClient.from_env()
+    return _client
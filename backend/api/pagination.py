@@ -0,0 +1,76 @@
+# pagination.py - keyset (cursor) pagination with opaque continuation tokens
+import base64
+import json
+import threading
+import time
+from datetime import datetime
+from sqlalchemy import tuple_
+
+MAX_PAGE_SIZE = 200
+COUNT_CACHE_TTL = 30  # seconds
+COUNT_CACHE_SIZE = 1024
+
+_count_cache = {}
+_count_lock = threading.Lock()
+
+
+def encode_cursor(values):
+    """Encode the sort key of the last row on a page as an opaque token."""
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token, decoders):
+    """Decode a token produced by encode_cursor; raises ValueError if malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(decoders):
+            raise ValueError
+        return [decode(v) for decode, v in zip(decoders, values)]
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+
+
+def keyset_query(query, columns, decoders, cursor=None, limit=20, descending=False):
+    """The query for the `limit` rows after `cursor`, in `columns` order."""
+    if cursor:
+        after = tuple_(*columns)
+        values = tuple_(*decode_cursor(cursor, decoders))
+        query = query.filter(after < values if descending else after > values)
+    order = [c.desc() if descending else c.asc() for c in columns]
+    return query.order_by(*order).limit(limit)
+
+
+def keyset_page(query, columns, decoders, cursor=None, limit=20, descending=False):
+    """Return (rows, next_cursor) for the page after `cursor`.
+
+    `columns` must end with a unique column (usually the primary key) and be
+    backed by a composite index in the same order, so every page is a single
+    index range scan no matter how deep it is.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    rows = keyset_query(query, columns, decoders, cursor, limit + 1, descending).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor([getattr(last, c.key) for c in columns])
+    return rows, next_cursor
+
+
+def cached_count(key, query, ttl=COUNT_CACHE_TTL):
+    """COUNT(*) for a filtered query, cached per key for `ttl` seconds."""
+    now = time.monotonic()
+    with _count_lock:
+        hit = _count_cache.get(key)
+        if hit and hit[1] > now:
+            return hit[0]
+    total = query.order_by(None).count()
+    with _count_lock:
+        if len(_count_cache) >= COUNT_CACHE_SIZE:
+            _count_cache.clear()
+        _count_cache[key] = (total, now + ttl)
+    return total
@@ -0,0 +1,161 @@
+# password_pool.py - PBKDF2 hashing/verification on a bounded process pool
+import atexit
+import logging
+import multiprocessing
+import os
+import secrets
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from werkzeug.security import generate_password_hash, check_password_hash
+
+# Cost for new hashes. Stored hashes with a different method are upgraded on
+# the next successful login.
+PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:100000')
+
+
+class PasswordPoolBusy(Exception):
+    """Raised when no pool slot frees up within the admission timeout."""
+
+    def __init__(self, retry_after=1):
+        super().__init__("Authentication service busy, retry shortly")
+        self.retry_after = retry_after
+
+
+def hash_method(password_hash):
+    """The method prefix of a werkzeug hash, e.g. 'pbkdf2:sha256:100000'."""
+    return password_hash.split('$', 1)[0] if password_hash else ''
+
+
+def needs_rehash(password_hash, method=PASSWORD_HASH_METHOD):
+    return hash_method(password_hash) != method
+
+
+# Worker-side functions: module level so they pickle, no Flask/DB imports.
+
+def _hash(salted, method):
+    return generate_password_hash(salted, method=method)
+
+
+def _verify(password_hash, salted):
+    return check_password_hash(password_hash, salted)
+
+
+class PasswordPool:
+    """Runs PBKDF2 work off the request thread with admission control.
+
+    At most `workers` hashes run at once and at most `max_pending` requests
+    may be admitted (running or queued); callers beyond that wait up to
+    `wait_timeout` seconds for a slot and then get PasswordPoolBusy, so a
+    login storm sheds load instead of piling up request threads. With
+    workers=0 the work runs inline (CLI, seeding, single-process tools).
+    """
+
+    def __init__(self, workers=None, max_pending=None, wait_timeout=2.0, start_method='forkserver'):
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.max_pending = max_pending or max(self.workers, 1) * 4
+        self.wait_timeout = wait_timeout
+        self.start_method = start_method
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._stats_lock = threading.Lock()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.rehashed = 0
+        self._wait_total = 0.0
+        self._run_total = 0.0
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context(self.start_method)
+                    )
+        return self._executor
+
+    def _run(self, fn, *args):
+        queued_at = time.perf_counter()
+        if not self._slots.acquire(timeout=self.wait_timeout):
+            with self._stats_lock:
+                self.rejected += 1
+            raise PasswordPoolBusy()
+        started = time.perf_counter()
+        with self._stats_lock:
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            if self.workers <= 0:
+                return fn(*args)
+            return self._get_executor().submit(fn, *args).result()
+        finally:
+            self._slots.release()
+            finished = time.perf_counter()
+            with self._stats_lock:
+                self.in_flight -= 1
+                self.completed += 1
+                self._wait_total += started - queued_at
+                self._run_total += finished - started
+
+    def hash(self, password, salt, method=PASSWORD_HASH_METHOD):
+        return self._run(_hash, f"{password}{salt}", method)
+
+    def verify(self, password_hash, password, salt):
+        return self._run(_verify, password_hash, f"{password}{salt}")
+
+    def set_password(self, employee, password):
+        """Salt and hash a new password for employee (caller commits)."""
+        employee.salt = secrets.token_hex(16)
+        employee.password_hash = self.hash(password, employee.salt)
+
+    def check_password(self, employee, password):
+        """Verify employee's password, upgrading a stale hash in place.
+
+        The caller commits the session if it wants the upgrade persisted.
+        """
+        if not self.verify(employee.password_hash, password, employee.salt):
+            return False
+        if needs_rehash(employee.password_hash):
+            try:
+                employee.password_hash = self.hash(password, employee.salt)
+                with self._stats_lock:
+                    self.rehashed += 1
+            except PasswordPoolBusy:
+                logging.info(f"Skipped rehash for employee {employee.id}: pool busy")
+        return True
+
+    def stats(self):
+        with self._stats_lock:
+            completed = self.completed
+            return {
+                'workers': self.workers,
+                'max_pending': self.max_pending,
+                'in_flight': self.in_flight,
+                'queued': max(0, self.in_flight - max(self.workers, 1)),
+                'peak_in_flight': self.peak_in_flight,
+                'completed': completed,
+                'rejected': self.rejected,
+                'rehashed': self.rehashed,
+                'avg_wait_ms': round(self._wait_total / completed * 1000, 2) if completed else 0.0,
+                'avg_run_ms': round(self._run_total / completed * 1000, 2) if completed else 0.0,
+                'hash_method': PASSWORD_HASH_METHOD
+            }
+
+    def shutdown(self):
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+password_pool = PasswordPool(
+    workers=int(os.getenv('PASSWORD_POOL_WORKERS', str(os.cpu_count() or 1))),
+    max_pending=int(os.getenv('PASSWORD_POOL_MAX_PENDING', '0')) or None,
+    wait_timeout=float(os.getenv('PASSWORD_POOL_WAIT', '2.0')),
+    start_method=os.getenv('PASSWORD_POOL_START_METHOD', 'forkserver')
+)
+atexit.register(password_pool.shutdown)
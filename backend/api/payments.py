@@ -0,0 +1,213 @@
+# payments.py - asynchronous M-Pesa STK push pipeline with callback reconciliation
+import atexit
+import hmac
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import update
+from extensions import db
+from models import MpesaCallback, MpesaPayment, Transaction
+from mpesa_client import get_mpesa_client, MpesaError
+import model_events
+
+FINAL_STATUSES = ('completed', 'failed')
+MAX_WAIT = 30  # seconds a status long-poll may hold a request
+HELD_CALLBACK_TTL = timedelta(days=1)  # unmatched callbacks kept this long for a late STK push commit
+
+# Safaricom posts callbacks unauthenticated; the URL it is given carries this
+# token (mpesa_client.callback_url) and callbacks without it are rejected.
+CALLBACK_TOKEN = os.getenv('MPESA_CALLBACK_TOKEN')
+
+_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv('MPESA_WORKERS', '4')), thread_name_prefix='mpesa-stk'
+)
+atexit.register(_executor.shutdown, wait=False)
+
+# Wakes long-polls in this process as soon as a payment changes; other
+# processes still see the change on their next database check.
+_changed = threading.Condition()
+
+
+def _notify():
+    with _changed:
+        _changed.notify_all()
+
+
+def payment_dict(payment):
+    return {
+        'id': payment.id,
+        'transaction_id': payment.transaction_id,
+        'amount': payment.amount,
+        'phone': payment.phone,
+        'status': payment.status,
+        'checkout_request_id': payment.checkout_request_id,
+        'result_code': payment.result_code,
+        'result_desc': payment.result_desc,
+        'mpesa_receipt': payment.mpesa_receipt,
+        'updated_at': payment.updated_at.isoformat() if payment.updated_at else None
+    }
+
+
+def initiate_payment(phone, amount, transaction_id=None, employee_id=None):
+    """Record a queued payment and hand the STK push to a worker thread.
+
+    Returns the MpesaPayment immediately; the request thread never waits
+    on Safaricom.
+    """
+    payment = MpesaPayment(
+        transaction_id=transaction_id,
+        employee_id=employee_id,
+        phone=phone,
+        amount=amount,
+        reference=f"TX{transaction_id}" if transaction_id else 'POS',
+        status='queued'
+    )
+    db.session.add(payment)
+    db.session.commit()
+    _executor.submit(_send_stk_push, current_app._get_current_object(), payment.id)
+    return payment
+
+
+def _send_stk_push(app, payment_id):
+    with app.app_context():
+        try:
+            payment = db.session.get(MpesaPayment, payment_id)
+            try:
+                result = get_mpesa_client().stk_push(payment.phone, payment.amount, payment.reference)
+            except MpesaError as e:
+                logging.error(f"STK push for payment {payment_id} failed: {str(e)}")
+                payment.status = 'failed'
+                payment.result_desc = str(e)[:255]
+            else:
+                payment.checkout_request_id = result.get('CheckoutRequestID')
+                payment.merchant_request_id = result.get('MerchantRequestID')
+                payment.status = 'pending'
+            db.session.commit()
+            if payment.checkout_request_id:
+                # The callback may have beaten this commit; it was held.
+                _apply_held(payment)
+        except Exception as e:
+            db.session.rollback()
+            logging.error(f"Payment worker error for payment {payment_id}: {str(e)}")
+        finally:
+            db.session.remove()
+            _notify()
+
+
+def callback_authorized(token):
+    """True if token matches MPESA_CALLBACK_TOKEN; always False when it is unset."""
+    return bool(CALLBACK_TOKEN) and token is not None and hmac.compare_digest(token, CALLBACK_TOKEN)
+
+
+def _stk_callback(data):
+    return (data or {}).get('Body', {}).get('stkCallback', {})
+
+
+def apply_callback(data):
+    """Reconcile a Safaricom STK callback with its payment.
+
+    Looks the payment up by CheckoutRequestID (unique index). Repeated
+    callbacks for a payment that already reached a final state are ignored.
+    A callback whose id is not committed yet (it can beat the STK push
+    worker's commit) is held in mpesa_callbacks and applied when it is.
+    Returns the payment, or None if the callback matches nothing yet.
+    """
+    checkout_request_id = _stk_callback(data).get('CheckoutRequestID')
+    if not checkout_request_id:
+        return None
+    payment = MpesaPayment.query.filter_by(checkout_request_id=checkout_request_id).first()
+    if payment is None:
+        _hold(checkout_request_id, data)
+        # The worker checks for held callbacks after its commit; check again
+        # here so a commit landing between the two lookups is not missed.
+        payment = MpesaPayment.query.filter_by(checkout_request_id=checkout_request_id).first()
+        if payment is None:
+            logging.warning(f"M-Pesa callback for unknown CheckoutRequestID {checkout_request_id} held")
+            return None
+        return _apply_held(payment)
+    _reconcile(payment, data)
+    db.session.commit()
+    _notify()
+    return payment
+
+
+def _hold(checkout_request_id, data):
+    MpesaCallback.query.filter(
+        MpesaCallback.received_at < datetime.utcnow() - HELD_CALLBACK_TTL
+    ).delete(synchronize_session=False)
+    db.session.add(MpesaCallback(checkout_request_id=checkout_request_id, payload=json.dumps(data)))
+    db.session.commit()
+
+
+def _apply_held(payment):
+    """Apply and drop the callbacks held for payment's CheckoutRequestID."""
+    held = MpesaCallback.query.filter_by(
+        checkout_request_id=payment.checkout_request_id
+    ).order_by(MpesaCallback.id).all()
+    if not held:
+        return payment
+    for callback in held:
+        _reconcile(payment, json.loads(callback.payload))
+    # Core delete: both sides may apply the same held row; the second finds nothing.
+    MpesaCallback.query.filter(
+        MpesaCallback.id.in_([callback.id for callback in held])
+    ).delete(synchronize_session=False)
+    db.session.commit()
+    _notify()
+    return payment
+
+
+def _reconcile(payment, data):
+    """Copy a callback's outcome onto payment (no commit); final states are kept."""
+    if payment.status in FINAL_STATUSES:
+        return
+    callback = _stk_callback(data)
+    metadata = {
+        item.get('Name'): item.get('Value')
+        for item in callback.get('CallbackMetadata', {}).get('Item', [])
+    }
+    payment.result_code = int(callback.get('ResultCode', -1))
+    payment.result_desc = (callback.get('ResultDesc') or '')[:255]
+    if payment.result_code == 0:
+        payment.status = 'completed'
+        payment.mpesa_receipt = metadata.get('MpesaReceiptNumber')
+        if payment.transaction_id is not None:
+            row = db.session.execute(
+                update(Transaction)
+                .where(Transaction.id == payment.transaction_id)
+                .values(payment_method='mpesa')
+                .returning(*Transaction.__table__.columns)
+                .execution_options(synchronize_session=False)
+            ).first()
+            if row is not None:
+                # The UPDATE skips the ORM: tell the caches (receipts) on commit.
+                model_events.record(db.session, Transaction, 'upsert', row)
+    else:
+        payment.status = 'failed'
+    payment.updated_at = datetime.utcnow()
+
+
+def wait_for_payment(payment_id, known_status=None, timeout=MAX_WAIT):
+    """Long-poll: return the payment once its status differs from known_status.
+
+    Returns as soon as the status changes, the payment is final, or the
+    timeout expires (whichever is first); None if the payment does not exist.
+    """
+    deadline = time.monotonic() + min(max(timeout, 0), MAX_WAIT)
+    while True:
+        db.session.expire_all()
+        payment = db.session.get(MpesaPayment, payment_id)
+        if payment is None or payment.status != known_status or payment.status in FINAL_STATUSES:
+            return payment
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return payment
+        # End the read transaction so the next check sees other commits.
+        db.session.rollback()
+        with _changed:
+            _changed.wait(min(remaining, 1.0))
@@ -0,0 +1,259 @@
+# product_import.py - chunked bulk import/upsert of products from CSV or NDJSON
+import csv
+import io
+import json
+import logging
+import math
+import secrets
+import time
+from collections import namedtuple
+from itertools import islice
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from extensions import db
+from models import Product, Category
+import model_events
+
+IMPORT_FORMATS = ('csv', 'ndjson')
+CHUNK_SIZE = 5000
+MAX_REPORTED_ERRORS = 100
+
+ImportResult = namedtuple('ImportResult', ['rows', 'imported', 'invalid', 'errors', 'elapsed', 'rows_per_sec'])
+
+
+def _dialect_insert():
+    """INSERT with ON CONFLICT support for the bound database."""
+    name = db.engine.dialect.name
+    if name == 'sqlite':
+        return sqlite.insert
+    if name == 'postgresql':
+        return postgresql.insert
+    raise ValueError(f"Bulk upsert is not supported on {name}")
+
+
+def read_rows(stream, fmt='csv'):
+    """Yield one dict per product from a text stream."""
+    if fmt == 'csv':
+        yield from csv.DictReader(stream)
+    elif fmt == 'ndjson':
+        for line in stream:
+            line = line.strip()
+            if line:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    yield {'__error__': 'Invalid JSON'}
+    else:
+        raise ValueError(f"Unsupported format: {fmt}")
+
+
+def _validate(raw):
+    """Normalize one input row; raises ValueError with a readable message."""
+    if not isinstance(raw, dict):
+        raise ValueError('row must be an object')
+    if '__error__' in raw:
+        raise ValueError(raw['__error__'])
+    name = str(raw.get('name') or '').strip()
+    if not name:
+        raise ValueError('name is required')
+    try:
+        price = float(raw.get('price'))
+    except (TypeError, ValueError):
+        raise ValueError('price must be a number')
+    if not math.isfinite(price):
+        raise ValueError('price must be a finite number')
+    if price < 0:
+        raise ValueError('price must not be negative')
+    stock = raw.get('stock_quantity', raw.get('stock'))
+    min_stock = raw.get('min_stock_level')
+    try:
+        stock = int(stock) if stock not in (None, '') else 0
+        min_stock = int(min_stock) if min_stock not in (None, '') else 5
+    except (TypeError, ValueError):
+        raise ValueError('stock_quantity and min_stock_level must be integers')
+    sku = str(raw.get('sku') or '').strip() or None
+    if sku is not None and len(sku) > 50:
+        raise ValueError('sku must be at most 50 characters')
+    category_id = raw.get('category_id')
+    try:
+        category_id = int(category_id) if category_id not in (None, '') else None
+    except (TypeError, ValueError):
+        raise ValueError('category_id must be an integer')
+    return {
+        'sku': sku,
+        'name': name[:100],
+        'price': price,
+        'stock_quantity': stock,
+        'min_stock_level': min_stock,
+        'category_id': category_id,
+        'category': str(raw.get('category') or '').strip() or None,
+    }
+
+
+def _candidate_sku(name):
+    return f"{name[:3].upper()}-{secrets.token_hex(4).upper()}"
+
+
+def generate_skus(names, taken=()):
+    """Unique SKUs for the given product names with one query per round.
+
+    Candidates are random, so a second round is almost never needed; the
+    existing-SKU check is a single IN query against the unique index.
+    """
+    taken = set(taken)
+    skus = [None] * len(names)
+    pending = list(range(len(names)))
+    while pending:
+        candidates = {}
+        for i in pending:
+            sku = _candidate_sku(names[i])
+            while sku in taken or sku in candidates:
+                sku = _candidate_sku(names[i])
+            candidates[sku] = i
+        existing = set(db.session.execute(
+            select(Product.sku).where(Product.sku.in_(list(candidates)))
+        ).scalars())
+        pending = []
+        for sku, i in candidates.items():
+            if sku in existing:
+                pending.append(i)
+            else:
+                skus[i] = sku
+                taken.add(sku)
+    return skus
+
+
+class _CategoryResolver:
+    """Category name -> id, loaded once and extended in batches."""
+
+    def __init__(self):
+        self._ids = {name.lower(): cid for cid, name in db.session.query(Category.id, Category.name)}
+        self.created = 0
+
+    def resolve(self, names, insert):
+        missing = {name.lower(): name for name in names if name.lower() not in self._ids}
+        if missing:
+            # RETURNING yields only the rows actually inserted: names another
+            # writer created first are resolved below but not counted.
+            inserted = db.session.execute(
+                insert(Category).on_conflict_do_nothing(index_elements=['name']).returning(Category.id),
+                [{'name': name} for name in missing.values()]
+            ).all()
+            created = db.session.query(Category.id, Category.name).filter(
+                Category.name.in_(list(missing.values()))
+            )
+            for cid, name in created:
+                self._ids[name.lower()] = cid
+            self.created += len(inserted)
+        return self._ids
+
+
+def _upsert_chunk(rows, insert, update_existing):
+    """Insert or update rows; returns how many were written (skipped conflicts excluded)."""
+    statement = insert(Product)
+    if update_existing:
+        excluded = statement.excluded
+        statement = statement.on_conflict_do_update(
+            index_elements=['sku'],
+            set_={
+                'name': excluded.name,
+                'price': excluded.price,
+                'stock_quantity': excluded.stock_quantity,
+                'min_stock_level': excluded.min_stock_level,
+                'category_id': excluded.category_id,
+            }
+        )
+    else:
+        statement = statement.on_conflict_do_nothing(index_elements=['sku'])
+    # Counted from RETURNING: rowcount is not reliable for executemany on every driver.
+    return len(db.session.execute(statement.returning(Product.id), rows).all())
+
+
+def _announce_bulk_write(categories_changed):
+    """Bulk writes skip the ORM: have the in-process caches rebuild. Sent
+    once per import, not per chunk, so subscribers rebuild once."""
+    model_events.record(db.session, Product, 'reset')
+    if categories_changed:
+        model_events.record(db.session, Category, 'reset')
+    db.session.commit()
+
+
+def import_products(raw_rows, chunk_size=CHUNK_SIZE, update_existing=True, progress=None):
+    """Validate and upsert products in chunks, committing after each chunk.
+
+    Invalid rows are skipped and reported (first MAX_REPORTED_ERRORS). SKUs
+    missing from the input are generated; categories given by name are
+    created if needed. `progress(dict)` is called after every chunk.
+    """
+    insert = _dialect_insert()
+    categories = _CategoryResolver()
+    started = time.perf_counter()
+    rows_read = imported = invalid = 0
+    errors = []
+    raw_rows = iter(raw_rows)
+
+    while True:
+        chunk = list(islice(raw_rows, chunk_size))
+        if not chunk:
+            break
+        valid = {}
+        unnamed = []
+        for raw in chunk:
+            rows_read += 1
+            try:
+                row = _validate(raw)
+            except ValueError as e:
+                invalid += 1
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    errors.append({'row': rows_read, 'error': str(e)})
+                continue
+            if row['sku'] is None:
+                unnamed.append(row)
+            else:
+                valid[row['sku']] = row  # last occurrence of a SKU wins
+
+        for row, sku in zip(unnamed, generate_skus([r['name'] for r in unnamed], valid)):
+            row['sku'] = sku
+            valid[sku] = row
+
+        written = 0
+        try:
+            names = {row['category'] for row in valid.values() if row['category']}
+            category_ids = categories.resolve(names, insert) if names else {}
+            for row in valid.values():
+                category = row.pop('category')
+                if category and row['category_id'] is None:
+                    row['category_id'] = category_ids.get(category.lower())
+            if valid:
+                written = _upsert_chunk(list(valid.values()), insert, update_existing)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            if imported or categories.created:
+                _announce_bulk_write(categories.created)  # earlier chunks are committed
+            raise
+        imported += written
+
+        if progress is not None:
+            elapsed = time.perf_counter() - started
+            progress({
+                'rows': rows_read,
+                'imported': imported,
+                'invalid': invalid,
+                'elapsed': round(elapsed, 2),
+                'rows_per_sec': round(rows_read / elapsed, 1) if elapsed else 0.0
+            })
+
+    if imported or categories.created:
+        _announce_bulk_write(categories.created)
+    elapsed = time.perf_counter() - started
+    logging.info(f"Imported {imported} products ({invalid} invalid) in {elapsed:.1f}s")
+    return ImportResult(
+        rows_read, imported, invalid, errors, round(elapsed, 2),
+        round(rows_read / elapsed, 1) if elapsed else 0.0
+    )
+
+
+def text_stream(binary):
+    """Wrap a binary upload/request stream for read_rows()."""
+    return io.TextIOWrapper(binary, encoding='utf-8-sig', newline='')
@@ -0,0 +1,112 @@
+# query_plans.py - EXPLAIN the hot queries and flag any that fall back to a table scan
+import re
+from collections import namedtuple
+from datetime import datetime, timedelta
+from models import AuditLog
+from extensions import db
+from employee_analytics import performance_query
+from exports import inventory_history_query, transactions_query
+from pagination import encode_cursor, keyset_query
+from receipts import transaction_query
+from rollups import (
+    GRANULARITIES, batch_items_query, bucket_start, existing_rollups_query,
+    late_transactions_query, new_transactions_query, rollups_query
+)
+from sales_analytics import sales_statements
+from utils import sales_report_statements
+from blueprints.products import PRODUCT_PAGE_KEY, filtered_products
+from blueprints.reports import AUDIT_LOG_PAGE_KEY
+
+PlanResult = namedtuple('PlanResult', ['name', 'ok', 'plan', 'problems'])
+
+_SQLITE_SCAN = re.compile(r'^SCAN (\w+)(?! USING (?:COVERING )?INDEX)(?! USING INTEGER PRIMARY KEY)')
+_SQLITE_SUBQUERY = re.compile(r'^(?:CO-ROUTINE|MATERIALIZE) (\w+)')
+
+
+def _hot_queries():
+    """name -> statement, built by the same functions the routes and services call."""
+    end = datetime(2025, 1, 31)
+    start = end - timedelta(days=30)
+    report_totals, report_transactions = sales_report_statements(start, end)
+    analytics_transactions, analytics_items = sales_statements(start, end)
+    rollup_keys = [
+        (granularity, bucket_start(start, granularity), dimension, '1')
+        for granularity in GRANULARITIES for dimension in ('all', 'employee')
+    ]
+    return {
+        # utils.generate_sales_report
+        'report_totals': report_totals,
+        'report_transactions': report_transactions,
+        # /reports/analytics and the tesseract report (sales_analytics.load_sales)
+        'analytics_transactions': analytics_transactions,
+        'analytics_items': analytics_items,
+        # /reports/employees and utils.get_employee_performance
+        'employee_performance': performance_query(start, end),
+        'employee_performance_one': performance_query(start, end, employee_id=1),
+        # /reports/sales
+        'rollup_report': rollups_query('day', start, end, 'employee'),
+        # rollups.refresh_rollups
+        'rollup_new_transactions': new_transactions_query(1000, 5000),
+        'rollup_late_transactions': late_transactions_query([[10, 20, 0], [40, 40, 0]]),
+        'rollup_items': batch_items_query(1, 5000),
+        'rollup_existing': existing_rollups_query(rollup_keys),
+        # /receipt/<id>
+        'receipt': transaction_query(1),
+        # /exports/transactions and /exports/inventory-history?product_id=
+        'export_transactions': transactions_query(start, end),
+        'inventory_history': inventory_history_query(1),
+        # /audit-logs (keyset page)
+        'audit_log_page': keyset_query(
+            AuditLog.query, *AUDIT_LOG_PAGE_KEY, cursor=encode_cursor([1000]), limit=51, descending=True
+        ).statement,
+        # GET /products_search?category_id= (keyset page)
+        'products_by_category': keyset_query(
+            filtered_products(category_id=1), *PRODUCT_PAGE_KEY, cursor=encode_cursor(['m', 1]), limit=51
+        ).statement,
+    }
+
+
+def _explain(conn, statement):
+    dialect = conn.dialect.name
+    # IN lists are expanding parameters; render them so EXPLAIN gets plain placeholders.
+    compiled = statement.compile(dialect=conn.dialect, compile_kwargs={'render_postcompile': True})
+    params = compiled.construct_params()
+    if compiled.positional:
+        params = tuple(params[name] for name in compiled.positiontup)
+    if dialect == 'sqlite':
+        rows = conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {compiled}', params).fetchall()
+        return [row[-1] for row in rows]
+    if dialect == 'postgresql':
+        rows = conn.exec_driver_sql(f'EXPLAIN {compiled}', params).fetchall()
+        return [row[0] for row in rows]
+    raise ValueError(f"Plan checks are not supported on {dialect}")
+
+
+def _problems(dialect, plan):
+    if dialect == 'sqlite':
+        # Scanning a subquery's own rows (a window over an indexed search) is fine.
+        subqueries = {m.group(1) for m in map(_SQLITE_SUBQUERY.match, plan) if m}
+        return [line for line in plan
+                if (m := _SQLITE_SCAN.match(line)) and m.group(1) not in subqueries]
+    return [line.strip() for line in plan if 'Seq Scan' in line]
+
+
+def check_query_plans(names=None):
+    """EXPLAIN each hot query; a result is not ok if any table is fully scanned.
+
+    On PostgreSQL sequential scans are disabled for the check, so a small
+    table does not hide a missing index.
+    """
+    queries = _hot_queries()
+    results = []
+    with db.engine.connect() as conn:
+        if conn.dialect.name == 'postgresql':
+            conn.exec_driver_sql('SET LOCAL enable_seqscan = off')
+        for name, statement in queries.items():
+            if names and name not in names:
+                continue
+            plan = _explain(conn, statement)
+            problems = _problems(conn.dialect.name, plan)
+            results.append(PlanResult(name, not problems, plan, problems))
+        conn.rollback()
+    return results
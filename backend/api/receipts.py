@@ -0,0 +1,176 @@
+# receipts.py - receipts loaded in one query and cached once rendered
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload
+from extensions import db
+from models import Transaction, SaleItem
+from shared_state import shared_values
+import model_events
+
+RECEIPT_WIDTH = 40  # characters per line on an 80mm thermal printer
+
+RenderedReceipt = namedtuple('RenderedReceipt', ['data', 'text'])
+
+
+def transaction_query(transaction_id):
+    """Transaction with cashier, items and products as a single joined SELECT."""
+    return select(Transaction).options(
+        joinedload(Transaction.employee),
+        joinedload(Transaction.sale_items).joinedload(SaleItem.product)
+    ).where(Transaction.id == transaction_id)
+
+
+def load_transaction(transaction_id):
+    return db.session.execute(transaction_query(transaction_id)).unique().scalar_one_or_none()
+
+
+def receipt_data(transaction):
+    items = [{
+        'product_id': item.product_id,
+        'sku': item.product.sku if item.product else None,
+        'name': item.product.name if item.product else f'Product {item.product_id}',
+        'quantity': item.quantity,
+        'price': item.price,
+        'line_total': round(item.quantity * item.price, 2)
+    } for item in sorted(transaction.sale_items, key=lambda i: i.id)]
+    return {
+        'transaction_id': transaction.id,
+        'employee_id': transaction.employee_id,
+        'cashier': transaction.employee.username if transaction.employee else None,
+        'customer_id': transaction.customer_id,
+        'payment_method': transaction.payment_method,
+        'subtotal': round(sum(item['line_total'] for item in items), 2),
+        'discount': transaction.discount or 0.0,
+        'total_amount': transaction.total_amount,
+        'transaction_date': transaction.transaction_date.strftime('%Y-%m-%d %H:%M:%S')
+        if transaction.transaction_date else None,
+        'items': items
+    }
+
+
+def _line(left, right, width=RECEIPT_WIDTH):
+    left = left[:max(width - len(right) - 1, 0)]
+    return f"{left}{' ' * (width - len(left) - len(right))}{right}"
+
+
+def render_text(data, width=RECEIPT_WIDTH):
+    """Plain-text receipt for printing."""
+    rule = '-' * width
+    lines = [f"RECEIPT #{data['transaction_id']}".center(width).rstrip()]
+    if data['transaction_date']:
+        lines.append(data['transaction_date'])
+    if data['cashier']:
+        lines.append(f"Cashier: {data['cashier']}")
+    lines.append(rule)
+    for item in data['items']:
+        lines.append(item['name'][:width])
+        lines.append(_line(f"  {item['quantity']} x {item['price']:.2f}", f"{item['line_total']:.2f}", width))
+    lines.append(rule)
+    lines.append(_line('Subtotal', f"{data['subtotal']:.2f}", width))
+    if data['discount']:
+        lines.append(_line('Discount', f"-{data['discount']:.2f}", width))
+    lines.append(_line('TOTAL', f"{data['total_amount']:.2f}", width))
+    if data['payment_method']:
+        lines.append(_line('Paid by', data['payment_method'], width))
+    return '\n'.join(lines) + '\n'
+
+
+class ReceiptCache:
+    """transaction id -> RenderedReceipt, least recently used evicted beyond maxsize.
+
+    An edit or delete of the transaction or its items (e.g. the M-Pesa
+    payment_method update) drops the entry here and stamps a version in
+    shared_values; a hit older than `check_interval` seconds compares it, so
+    other workers reload too. Versions expire after `ttl` seconds, and so do
+    entries. Reprints keep the product names the receipt was first rendered with.
+    """
+
+    def __init__(self, maxsize=2048, ttl=86400, check_interval=1):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.check_interval = check_interval
+        self._entries = OrderedDict()  # transaction_id -> [receipt, expires_at, version, checked_at]
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, transaction_id):
+        """Return the RenderedReceipt, loading it on a miss (None if unknown)."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(transaction_id)
+        if entry is not None and entry[1] > now and now - entry[3] > self.check_interval:
+            if shared_values.get(_version_key(transaction_id), 0) == entry[2]:
+                entry[3] = now
+            else:
+                entry = None  # changed on another worker
+        with self._lock:
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(transaction_id)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        # Read the version first: a change committed after this point
+        # replaces it, so the entry stored below will not match.
+        version = shared_values.get(_version_key(transaction_id), 0)
+        transaction = load_transaction(transaction_id)
+        if transaction is None:
+            return None
+        data = receipt_data(transaction)
+        receipt = RenderedReceipt(data, render_text(data))
+        with self._lock:
+            self._entries[transaction_id] = [receipt, now + self.ttl, version, now]
+            self._entries.move_to_end(transaction_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return receipt
+
+    def invalidate(self, transaction_id):
+        with self._lock:
+            self._entries.pop(transaction_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+    def on_change(self, kind, transaction_id):
+        if kind == 'reset':
+            self.clear()
+        elif transaction_id is not None:
+            # Outlives any entry loaded before it, so no worker can miss it
+            shared_values.set(_version_key(transaction_id), time.time(), ttl=self.ttl)
+            self.invalidate(transaction_id)
+
+
+def _version_key(transaction_id):
+    return f'receipt:{transaction_id}:version'
+
+
+receipt_cache = ReceiptCache(
+    maxsize=int(os.getenv('RECEIPT_CACHE_SIZE', '2048')),
+    ttl=int(os.getenv('RECEIPT_CACHE_TTL', '86400')),
+    check_interval=float(os.getenv('RECEIPT_CACHE_CHECK_INTERVAL', '1'))
+)
+# A new transaction has no receipt cached anywhere yet: skip the shared write.
+model_events.subscribe(Transaction, lambda t: None if model_events.is_insert(t) else t.id,
+                       receipt_cache.on_change)
+model_events.subscribe(SaleItem, lambda i: i.transaction_id, receipt_cache.on_change)
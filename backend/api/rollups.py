@@ -0,0 +1,275 @@
+# rollups.py - incremental hourly/daily/monthly sales rollups
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from sqlalchemy import and_, func, or_, select, update
+from extensions import db
+from models import Transaction, SaleItem, Product, SalesRollup, RollupWatermark
+
+GRANULARITIES = ('hour', 'day', 'month')
+DIMENSIONS = ('all', 'employee', 'category', 'payment_method')
+
+WATERMARK_NAME = 'sales_rollups'
+TRANSACTION_COLUMNS = (
+    Transaction.id,
+    Transaction.transaction_date,
+    Transaction.employee_id,
+    Transaction.payment_method,
+    Transaction.total_amount
+)
+
+# How long an id the watermark skipped is re-checked for a late commit.
+LATE_COMMIT_WINDOW = int(os.getenv('ROLLUP_LATE_COMMIT_WINDOW', '600'))
+
+
+def bucket_start(timestamp, granularity):
+    """Truncate a timestamp to the start of its hour, day or month bucket."""
+    if granularity == 'hour':
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    if granularity == 'day':
+        return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+    return timestamp.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _accumulate(deltas, timestamp, dimension, key, sales, transactions, items):
+    for granularity in GRANULARITIES:
+        delta = deltas[(granularity, bucket_start(timestamp, granularity), dimension, key)]
+        delta[0] += sales
+        delta[1] += transactions
+        delta[2] += items
+
+
+def batch_items_query(first_id, last_id):
+    """Quantity and amount per (transaction, category) for a batch of transaction ids."""
+    return select(
+        SaleItem.transaction_id,
+        Product.category_id,
+        func.sum(SaleItem.quantity),
+        func.sum(SaleItem.quantity * SaleItem.price)
+    ).outerjoin(Product, Product.id == SaleItem.product_id).where(
+        SaleItem.transaction_id.between(first_id, last_id)
+    ).group_by(SaleItem.transaction_id, Product.category_id)
+
+
+def new_transactions_query(low_water, batch_size):
+    """The next batch of transactions after the watermark, in id order."""
+    return select(*TRANSACTION_COLUMNS).where(
+        Transaction.id > low_water
+    ).order_by(Transaction.id).limit(batch_size)
+
+
+def late_transactions_query(gaps):
+    """Transactions that committed inside [low, high, seen_at] gaps the watermark skipped."""
+    return select(*TRANSACTION_COLUMNS).where(
+        or_(*(Transaction.id.between(low, high) for low, high, _ in gaps))
+    ).order_by(Transaction.id)
+
+
+def _compute_deltas(first_id, last_id, transactions):
+    """Aggregate one batch of transactions into rollup deltas."""
+    deltas = defaultdict(lambda: [0.0, 0, 0])
+
+    item_rows = db.session.execute(batch_items_query(first_id, last_id)).all()
+
+    items_by_transaction = defaultdict(list)
+    for transaction_id, category_id, quantity, amount in item_rows:
+        items_by_transaction[transaction_id].append((category_id, quantity or 0, amount or 0.0))
+
+    for transaction_id, date, employee_id, payment_method, total_amount in transactions:
+        if date is None:
+            continue
+        lines = items_by_transaction.get(transaction_id, [])
+        item_count = sum(quantity for _, quantity, _ in lines)
+        total_amount = total_amount or 0.0
+        _accumulate(deltas, date, 'all', '', total_amount, 1, item_count)
+        _accumulate(deltas, date, 'employee', str(employee_id), total_amount, 1, item_count)
+        _accumulate(deltas, date, 'payment_method', payment_method or 'unknown', total_amount, 1, item_count)
+        for category_id, quantity, amount in lines:
+            key = str(category_id) if category_id is not None else 'uncategorized'
+            _accumulate(deltas, date, 'category', key, amount, 1, quantity)
+    return deltas
+
+
+def existing_rollups_query(keys):
+    """Select the SalesRollup rows for (granularity, bucket_start, dimension, key) keys.
+
+    One OR branch per (granularity, dimension) pair, so every branch seeks
+    the unique index on its leading columns instead of scanning the table.
+    """
+    groups = defaultdict(set)
+    for granularity, start, dimension, _ in keys:
+        groups[(granularity, dimension)].add(start)
+    return select(SalesRollup).where(or_(*(
+        and_(SalesRollup.granularity == granularity, SalesRollup.dimension == dimension,
+             SalesRollup.bucket_start.in_(sorted(starts)))
+        for (granularity, dimension), starts in sorted(groups.items())
+    )))
+
+
+def _apply_deltas(deltas):
+    if not deltas:
+        return
+    existing = {
+        (r.granularity, r.bucket_start, r.dimension, r.dimension_key): r
+        for r in db.session.scalars(existing_rollups_query(deltas))
+    }
+    for key, (sales, transactions, items) in deltas.items():
+        row = existing.get(key)
+        if row is None:
+            granularity, start, dimension, dimension_key = key
+            db.session.add(SalesRollup(
+                granularity=granularity,
+                bucket_start=start,
+                dimension=dimension,
+                dimension_key=dimension_key,
+                total_sales=sales,
+                transaction_count=transactions,
+                items_sold=items
+            ))
+        else:
+            row.total_sales += sales
+            row.transaction_count += transactions
+            row.items_sold += items
+
+
+def _missing_ranges(low, high, present, seen_at):
+    """[lo, hi, seen_at] for every run of ids in [low, high] not in present."""
+    ranges = []
+    expected = low
+    for transaction_id in sorted(present):
+        if transaction_id > expected:
+            ranges.append([expected, transaction_id - 1, seen_at])
+        expected = transaction_id + 1
+    if expected <= high:
+        ranges.append([expected, high, seen_at])
+    return ranges
+
+
+def _merge_deltas(deltas, more):
+    for key, (sales, transactions, items) in more.items():
+        delta = deltas[key]
+        delta[0] += sales
+        delta[1] += transactions
+        delta[2] += items
+    return deltas
+
+
+def refresh_rollups(batch_size=5000):
+    """Fold transactions newer than the watermark into the rollup tables.
+
+    Each batch advances the watermark with a compare-and-set UPDATE in the
+    same database transaction as the rollup rows, so concurrent refreshers
+    never count a transaction twice. Returns the number of transactions
+    processed.
+
+    Ids are not committed in id order on PostgreSQL, so ids the watermark
+    passes without seeing are kept as pending gaps and re-checked for
+    LATE_COMMIT_WINDOW seconds; a late commit is folded in when it shows up.
+    """
+    processed = 0
+    while True:
+        watermark = db.session.get(RollupWatermark, WATERMARK_NAME)
+        if watermark is None:
+            watermark = RollupWatermark(name=WATERMARK_NAME, last_transaction_id=0)
+            db.session.add(watermark)
+            db.session.commit()
+        low_water = watermark.last_transaction_id
+        stored_gaps = watermark.pending_gaps
+        now = time.time()
+        all_gaps = json.loads(stored_gaps) if stored_gaps else []
+        gaps = [gap for gap in all_gaps if gap[2] > now - LATE_COMMIT_WINDOW]
+
+        late = db.session.execute(late_transactions_query(gaps)).all() if gaps else []
+        transactions = db.session.execute(new_transactions_query(low_water, batch_size)).all()
+        if not transactions and not late and len(gaps) == len(all_gaps):
+            db.session.rollback()
+            return processed
+
+        last_id = transactions[-1][0] if transactions else low_water
+        late_ids = [row[0] for row in late]
+        new_gaps = []
+        for low, high, seen_at in gaps:
+            new_gaps += _missing_ranges(low, high, [i for i in late_ids if low <= i <= high], seen_at)
+        if transactions:
+            new_gaps += _missing_ranges(low_water + 1, last_id, [row[0] for row in transactions], now)
+        try:
+            claimed = db.session.execute(
+                update(RollupWatermark)
+                .where(RollupWatermark.name == WATERMARK_NAME,
+                       RollupWatermark.last_transaction_id == low_water,
+                       RollupWatermark.pending_gaps == stored_gaps if stored_gaps is not None
+                       else RollupWatermark.pending_gaps.is_(None))
+                .values(last_transaction_id=last_id, pending_gaps=json.dumps(new_gaps) if new_gaps else None,
+                        updated_at=datetime.utcnow())
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            if not claimed:
+                # Another worker folded this batch in first.
+                db.session.rollback()
+                continue
+            deltas = defaultdict(lambda: [0.0, 0, 0])
+            if transactions:
+                _merge_deltas(deltas, _compute_deltas(transactions[0][0], last_id, transactions))
+            if late:
+                _merge_deltas(deltas, _compute_deltas(late_ids[0], late_ids[-1], late))
+            _apply_deltas(deltas)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        db.session.expire(watermark)
+        processed += len(transactions) + len(late)
+        if len(transactions) < batch_size:
+            return processed
+
+
+def rebuild_rollups():
+    """Drop every rollup row and recompute from scratch."""
+    SalesRollup.query.delete()
+    RollupWatermark.query.filter_by(name=WATERMARK_NAME).delete()
+    db.session.commit()
+    return refresh_rollups()
+
+
+def rollups_updated_at():
+    """When the watermark last advanced (None before the first refresh)."""
+    return db.session.execute(
+        select(RollupWatermark.updated_at).where(RollupWatermark.name == WATERMARK_NAME)
+    ).scalar()
+
+
+def rollups_query(granularity, start, end, dimension='all'):
+    return select(SalesRollup).where(
+        SalesRollup.granularity == granularity,
+        SalesRollup.dimension == dimension,
+        SalesRollup.bucket_start >= bucket_start(start, granularity),
+        SalesRollup.bucket_start <= end
+    ).order_by(SalesRollup.bucket_start, SalesRollup.dimension_key)
+
+
+def query_rollups(granularity, start, end, dimension='all'):
+    """Return rollup rows for [start, end] ordered by bucket."""
+    return db.session.scalars(rollups_query(granularity, start, end, dimension)).all()
+
+
+def start_rollup_refresher(app, interval):
+    """Run refresh_rollups() every `interval` seconds on a daemon thread."""
+    stop = threading.Event()
+
+    def run():
+        while not stop.wait(interval):
+            with app.app_context():
+                try:
+                    refresh_rollups()
+                except Exception as e:
+                    logging.error(f"Rollup refresh failed: {str(e)}")
+                finally:
+                    db.session.remove()
+
+    thread = threading.Thread(target=run, name='rollup-refresher', daemon=True)
+    thread.start()
+    return stop
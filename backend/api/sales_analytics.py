@@ -0,0 +1,267 @@
+# sales_analytics.py - columnar sales reports: raw-cursor fetches into NumPy arrays, vectorized group-bys
+from collections import namedtuple
+import numpy as np
+from sqlalchemy import case, func, select
+from extensions import db
+from models import Product, SaleItem, Transaction
+
+FETCH_BATCH = 50000
+MAX_BUCKETS = 10000  # keeps an hourly series over years from building a huge response
+
+GRANULARITIES = {'hour': 'h', 'day': 'D', 'month': 'M'}
+GROUP_BY = ('all', 'employee', 'payment_method')
+PAYMENT_METHODS = ('cash', 'mpesa', 'card', 'unknown')
+
+TRANSACTION_DTYPE = np.dtype([
+    ('id', 'i8'), ('employee_id', 'i8'), ('payment', 'i1'), ('seconds', 'f8'), ('amount', 'f8')
+])
+ITEM_DTYPE = np.dtype([('transaction_id', 'i8'), ('product_id', 'i8'), ('quantity', 'i8'), ('revenue', 'f8')])
+
+SalesColumns = namedtuple('SalesColumns', ['transactions', 'items'])
+
+
+def _epoch_seconds(column):
+    if db.engine.dialect.name == 'sqlite':
+        return (func.julianday(column) - 2440587.5) * 86400.0
+    return func.extract('epoch', column)
+
+
+def _fetch(statement, dtype):
+    """Run a Core select through a raw DBAPI cursor into one structured array.
+
+    Rows come back as plain tuples in FETCH_BATCH batches and go straight
+    into NumPy; no ORM objects or Row wrappers are built. The connection is
+    the session's, so @read_replica routing still applies.
+    """
+    conn = db.session.connection(bind_arguments={'clause': statement})
+    dialect = conn.dialect
+    compiled = statement.compile(dialect=dialect)
+    params = compiled.construct_params()
+    for name, bind in compiled.binds.items():
+        process = bind.type.dialect_impl(dialect).bind_processor(dialect)
+        if process is not None and name in params:
+            params[name] = process(params[name])
+    if compiled.positional:
+        params = tuple(params[name] for name in compiled.positiontup)
+
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute(str(compiled), params)
+        batches = []
+        while rows := cursor.fetchmany(FETCH_BATCH):
+            batches.append(np.array(rows, dtype=dtype))
+    finally:
+        cursor.close()
+    return np.concatenate(batches) if batches else np.empty(0, dtype)
+
+
+def sales_statements(start, end):
+    """The transaction and sale-item column selects for [start, end)."""
+    in_range = (Transaction.transaction_date >= start, Transaction.transaction_date < end)
+    payment = case(
+        *((Transaction.payment_method == name, code) for code, name in enumerate(PAYMENT_METHODS[:-1])),
+        else_=len(PAYMENT_METHODS) - 1
+    )
+    transactions = select(
+        Transaction.id, Transaction.employee_id, payment,
+        _epoch_seconds(Transaction.transaction_date), Transaction.total_amount
+    ).where(*in_range)
+    items = select(
+        SaleItem.transaction_id, func.coalesce(SaleItem.product_id, 0),
+        SaleItem.quantity, SaleItem.quantity * SaleItem.price
+    ).join(Transaction, Transaction.id == SaleItem.transaction_id).where(*in_range)
+    return transactions, items
+
+
+def load_sales(start, end):
+    """Transactions in [start, end) sorted by id, and their sale items.
+
+    The two SELECTs do not share a snapshot, so items of a sale committed
+    between them are dropped: every returned item belongs to a returned
+    transaction.
+    """
+    transaction_statement, item_statement = sales_statements(start, end)
+    transactions = _fetch(transaction_statement, TRANSACTION_DTYPE)
+    transactions = transactions[np.argsort(transactions['id'])]  # cheaper than ORDER BY on the date index
+    items = _fetch(item_statement, ITEM_DTYPE)
+    position = np.searchsorted(transactions['id'], items['transaction_id'])
+    matched = position < len(transactions)
+    matched[matched] = transactions['id'][position[matched]] == items['transaction_id'][matched]
+    return SalesColumns(transactions, items if matched.all() else items[matched])
+
+
+def _to_datetime64(seconds):
+    # julianday() is only accurate to a few microseconds; round so 10:00:00 stays in the 10:00 bucket
+    return np.rint(seconds * 1000).astype('int64').astype('datetime64[ms]')
+
+
+def items_per_transaction(columns):
+    """Item count for each row of columns.transactions (an id-sorted join)."""
+    transactions, items = columns
+    position = np.searchsorted(transactions['id'], items['transaction_id'])
+    return np.bincount(position, weights=items['quantity'], minlength=len(transactions)).astype('int64')
+
+
+def bucket_axis(start, end, granularity):
+    """Every hour/day/month bucket overlapping [start, end), gaps included."""
+    unit = GRANULARITIES[granularity]
+    first = np.datetime64(start, 'ms').astype(f'datetime64[{unit}]')
+    last = (np.datetime64(end, 'ms') - np.timedelta64(1, 'ms')).astype(f'datetime64[{unit}]')
+    return np.arange(first, last + 1)
+
+
+def bucket_totals(columns, axis, granularity, item_counts=None):
+    """(sales, transactions, items) per bucket of `axis` via bincount."""
+    transactions = columns.transactions
+    unit = GRANULARITIES[granularity]
+    index = (_to_datetime64(transactions['seconds']).astype(f'datetime64[{unit}]') - axis[0]).astype('int64')
+    if item_counts is None:
+        item_counts = items_per_transaction(columns)
+    size = len(axis)
+    return (
+        np.bincount(index, weights=transactions['amount'], minlength=size),
+        np.bincount(index, minlength=size),
+        np.bincount(index, weights=item_counts, minlength=size).astype('int64')
+    )
+
+
+def group_totals(columns, group_by, item_counts=None):
+    """keys, sales, transactions, items for each employee or payment method."""
+    transactions = columns.transactions
+    field = {'employee': 'employee_id', 'payment_method': 'payment'}[group_by]
+    keys, inverse = np.unique(transactions[field], return_inverse=True)
+    if item_counts is None:
+        item_counts = items_per_transaction(columns)
+    return (
+        keys,
+        np.bincount(inverse, weights=transactions['amount'], minlength=len(keys)),
+        np.bincount(inverse, minlength=len(keys)),
+        np.bincount(inverse, weights=item_counts, minlength=len(keys)).astype('int64')
+    )
+
+
+def moving_average(values, window):
+    """Trailing mean over `window` buckets (fewer at the start of the series)."""
+    if window <= 1 or not len(values):
+        return values.astype('f8')
+    sums = np.cumsum(values, dtype='f8')
+    sums[window:] = sums[window:] - sums[:-window]
+    counts = np.minimum(np.arange(1, len(values) + 1), window)
+    return sums / counts
+
+
+def top_products(items, n=10):
+    """The n products with the most revenue: (product_ids, quantities, revenues)."""
+    product_ids, inverse = np.unique(items['product_id'], return_inverse=True)
+    quantities = np.bincount(inverse, weights=items['quantity'], minlength=len(product_ids)).astype('int64')
+    revenues = np.bincount(inverse, weights=items['revenue'], minlength=len(product_ids))
+    if len(product_ids) > n:
+        best = np.argpartition(revenues, -n)[-n:]
+    else:
+        best = np.arange(len(product_ids))
+    best = best[np.argsort(revenues[best])[::-1]]
+    return product_ids[best], quantities[best], revenues[best]
+
+
+def _totals(transactions, item_counts):
+    sales = float(transactions['amount'].sum())
+    count = len(transactions)
+    items = int(item_counts.sum())
+    return {
+        'total_sales': round(sales, 2),
+        'transaction_count': count,
+        'items_sold': items,
+        'avg_basket_value': round(sales / count, 2) if count else None,
+        'items_per_transaction': round(items / count, 2) if count else None
+    }
+
+
+def _change(current, previous):
+    """Relative change per metric, None when the previous value is zero."""
+    return {
+        key: round((current[key] - previous[key]) / previous[key], 4) if previous[key] else None
+        for key in ('total_sales', 'transaction_count', 'items_sold', 'avg_basket_value')
+        if current[key] is not None and previous[key] is not None
+    }
+
+
+def sales_analytics(start, end, granularity='day', group_by='all', window=7, top_n=10, compare=True):
+    """Totals, a gap-filled series with a moving average, an optional
+    employee/payment-method breakdown, top products and, with `compare`,
+    the change against the preceding period of the same length.
+
+    Both periods come from one fetch of [start - span, end).
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"granularity must be one of: {', '.join(GRANULARITIES)}")
+    if group_by not in GROUP_BY:
+        raise ValueError(f"group_by must be one of: {', '.join(GROUP_BY)}")
+    if end <= start:
+        raise ValueError("end_date must be after start_date")
+
+    axis = bucket_axis(start, end, granularity)
+    if len(axis) > MAX_BUCKETS:
+        raise ValueError(f"{len(axis)} {granularity} buckets requested; use a coarser granularity")
+
+    span = end - start
+    columns = load_sales(start - span if compare else start, end)
+    item_counts = items_per_transaction(columns)
+    current = _to_datetime64(columns.transactions['seconds']) >= np.datetime64(start, 'ms')
+    in_current = current[np.searchsorted(columns.transactions['id'], columns.items['transaction_id'])]
+    period = SalesColumns(columns.transactions[current], columns.items[in_current])
+    period_counts = item_counts[current]
+
+    sales, counts, items = bucket_totals(period, axis, granularity, period_counts)
+    averages = moving_average(sales, window)
+    report = {
+        'start_date': start.isoformat(),
+        'end_date': end.isoformat(),
+        'granularity': granularity,
+        'moving_average_window': window,
+        'totals': _totals(period.transactions, period_counts),
+        'series': [
+            {
+                'timestamp': bucket.isoformat(),
+                'total_sales': round(float(s), 2),
+                'transaction_count': int(c),
+                'items_sold': int(i),
+                'moving_average_sales': round(float(a), 2)
+            } for bucket, s, c, i, a in zip(axis.astype('datetime64[s]').tolist(), sales, counts, items, averages)
+        ]
+    }
+
+    if group_by != 'all':
+        keys, sales, counts, items = group_totals(period, group_by, period_counts)
+        team_sales = sales.sum()
+        order = np.argsort(sales)[::-1]
+        report['group_by'] = group_by
+        report['breakdown'] = [
+            {
+                'key': PAYMENT_METHODS[keys[i]] if group_by == 'payment_method' else int(keys[i]),
+                'total_sales': round(float(sales[i]), 2),
+                'transaction_count': int(counts[i]),
+                'items_sold': int(items[i]),
+                'share_of_sales': round(float(sales[i] / team_sales), 4) if team_sales else None
+            } for i in order
+        ]
+
+    if top_n > 0:
+        product_ids, quantities, revenues = top_products(period.items, top_n)
+        names = dict(db.session.execute(
+            select(Product.id, Product.name).where(Product.id.in_(product_ids.tolist()))
+        ).all()) if len(product_ids) else {}
+        report['top_products'] = [
+            {'product_id': int(p), 'name': names.get(int(p)), 'quantity': int(q), 'revenue': round(float(r), 2)}
+            for p, q, r in zip(product_ids, quantities, revenues)
+        ]
+
+    if compare:
+        previous = ~current
+        previous_totals = _totals(columns.transactions[previous], item_counts[previous])
+        report['previous_period'] = {
+            'start_date': (start - span).isoformat(),
+            'end_date': start.isoformat(),
+            'totals': previous_totals
+        }
+        report['change'] = _change(report['totals'], previous_totals)
+    return report
@@ -0,0 +1,419 @@
+# search_index.py - in-process inverted index for product search and typeahead
+import bisect
+import heapq
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter, defaultdict, namedtuple
+from itertools import compress
+from operator import add
+from sqlalchemy import inspect
+from extensions import db
+from models import Product, Category
+from shared_state import shared_values
+import model_events
+
+SearchDoc = namedtuple('SearchDoc', ['id', 'name', 'sku', 'category_id', 'price'])
+SEARCH_FIELDS = ('name', 'sku', 'category_id', 'price')
+GENERATION_KEY = 'search_index:generation'
+
+FIELD_WEIGHTS = {'sku': 4.0, 'name': 2.0, 'category': 1.0}
+PREFIX_FACTOR = 0.6   # "lapt" -> "laptop"
+TYPO_FACTOR = 0.4     # "lpatop" -> "laptop"
+MAX_PREFIX_EXPANSIONS = 64
+MIN_TYPO_LENGTH = 4
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall(text.lower()) if text else []
+
+
+def _deletes(token):
+    """All strings one deletion away from token (symmetric-delete typo lookup)."""
+    return {token[:i] + token[i + 1:] for i in range(len(token))}
+
+
+def _typo_eligible(token):
+    return len(token) >= MIN_TYPO_LENGTH and token.isalpha()
+
+
+def _within_one_edit(a, b):
+    """True if a and b differ by one insert, delete, substitute or adjacent swap."""
+    if a == b:
+        return True
+    la, lb = len(a), len(b)
+    if abs(la - lb) > 1:
+        return False
+    if la == lb:
+        diffs = [i for i in range(la) if a[i] != b[i]]
+        if len(diffs) == 1:
+            return True
+        return (len(diffs) == 2 and diffs[1] == diffs[0] + 1
+                and a[diffs[0]] == b[diffs[1]] and a[diffs[1]] == b[diffs[0]])
+    if la > lb:
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    return a[i:] == b[i + 1:]
+
+
+class SearchIndex:
+    """Token -> {field weight: product ids} postings over name, SKU and category.
+
+    Built on first use and kept in sync through model_events. Queries AND
+    their terms, treat the last term as a prefix (typeahead), tolerate one
+    typo per term and rank by field weight x IDF.
+
+    Every committed change to a searchable column bumps a generation
+    counter in shared_state; an index built from the database compares it
+    at most every `check_interval` seconds and rebuilds when another worker
+    has changed the catalog.
+    """
+
+    def __init__(self, check_interval=5):
+        self.check_interval = check_interval
+        self._lock = threading.RLock()
+        self._ready = False
+        self._generation = None  # shared generation the index reflects; None for load()ed docs
+        self._checked_at = 0.0
+        self._clear()
+
+    def _clear(self):
+        self._docs = {}
+        self._doc_tokens = {}
+        self._postings = {}
+        self._vocab = []
+        self._delete_map = defaultdict(set)
+        self._categories = {}
+        self._category_members = defaultdict(set)
+
+    def _ensure_built(self):
+        if self._ready and self._generation is not None:
+            now = time.monotonic()
+            if now - self._checked_at > self.check_interval:
+                self._checked_at = now
+                if shared_values.get(GENERATION_KEY, 0) != self._generation:
+                    self._ready = False
+        if not self._ready:
+            with self._lock:
+                if not self._ready:
+                    self._build()
+
+    def _build(self):
+        # Read before the rows: a change committed mid-build bumps past it
+        # and triggers another rebuild rather than being missed.
+        generation = shared_values.get(GENERATION_KEY, 0)
+        categories = db.session.query(Category.id, Category.name).all()
+        rows = db.session.query(
+            Product.id, Product.name, Product.sku, Product.category_id, Product.price
+        ).yield_per(5000)
+        self.load((SearchDoc(*row) for row in rows), categories)
+        self._generation = generation
+        self._checked_at = time.monotonic()
+
+    def load(self, docs, categories=()):
+        """Replace the index contents with the given SearchDocs."""
+        with self._lock:
+            self._clear()
+            self._categories = dict(categories)
+            for doc in docs:
+                self._add(doc, sort_vocab=False)
+            self._vocab = sorted(self._postings)
+            self._ready = True
+
+    def _field_weights(self, doc):
+        weights = {}
+        fields = (
+            ('name', tokenize(doc.name)),
+            ('sku', tokenize(doc.sku) + ([doc.sku.lower()] if doc.sku else [])),
+            ('category', tokenize(self._categories.get(doc.category_id))),
+        )
+        for field, tokens in fields:
+            for token in tokens:
+                weights[token] = max(weights.get(token, 0.0), FIELD_WEIGHTS[field])
+        return weights
+
+    def _add(self, doc, sort_vocab=True):
+        self._remove(doc.id)
+        self._docs[doc.id] = doc
+        if doc.category_id is not None:
+            self._category_members[doc.category_id].add(doc.id)
+        weights = self._field_weights(doc)
+        self._doc_tokens[doc.id] = weights
+        for token, weight in weights.items():
+            posting = self._postings.get(token)
+            if posting is None:
+                posting = self._postings[token] = {}
+                if sort_vocab:
+                    bisect.insort(self._vocab, token)
+                if _typo_eligible(token):
+                    for variant in _deletes(token):
+                        self._delete_map[variant].add(token)
+            posting.setdefault(weight, set()).add(doc.id)
+
+    def _remove(self, product_id):
+        doc = self._docs.pop(product_id, None)
+        if doc is None:
+            return
+        self._category_members[doc.category_id].discard(product_id)
+        for token, weight in self._doc_tokens.pop(product_id, {}).items():
+            posting = self._postings[token]
+            posting[weight].discard(product_id)
+            if not posting[weight]:
+                del posting[weight]
+            if posting:
+                continue
+            del self._postings[token]
+            i = bisect.bisect_left(self._vocab, token)
+            if i < len(self._vocab) and self._vocab[i] == token:
+                del self._vocab[i]
+            if _typo_eligible(token):
+                for variant in _deletes(token):
+                    self._delete_map[variant].discard(token)
+
+    def _term_groups(self, term, prefix):
+        """Return [(score, product_ids)] for every token matching term."""
+        total_docs = len(self._docs) or 1
+        groups = []
+
+        def add(token, factor):
+            posting = self._postings.get(token)
+            if not posting:
+                return
+            idf = math.log(1 + total_docs / sum(map(len, posting.values())))
+            for weight, product_ids in posting.items():
+                groups.append((weight * idf * factor, product_ids))
+
+        add(term, 1.0)
+        if prefix:
+            i = bisect.bisect_left(self._vocab, term)
+            end = min(len(self._vocab), i + MAX_PREFIX_EXPANSIONS)
+            while i < end and self._vocab[i].startswith(term):
+                if self._vocab[i] != term:
+                    add(self._vocab[i], PREFIX_FACTOR)
+                i += 1
+        if _typo_eligible(term):
+            candidates = set(self._delete_map.get(term, ()))
+            for variant in _deletes(term):
+                if variant in self._postings:
+                    candidates.add(variant)
+                candidates.update(self._delete_map.get(variant, ()))
+            for candidate in candidates:
+                if candidate != term and _within_one_edit(term, candidate):
+                    add(candidate, TYPO_FACTOR)
+        return groups
+
+    @staticmethod
+    def _restrict(groups, candidates):
+        """Members of candidates that appear in any group (set ops stay in C)."""
+        if candidates is None:
+            if len(groups) == 1:
+                return set(groups[0][1])
+            return set().union(*(ids for _, ids in groups))
+        matched = set()
+        for _, ids in groups:
+            matched |= candidates & ids
+        return matched
+
+    def _scores(self, term_groups, candidates):
+        """Sum per-term best scores for the candidate set."""
+        combined = dict.fromkeys(candidates, 0.0)
+        for groups in term_groups:
+            term_scores = {}
+            # Ascending order: a better match for the same product overwrites.
+            for score, ids in sorted(groups, key=lambda group: group[0]):
+                term_scores.update(dict.fromkeys(candidates & ids, score))
+            combined = dict(zip(combined, map(add, combined.values(), map(term_scores.get, combined))))
+        return combined
+
+    @staticmethod
+    def _top(combined, limit):
+        """Best `limit` (pid, score) pairs ordered by score desc, then id."""
+        # Scores take few distinct values: find the cut-off tier by counting,
+        # then only the products above it need a keyed sort. Ties in the
+        # cut-off tier are plain ints, which sort in C.
+        tiers = Counter(combined.values())
+        threshold = None
+        above = 0
+        for score in sorted(tiers, reverse=True):
+            if above + tiers[score] >= limit:
+                threshold = score
+                break
+            above += tiers[score]
+        if threshold is None:
+            return sorted(combined.items(), key=lambda item: (-item[1], item[0]))
+        better = sorted(
+            compress(combined.items(), map(threshold.__lt__, combined.values())),
+            key=lambda item: (-item[1], item[0])
+        )
+        tied = sorted(compress(combined.keys(), map(threshold.__eq__, combined.values())))
+        return better + [(pid, threshold) for pid in tied[:limit - above]]
+
+    @staticmethod
+    def _score_of(term_groups, product_id):
+        """product_id's score against the current index, None if it no longer matches."""
+        total = 0.0
+        for groups in term_groups:
+            best = max((score for score, ids in groups if product_id in ids), default=None)
+            if best is None:
+                return None
+            total += best
+        return total
+
+    @staticmethod
+    def _top_single_term(groups, limit, after=None, candidates=None):
+        """Top hits for a one-term query without scoring every match.
+
+        Walks the token groups from the best score down; a product's score
+        is that of the best group it is in, so each group only contributes
+        ids not already seen in a better one.
+        """
+        by_score = defaultdict(list)
+        for score, ids in groups:
+            by_score[score].append(ids)
+        seen = set()
+        best = []
+        for score in sorted(by_score, reverse=True):
+            id_sets = by_score[score]
+            ids = id_sets[0] if len(id_sets) == 1 else set().union(*id_sets)
+            if candidates is not None:
+                ids = ids & candidates
+            fresh = ids - seen if seen else ids
+            seen |= ids
+            if after is not None:
+                after_score, after_id = after
+                if score > after_score:
+                    continue
+                if score == after_score:
+                    fresh = [pid for pid in fresh if pid > after_id]
+            best += [(pid, score) for pid in heapq.nsmallest(limit - len(best), fresh)]
+            if len(best) >= limit:
+                break
+        return best
+
+    def search(self, text, limit=20, after=None, min_price=None, max_price=None, category_id=None):
+        """Return ([(score, SearchDoc)], total) ranked by relevance.
+
+        `after` is the (score, id) of the last hit on the previous page.
+        IDF moves as the catalog changes, so the page restarts from that
+        product's current score rather than the stored one.
+        """
+        terms = tokenize(text)
+        if not terms:
+            return [], 0
+        self._ensure_built()
+        with self._lock:
+            term_groups = [
+                self._term_groups(term, prefix=position == len(terms) - 1)
+                for position, term in enumerate(terms)
+            ]
+            if after is not None:
+                score = self._score_of(term_groups, after[1])
+                if score is not None:
+                    after = (score, after[1])
+            filtered = category_id is not None or min_price is not None or max_price is not None
+            if len(term_groups) == 1 and not filtered:
+                groups = term_groups[0]
+                if not groups:
+                    return [], 0
+                total = len(groups[0][1]) if len(groups) == 1 else len(set().union(*(ids for _, ids in groups)))
+                best = self._top_single_term(groups, limit, after)
+                return [(score, self._docs[pid]) for pid, score in best], total
+
+            # Intersect starting from the most selective term.
+            candidates = None
+            for groups in sorted(term_groups, key=lambda g: sum(len(ids) for _, ids in g)):
+                candidates = self._restrict(groups, candidates)
+                if not candidates:
+                    return [], 0
+
+            if category_id is not None:
+                candidates &= self._category_members.get(category_id, set())
+            if min_price is not None or max_price is not None:
+                docs = self._docs
+                candidates = {
+                    pid for pid in candidates
+                    if (min_price is None or docs[pid].price >= min_price)
+                    and (max_price is None or docs[pid].price <= max_price)
+                }
+            total = len(candidates)
+
+            if len(term_groups) == 1:
+                best = self._top_single_term(term_groups[0], limit, after, candidates)
+                return [(score, self._docs[pid]) for pid, score in best], total
+
+            combined = self._scores(term_groups, candidates)
+            if after is not None:
+                after_score, after_id = after
+                combined = {
+                    pid: score for pid, score in combined.items()
+                    if score < after_score or (score == after_score and pid > after_id)
+                }
+            best = self._top(combined, limit)
+            return [(score, self._docs[pid]) for pid, score in best], total
+
+    def _publish(self):
+        """Bump the shared generation for a change this process applies itself."""
+        generation = shared_values.incr(GENERATION_KEY)
+        if self._generation is not None and generation == self._generation + 1:
+            self._generation = generation
+        else:
+            self._ready = False  # another worker changed the catalog too
+
+    def on_product_change(self, kind, change):
+        doc, searchable = change if change is not None else (None, True)
+        with self._lock:
+            if searchable is None:
+                # Core write without ORM history: compare with what is indexed.
+                searchable = self._ready and self._docs.get(doc.id) != doc
+            if kind == 'delete' or searchable:
+                self._publish()
+            if not self._ready:
+                return
+            if kind == 'upsert':
+                self._add(doc)
+            elif kind == 'delete':
+                self._remove(doc.id)
+            else:
+                self._ready = False
+
+    def on_category_change(self, kind, category):
+        with self._lock:
+            self._publish()
+            if not self._ready:
+                return
+            if kind == 'reset':
+                self._ready = False
+                return
+            category_id, name = category
+            if kind == 'upsert':
+                self._categories[category_id] = name
+            else:
+                self._categories.pop(category_id, None)
+            for product_id in list(self._category_members.get(category_id, ())):
+                self._add(self._docs[product_id])
+
+    def invalidate(self):
+        with self._lock:
+            self._ready = False
+
+
+def _product_change(product):
+    """(SearchDoc, searchable) at flush time. `searchable` is False when only
+    stock moved, so sales do not make every worker rebuild, and None for
+    rows from Core writes, which carry no ORM history."""
+    doc = SearchDoc(product.id, product.name, product.sku, product.category_id, product.price)
+    state = inspect(product, raiseerr=False)
+    if state is None:
+        return doc, None
+    return doc, any(state.attrs[field].history.has_changes() for field in SEARCH_FIELDS)
+
+
+search_index = SearchIndex(check_interval=float(os.getenv('SEARCH_INDEX_CHECK_INTERVAL', '5')))
+model_events.subscribe(Product, _product_change, search_index.on_product_change)
+model_events.subscribe(Category, lambda c: (c.id, c.name), search_index.on_category_change)
@@ -0,0 +1,358 @@
+# shared_state.py - rate-limit counters, revoked tokens and small values shared by all workers
+import os
+import sqlite3
+import threading
+import time
+from math import floor
+from limits.storage import Storage
+from limits.storage.base import SlidingWindowCounterSupport, TimestampedSlidingWindow
+
+DEFAULT_STATE_URL = 'memory://'
+
+
+def state_url():
+    """SHARED_STATE_URL: memory:// (this process only), sqlite:///path (all
+    workers on one host) or redis://host:port/db (all hosts)."""
+    return os.getenv('SHARED_STATE_URL', DEFAULT_STATE_URL)
+
+
+def _sqlite_path(url):
+    path = url[len('sqlite://'):]
+    if path.startswith('/'):
+        path = path[1:]  # sqlite:///relative.db, sqlite:////abs/path.db
+    if not path:
+        raise ValueError('SHARED_STATE_URL needs a file: sqlite:///path/to/state.db')
+    return path
+
+
+class _SQLiteFile:
+    """One connection per thread to a small WAL-mode state file.
+
+    Lookups are primary-key reads against the page cache (a few
+    microseconds); writers serialize on SQLite's lock, which is held for a
+    single-row upsert.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        with self.connection() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS counters (
+                    key TEXT PRIMARY KEY, value INTEGER NOT NULL, expires_at REAL NOT NULL
+                ) WITHOUT ROWID;
+                CREATE TABLE IF NOT EXISTS revoked_tokens (
+                    jti TEXT PRIMARY KEY, expires_at REAL NOT NULL
+                ) WITHOUT ROWID;
+                CREATE TABLE IF NOT EXISTS shared_values (
+                    key TEXT PRIMARY KEY, value REAL NOT NULL, expires_at REAL
+                ) WITHOUT ROWID;
+            """)
+
+    def connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def purge(self, now):
+        conn = self.connection()
+        conn.execute('DELETE FROM counters WHERE expires_at <= ?', (now,))
+        conn.execute('DELETE FROM revoked_tokens WHERE expires_at <= ?', (now,))
+        conn.execute('DELETE FROM shared_values WHERE expires_at <= ?', (now,))
+
+
+# ------------------- Rate-limit storage -------------------
+class SQLiteLimiterStorage(Storage, SlidingWindowCounterSupport, TimestampedSlidingWindow):
+    """`limits` storage for sqlite:/// URLs: fixed and sliding-window counters
+    in a file every worker opens. Registered by its scheme, so
+    Limiter(storage_uri='sqlite:///...') picks it up."""
+
+    STORAGE_SCHEME = ['sqlite']
+    PURGE_EVERY = 1000
+
+    def __init__(self, uri=None, wrap_exceptions=False, **options):
+        self.file = _SQLiteFile(_sqlite_path(uri))
+        self._writes = 0
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def incr(self, key, expiry, amount=1):
+        now = time.time()
+        self._writes += 1
+        if self._writes % self.PURGE_EVERY == 0:
+            self.file.purge(now)
+        # An expired counter restarts at `amount` with a fresh expiry.
+        return self.file.connection().execute("""
+            INSERT INTO counters (key, value, expires_at) VALUES (?1, ?2, ?3 + ?4)
+            ON CONFLICT (key) DO UPDATE SET
+                value = CASE WHEN expires_at <= ?3 THEN ?2 ELSE value + ?2 END,
+                expires_at = CASE WHEN expires_at <= ?3 THEN ?3 + ?4 ELSE expires_at END
+            RETURNING value
+        """, (key, amount, now, expiry)).fetchone()[0]
+
+    def decr(self, key, amount=1):
+        row = self.file.connection().execute(
+            'UPDATE counters SET value = MAX(value - ?, 0) WHERE key = ? AND expires_at > ? RETURNING value',
+            (amount, key, time.time())
+        ).fetchone()
+        return row[0] if row else 0
+
+    def get(self, key):
+        row = self.file.connection().execute(
+            'SELECT value FROM counters WHERE key = ? AND expires_at > ?', (key, time.time())
+        ).fetchone()
+        return row[0] if row else 0
+
+    def get_expiry(self, key):
+        now = time.time()
+        row = self.file.connection().execute(
+            'SELECT expires_at FROM counters WHERE key = ? AND expires_at > ?', (key, now)
+        ).fetchone()
+        return row[0] if row else now
+
+    def check(self):
+        try:
+            self.file.connection().execute('SELECT 1')
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self):
+        return self.file.connection().execute('DELETE FROM counters').rowcount
+
+    def clear(self, key):
+        self.file.connection().execute('DELETE FROM counters WHERE key = ?', (key,))
+
+    # Sliding-window counter: the same weighted two-window scheme limits
+    # uses for its in-memory storage.
+    def _window(self, key, expiry, now):
+        previous_key, current_key = self.sliding_window_keys(key, expiry, now)
+        previous_count = self.get(previous_key)
+        current_count = self.get(current_key)
+        previous_ttl = 0.0 if previous_count == 0 else (1 - (((now - expiry) / expiry) % 1)) * expiry
+        current_ttl = (1 - ((now / expiry) % 1)) * expiry + expiry
+        return current_key, (previous_count, previous_ttl, current_count, current_ttl)
+
+    def acquire_sliding_window_entry(self, key, limit, expiry, amount=1):
+        if amount > limit:
+            return False
+        now = time.time()
+        current_key, (previous_count, previous_ttl, current_count, _) = self._window(key, expiry, now)
+        if floor(previous_count * previous_ttl / expiry + current_count) + amount > limit:
+            return False
+        current_count = self.incr(current_key, 2 * expiry, amount=amount)
+        if floor(previous_count * previous_ttl / expiry + current_count) > limit:
+            # Another worker took the last slot between our read and increment.
+            self.decr(current_key, amount)
+            return False
+        return True
+
+    def get_sliding_window(self, key, expiry):
+        return self._window(key, expiry, time.time())[1]
+
+    def clear_sliding_window(self, key, expiry):
+        for window_key in self.sliding_window_keys(key, expiry, time.time()):
+            self.clear(window_key)
+
+
+def limiter_storage_uri():
+    """storage_uri for Flask-Limiter; every backend here is a `limits` scheme."""
+    return state_url()
+
+
+# ------------------- Token revocation -------------------
+class MemoryRevocations:
+    """Revoked JTIs for this process only (the single-worker default)."""
+
+    def __init__(self):
+        self._expires = {}
+        self._lock = threading.Lock()
+
+    def revoke(self, jti, ttl):
+        now = time.time()
+        with self._lock:
+            self._expires[jti] = now + ttl
+            if len(self._expires) % 1000 == 0:
+                self._expires = {k: t for k, t in self._expires.items() if t > now}
+
+    def is_revoked(self, jti):
+        expires = self._expires.get(jti)
+        return expires is not None and expires > time.time()
+
+    def __len__(self):
+        now = time.time()
+        return sum(1 for t in list(self._expires.values()) if t > now)
+
+
+class SQLiteRevocations:
+    """Revoked JTIs in the shared state file; rows expire with the token."""
+
+    def __init__(self, path):
+        self.file = _SQLiteFile(path)
+
+    def revoke(self, jti, ttl):
+        now = time.time()
+        self.file.connection().execute(
+            'INSERT OR REPLACE INTO revoked_tokens (jti, expires_at) VALUES (?, ?)', (jti, now + ttl)
+        )
+        self.file.purge(now)
+
+    def is_revoked(self, jti):
+        return self.file.connection().execute(
+            'SELECT 1 FROM revoked_tokens WHERE jti = ? AND expires_at > ?', (jti, time.time())
+        ).fetchone() is not None
+
+    def __len__(self):
+        return self.file.connection().execute(
+            'SELECT COUNT(*) FROM revoked_tokens WHERE expires_at > ?', (time.time(),)
+        ).fetchone()[0]
+
+
+class RedisRevocations:
+    """Revoked JTIs as Redis keys with a TTL, so Redis does the expiry."""
+
+    PREFIX = 'pos:revoked:'
+
+    def __init__(self, url):
+        import redis  # optional dependency, only needed for redis:// URLs
+        self.client = redis.Redis.from_url(url)
+
+    def revoke(self, jti, ttl):
+        self.client.set(self.PREFIX + jti, 1, ex=max(int(ttl), 1))
+
+    def is_revoked(self, jti):
+        return bool(self.client.exists(self.PREFIX + jti))
+
+    def __len__(self):
+        return sum(1 for _ in self.client.scan_iter(match=self.PREFIX + '*', count=1000))
+
+
+def make_revocations(url):
+    if url.startswith('memory://'):
+        return MemoryRevocations()
+    if url.startswith('sqlite://'):
+        return SQLiteRevocations(_sqlite_path(url))
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisRevocations(url)
+    raise ValueError(f"Unsupported SHARED_STATE_URL: {url}")
+
+
+revocations = make_revocations(state_url())
+
+
+def revoke_token(claims, default_ttl=30 * 24 * 3600):
+    """Revoke a decoded JWT until it would have expired anyway."""
+    exp = claims.get('exp')
+    ttl = exp - time.time() if exp else default_ttl
+    if ttl > 0:
+        revocations.revoke(claims['jti'], ttl)
+
+
+def is_token_revoked(jwt_header, jwt_payload):
+    """token_in_blocklist_loader for flask_jwt_extended."""
+    return revocations.is_revoked(jwt_payload['jti'])
+
+
+# ------------------- Shared values -------------------
+class MemoryValues:
+    """Numeric values for this process only (the single-worker default)."""
+
+    def __init__(self):
+        self._values = {}  # key -> (value, expires_at or None)
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        entry = self._values.get(key)
+        if entry is None or (entry[1] is not None and entry[1] <= time.time()):
+            return default
+        return entry[0]
+
+    def set(self, key, value, ttl=None):
+        now = time.time()
+        with self._lock:
+            self._values[key] = (value, now + ttl if ttl else None)
+            if len(self._values) % 1000 == 0:
+                self._values = {k: e for k, e in self._values.items() if e[1] is None or e[1] > now}
+
+    def incr(self, key):
+        """Add one to a counter that never expires and return the new value."""
+        with self._lock:
+            value = self._values.get(key, (0, None))[0] + 1
+            self._values[key] = (value, None)
+            return value
+
+
+class SQLiteValues:
+    """Numeric values in the shared state file."""
+
+    PURGE_EVERY = 1000
+
+    def __init__(self, path):
+        self.file = _SQLiteFile(path)
+        self._writes = 0
+
+    def get(self, key, default=None):
+        row = self.file.connection().execute(
+            'SELECT value FROM shared_values WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)',
+            (key, time.time())
+        ).fetchone()
+        return row[0] if row else default
+
+    def set(self, key, value, ttl=None):
+        now = time.time()
+        self._writes += 1
+        if self._writes % self.PURGE_EVERY == 0:
+            self.file.purge(now)
+        self.file.connection().execute(
+            'INSERT OR REPLACE INTO shared_values (key, value, expires_at) VALUES (?, ?, ?)',
+            (key, value, now + ttl if ttl else None)
+        )
+
+    def incr(self, key):
+        """Add one to a counter that never expires and return the new value."""
+        return int(self.file.connection().execute("""
+            INSERT INTO shared_values (key, value, expires_at) VALUES (?, 1, NULL)
+            ON CONFLICT (key) DO UPDATE SET value = value + 1, expires_at = NULL
+            RETURNING value
+        """, (key,)).fetchone()[0])
+
+
+class RedisValues:
+    """Numeric values as Redis keys, expiring through Redis TTLs."""
+
+    PREFIX = 'pos:value:'
+
+    def __init__(self, url):
+        import redis  # optional dependency, only needed for redis:// URLs
+        self.client = redis.Redis.from_url(url)
+
+    def get(self, key, default=None):
+        value = self.client.get(self.PREFIX + key)
+        return float(value) if value is not None else default
+
+    def set(self, key, value, ttl=None):
+        self.client.set(self.PREFIX + key, value, px=max(int(ttl * 1000), 1) if ttl else None)
+
+    def incr(self, key):
+        """Add one to a counter that never expires and return the new value."""
+        return self.client.incr(self.PREFIX + key)
+
+
+def make_values(url):
+    if url.startswith('memory://'):
+        return MemoryValues()
+    if url.startswith('sqlite://'):
+        return SQLiteValues(_sqlite_path(url))
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisValues(url)
+    raise ValueError(f"Unsupported SHARED_STATE_URL: {url}")
+
+
+shared_values = make_values(state_url())
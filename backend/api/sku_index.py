@@ -0,0 +1,100 @@
+# sku_index.py - process-wide SKU -> product lookup for barcode scans
+import os
+import threading
+import time
+from collections import namedtuple
+from extensions import db
+from models import Product
+import model_events
+
+# Read-only view of the columns a scan needs. Stock is deliberately left out:
+# it changes on every sale and is always read from the database.
+ProductRef = namedtuple('ProductRef', ['id', 'sku', 'name', 'price', 'category_id'])
+
+
+def _snapshot(product):
+    return ProductRef(product.id, product.sku, product.name, product.price, product.category_id)
+
+
+class SkuIndex:
+    """Dictionary of SKU -> ProductRef, built once and kept current on commit.
+
+    Commits in this process arrive via model_events; renames, price changes
+    and deletions made by other worker processes are picked up by a full
+    reload every `max_age` seconds. Checkout always charges the catalog
+    price it reads in its own transaction, never ProductRef.price.
+    """
+
+    def __init__(self, max_age=300):
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._by_sku = None
+        self._sku_by_id = {}
+        self._built_at = 0.0
+
+    def _build(self):
+        rows = db.session.query(
+            Product.id, Product.sku, Product.name, Product.price, Product.category_id
+        ).all()
+        by_sku = {}
+        sku_by_id = {}
+        for row in rows:
+            ref = ProductRef(*row)
+            by_sku[ref.sku] = ref
+            sku_by_id[ref.id] = ref.sku
+        self._by_sku = by_sku
+        self._sku_by_id = sku_by_id
+        self._built_at = time.monotonic()
+
+    def get(self, sku):
+        """Return the ProductRef for sku, or None if no such product exists."""
+        by_sku = self._by_sku
+        if by_sku is None or time.monotonic() - self._built_at > self.max_age:
+            with self._lock:
+                if self._by_sku is None or time.monotonic() - self._built_at > self.max_age:
+                    self._build()
+                by_sku = self._by_sku
+        ref = by_sku.get(sku)
+        if ref is None:
+            # Another worker process may have created the product since we
+            # built the index; the unique SKU index makes this check cheap.
+            product = Product.query.filter_by(sku=sku).first()
+            if product is not None:
+                ref = _snapshot(product)
+                self.upsert(ref)
+        return ref
+
+    def upsert(self, ref):
+        with self._lock:
+            if self._by_sku is None:
+                return
+            old_sku = self._sku_by_id.get(ref.id)
+            if old_sku is not None and old_sku != ref.sku:
+                self._by_sku.pop(old_sku, None)
+            self._by_sku[ref.sku] = ref
+            self._sku_by_id[ref.id] = ref.sku
+
+    def remove(self, ref):
+        with self._lock:
+            if self._by_sku is None:
+                return
+            sku = self._sku_by_id.pop(ref.id, ref.sku)
+            self._by_sku.pop(sku, None)
+
+    def invalidate(self):
+        """Drop the index; it is rebuilt on the next lookup."""
+        with self._lock:
+            self._by_sku = None
+            self._sku_by_id = {}
+
+    def on_change(self, kind, ref):
+        if kind == 'upsert':
+            self.upsert(ref)
+        elif kind == 'delete':
+            self.remove(ref)
+        else:
+            self.invalidate()
+
+
+sku_index = SkuIndex(max_age=int(os.getenv('SKU_INDEX_MAX_AGE', '300')))
+model_events.subscribe(Product, _snapshot, sku_index.on_change)
@@ -8,10 +8,13 @@ from models import db,MpesaToken,Product,Transaction,InventoryTransaction,Employ
 # --------------- utils.py ---------------
 import logging
 import os
-import requests
-from requests.auth import HTTPBasicAuth
 from datetime import datetime, timedelta
-from sqlalchemy import asc, desc
+from sqlalchemy import asc, desc, func, select
+from sku_index import sku_index
+from low_stock import low_stock
+from checkout import checkout_cart
+from mpesa_client import get_mpesa_client, MpesaError
+from employee_analytics import compute_performance
 
 # Logging Configuration
 logging.basicConfig(level=logging.INFO)
@@ -32,137 +35,86 @@ def binary_search(sorted_list, target, key=lambda x: x):
             high = mid - 1
     return None
 
-def quicksort(arr, key=lambda x: x):
-    """Quicksort implementation for efficient sorting."""
-    if len(arr) <= 1:
-        return arr
-    pivot = arr[len(arr) // 2]
-    left = [x for x in arr if key(x) < key(pivot)]
-    middle = [x for x in arr if key(x) == key(pivot)]
-    right = [x for x in arr if key(x) > key(pivot)]
-    return quicksort(left, key) + middle + quicksort(right, key)
-
 # ------------------- POS Utilities -------------------
 def process_transaction(products, employee_id):
-    """Process a transaction using optimized sorting and searching."""
-    sorted_products = quicksort(products, key=lambda x: x.sku)
-    total = sum(p.price for p in products)
-    
-    transaction = Transaction(
-        employee_id=employee_id,
-        total_amount=total,
-        transaction_date=datetime.utcnow()
-    )
-    
-    db.session.add(transaction)
-    db.session.commit()
-    
-    for product in products:
-        product.stock_quantity -= 1
-        db.session.add(SaleItem(
-            transaction_id=transaction.id,
-            product_id=product.id,
-            quantity=1,
-            price=product.price
-        ))
-    
-    db.session.commit()
-    return transaction
+    """Sell one unit of each scanned product through the checkout service.
 
-def find_product(sku):
-    """Find product using binary search with sorted inventory."""
-    products = quicksort(Product.query.all(), key=lambda x: x.sku)
-    return binary_search(products, sku, key=lambda x: x.sku)
+    No price is passed: checkout charges the catalog price it reads in the
+    sale's own transaction, so a stale SKU index entry cannot undercharge.
+    """
+    items = [{'product_id': p.id, 'quantity': 1} for p in products]
+    return checkout_cart(employee_id, items)
 
-def generate_sales_report(start_date, end_date):
-    """Generate sales report with optimized data processing."""
-    transactions = Transaction.query.filter(
-        Transaction.transaction_date.between(start_date, end_date)
-    ).all()
-    
-    sorted_transactions = quicksort(transactions, key=lambda x: x.transaction_date)
-    return {
-        'total_sales': sum(t.total_amount for t in sorted_transactions),
-        'transaction_count': len(sorted_transactions),
-        'transactions': sorted_transactions
+def find_product(sku):
+    """Find a product by SKU through the in-memory SKU index (no table scan)."""
+    return sku_index.get(sku)
+
+def resolve_skus(skus):
+    """Resolve scanned SKUs to ProductRefs without touching the database."""
+    refs = [find_product(sku) for sku in skus]
+    missing = [sku for sku, ref in zip(skus, refs) if ref is None]
+    if missing:
+        raise ValueError(f"Unknown SKU(s): {', '.join(missing)}")
+    return refs
+
+def generate_sales_report(start_date, end_date, include_transactions=True):
+    """Generate sales report with optimized data processing.
+
+    Totals are SQL aggregates; pass include_transactions=False to skip
+    loading the transactions themselves (use exports.transaction_rows to
+    stream them instead).
+    """
+    totals, transactions = sales_report_statements(start_date, end_date)
+    total_sales, transaction_count = db.session.execute(totals).one()
+    report = {
+        'total_sales': total_sales,
+        'transaction_count': transaction_count
     }
+    if include_transactions:
+        report['transactions'] = db.session.scalars(transactions).all()
+    return report
+
+def sales_report_statements(start_date, end_date):
+    """The totals and transaction selects behind generate_sales_report."""
+    in_range = Transaction.transaction_date.between(start_date, end_date)
+    totals = select(
+        func.coalesce(func.sum(Transaction.total_amount), 0.0), func.count(Transaction.id)
+    ).where(in_range)
+    transactions = select(Transaction).where(in_range).order_by(asc(Transaction.transaction_date))
+    return totals, transactions
 
 # ------------------- Payment Processing -------------------
 def fetch_mpesa_token():
-    """Fetch and return M-Pesa access token."""
+    """Fetch and return M-Pesa access token (cached in-process by the client)."""
     try:
-        ckey = os.getenv('MPESA_CKEY')
-        csecret = os.getenv('MPESA_CSECRET')
-        apiurl = 'https://sandbox.safaricom.co.ke/oauth/v1/generate?grant_type=client_credentials'
-
-        if not ckey or not csecret:
-            logging.error("M-Pesa credentials are missing.")
-            return None
-
-        # Try to get an existing token from database first
-        mpesa_token = MpesaToken.query.filter(MpesaToken.is_expired()).first()
-        if mpesa_token:
-            return mpesa_token.access_token  # Return the cached token
-
-        # Fetch a new token if not found or expired
-        response = requests.get(apiurl, auth=HTTPBasicAuth(ckey, csecret))
-        response.raise_for_status()
-
-        token_data = response.json()
-        access_token = token_data['access_token']
-        expires_in = token_data['expires_in']
-
-        expiration_time = datetime.utcnow() + timedelta(seconds=expires_in)
-
-        # Save the new token in the database
-        new_token = MpesaToken(access_token=access_token, expiration_time=expiration_time)
-        db.session.add(new_token)
-        db.session.commit()
-
-        return access_token
-    except Exception as e:
+        return get_mpesa_client().access_token()
+    except MpesaError as e:
         logging.error(f"Error fetching M-Pesa token: {str(e)}")
         return None
 
 def make_api_request(url, method='GET', data=None, headers=None):
-    """Helper function to handle external API requests."""
+    """Helper function to handle external API requests (pooled session, timeouts)."""
+    client = get_mpesa_client()
     try:
-        response = requests.request(method, url, json=data, headers=headers)
+        response = client.session.request(method, url, json=data, headers=headers, timeout=client.timeout)
         response.raise_for_status()
         return response.json()
-    except requests.exceptions.RequestException as e:
+    except client.request_errors as e:
         logging.error(f"API request failed: {str(e)}")
         return None
+
 def process_mpesa_payment(phone, amount, reference):
     """Process MPesa payment integration."""
-    token = fetch_mpesa_token()
-    headers = {'Authorization': f'Bearer {token}'}
-    data = {
-        'BusinessShortCode': os.getenv('MPESA_SHORTCODE'),
-        'Password': generate_mpesa_password(),
-        'Timestamp': datetime.now().strftime('%Y%m%d%H%M%S'),
-        'TransactionType': 'CustomerPayBillOnline',
-        'Amount': amount,
-        'PartyA': phone,
-        'PartyB': os.getenv('MPESA_SHORTCODE'),
-        'PhoneNumber': phone,
-        'CallBackURL': os.getenv('MPESA_CALLBACK'),
-        'AccountReference': reference,
-        'TransactionDesc': 'POS Payment'
-    }
-    return make_api_request(
-        'https://sandbox.safaricom.co.ke/mpesa/stkpush/v1/processrequest',
-        method='POST',
-        data=data,
-        headers=headers
-    )
+    try:
+        return get_mpesa_client().stk_push(phone, amount, reference)
+    except MpesaError as e:
+        logging.error(f"M-Pesa payment failed: {str(e)}")
+        return None
 
 # ------------------- Helper Functions -------------------
 def validate_inventory_levels():
-    """Check inventory levels using efficient search."""
-    products = quicksort(Product.query.all(), key=lambda x: x.stock_quantity)
-    low_stock = [p for p in products if p.stock_quantity <= p.min_stock_level]
-    return quicksort(low_stock, key=lambda x: x.name)
+    """Products at or below their minimum stock level, ordered by name."""
+    return low_stock.critical_items()
 
 def restock_product(product_id, quantity):
     """Restock product with inventory tracking."""
@@ -177,13 +129,8 @@ def restock_product(product_id, quantity):
     db.session.commit()
     return product
 
-def get_employee_performance(employee_id):
-    """Calculate employee performance metrics."""
-    employee = Employee.query.get(employee_id)
-    transactions = Transaction.query.filter_by(employee_id=employee_id).all()
-    sorted_transactions = quicksort(transactions, key=lambda x: x.transaction_date)
-    return {
-        'employee': employee,
-        'total_sales': sum(t.total_amount for t in sorted_transactions),
-        'transactions': sorted_transactions
-    }
\ No newline at end of file
+def get_employee_performance(employee_id, start=None, end=None):
+    """Performance metrics for one employee, all time unless a window is given
+    (see employee_analytics; one aggregate query, no ORM rows)."""
+    report = compute_performance(start or datetime.min, end or datetime.max, employee_id=employee_id)
+    return report['employees'][0] if report['employees'] else None
\ No newline at end of file
@@ -0,0 +1,4 @@
+# wsgi.py - server entry point: gunicorn --chdir backend/api wsgi:app
+from app import create_app
+
+app = create_app()
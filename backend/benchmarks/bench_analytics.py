@@ -0,0 +1,82 @@
+"""Compare a row-at-a-time sales report (ORM objects aggregated in Python
+loops, as the report routes used to) with sales_analytics' columnar NumPy
+engine, over windows of an existing database.
+
+Both sides compute totals, a daily series, a per-employee breakdown and
+the top 10 products; the printed sums must agree. Fill a database first
+with `python datagen.py` or `python seed.py --transactions N`.
+
+Usage (from backend/):
+    python benchmarks/bench_analytics.py --database-url sqlite:////tmp/pos.db
+    python benchmarks/bench_analytics.py --database-url sqlite:////tmp/pos.db --days 7 30 365 --end 2025-01-01
+"""
+import argparse
+import os
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api'))
+
+
+def orm_report(start, end):
+    from models import Transaction
+    from sqlalchemy.orm import selectinload
+    transactions = Transaction.query.options(selectinload(Transaction.sale_items)).filter(
+        Transaction.transaction_date >= start, Transaction.transaction_date < end
+    ).all()
+    daily = defaultdict(float)
+    employees = defaultdict(float)
+    products = defaultdict(float)
+    items = 0
+    for t in transactions:
+        daily[t.transaction_date.date()] += t.total_amount
+        employees[t.employee_id] += t.total_amount
+        for item in t.sale_items:
+            items += item.quantity
+            products[item.product_id] += item.quantity * item.price
+    top = sorted(products.items(), key=lambda p: p[1], reverse=True)[:10]
+    return sum(daily.values()), len(transactions), items, top
+
+
+def columnar_report(start, end):
+    from sales_analytics import sales_analytics
+    report = sales_analytics(start, end, 'day', 'employee', compare=False)
+    top = [(p['product_id'], p['revenue']) for p in report['top_products']]
+    totals = report['totals']
+    return totals['total_sales'], totals['transaction_count'], totals['items_sold'], top
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database-url', required=True)
+    parser.add_argument('--days', type=int, nargs='+', default=[7, 30, 365])
+    parser.add_argument('--end', type=datetime.fromisoformat, default=None,
+                        help='End of every window (default: now).')
+    args = parser.parse_args()
+
+    os.environ['DATABASE_URL'] = args.database_url
+    from app import create_app
+    from extensions import db
+    app = create_app()
+    end = args.end or datetime.utcnow()
+    with app.app_context():
+        for days in args.days:
+            start = end - timedelta(days=days)
+            orm_time, orm = timed(orm_report, start, end)
+            db.session.expunge_all()
+            columnar_time, columnar = timed(columnar_report, start, end)
+            print(f"{days:>4}d  {orm[1]:>9} transactions  orm {orm_time:7.3f}s  columnar {columnar_time:7.3f}s  "
+                  f"x{orm_time / columnar_time:5.1f}  sales {round(orm[0], 2)} / {columnar[0]}  "
+                  f"items {orm[2]} / {columnar[2]}")
+
+
+if __name__ == '__main__':
+    main()
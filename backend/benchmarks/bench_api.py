@@ -0,0 +1,254 @@
+"""Load-test the POS API with concurrent virtual tills.
+
+Seeds a throwaway SQLite database through seed.py at the requested scale,
+then runs --tills threads against the app for --duration seconds. Each till
+logs in, then loops: typeahead search, product search, checkout (/sales),
+receipt; every --report-every rounds it also pulls a sales report, and
+every --login-every rounds it logs in again.
+Latency percentiles and throughput per route are printed as JSON (and
+written to --output), so runs can be diffed with --compare.
+
+Usage (from backend/):
+    python benchmarks/bench_api.py                                   # in-process client
+    python benchmarks/bench_api.py --products 50000 --transactions 500000 --audit-logs 200000
+    python benchmarks/bench_api.py --server wsgi --tills 32 --output after.json --compare before.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+BACKEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+
+class ClientTransport:
+    """Calls the app in-process through Flask's test client (no sockets)."""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, json_body=None, headers=None):
+        response = self.client.open(path, method=method, json=json_body, headers=headers)
+        return response.status_code, response.get_json(silent=True)
+
+
+class HttpTransport:
+    """Calls a real WSGI server over HTTP with a keep-alive session."""
+
+    def __init__(self, base_url):
+        import requests
+        self.base_url = base_url
+        self.session = requests.Session()
+
+    def request(self, method, path, json_body=None, headers=None):
+        response = self.session.request(method, self.base_url + path, json=json_body, headers=headers, timeout=60)
+        try:
+            body = response.json()
+        except ValueError:
+            body = None
+        return response.status_code, body
+
+
+class Till:
+    """One virtual till; keeps its own latency samples (no shared lock)."""
+
+    def __init__(self, number, transport, catalog, customer_ids, args):
+        self.transport = transport
+        self.catalog = catalog
+        self.customer_ids = customer_ids
+        self.args = args
+        self.rng = random.Random(args.seed + number)
+        self.samples = defaultdict(list)   # route -> [latency ms]
+        self.errors = defaultdict(int)
+        self.headers = None
+        self.last_transaction = None
+
+    def call(self, route, method, path, json_body=None):
+        start = time.perf_counter()
+        try:
+            status, body = self.transport.request(method, path, json_body, self.headers)
+        except Exception:
+            status, body = None, None
+        self.samples[route].append((time.perf_counter() - start) * 1000)
+        if status is None or status >= 400:
+            self.errors[route] += 1
+        return status, body
+
+    def login(self):
+        status, body = self.call('POST /login', 'POST', '/login',
+                                 {'username': self.args.username, 'password': self.args.password})
+        if status == 200:
+            self.headers = {'Authorization': f"Bearer {body['token']}"}
+
+    def round(self, n):
+        if self.headers is None or n % self.args.login_every == 0:
+            self.login()
+        name = self.rng.choice(self.catalog)[2]
+        prefix = name.split()[self.rng.randrange(2)][:self.rng.randint(2, 6)].lower()
+        self.call('GET /products/typeahead', 'GET', f'/products/typeahead?q={prefix}')
+        self.call('GET /products_search', 'GET', f'/products_search?search={prefix}&per_page=20')
+
+        lines = self.rng.sample(self.catalog, min(self.rng.randint(1, 5), len(self.catalog)))
+        status, body = self.call('POST /sales', 'POST', '/sales', {
+            'customerId': self.rng.choice(self.customer_ids),
+            'products': [{'productId': pid, 'quantity': self.rng.randint(1, 3), 'price': price}
+                         for pid, price, _ in lines]
+        })
+        if status == 200 and body:
+            self.last_transaction = body.get('transaction_id')
+        if self.last_transaction:
+            self.call('GET /receipt/<id>', 'GET', f'/receipt/{self.last_transaction}')
+
+        if n % self.args.report_every == 0:
+            granularity = self.rng.choice(['hourly', 'daily', 'monthly'])
+            self.call('GET /reports/sales', 'GET', f'/reports/sales?granularity={granularity}')
+
+    def run(self, deadline):
+        n = 0
+        while time.perf_counter() < deadline:
+            self.round(n)
+            n += 1
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(q / 100 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def summarize(samples, errors, elapsed):
+    values = sorted(samples)
+    return {
+        'count': len(values),
+        'errors': errors,
+        'throughput_rps': round(len(values) / elapsed, 2) if elapsed else 0.0,
+        'mean_ms': round(sum(values) / len(values), 3) if values else 0.0,
+        'p50_ms': round(percentile(values, 50), 3),
+        'p95_ms': round(percentile(values, 95), 3),
+        'p99_ms': round(percentile(values, 99), 3),
+        'max_ms': round(values[-1], 3) if values else 0.0
+    }
+
+
+def compare(before, after):
+    print(f"{'route':<26} {'p95 before':>11} {'p95 after':>10} {'change':>8} {'rps before':>11} {'rps after':>10}")
+    for route in sorted(set(before['routes']) | set(after['routes'])):
+        b = before['routes'].get(route, {})
+        a = after['routes'].get(route, {})
+        change = ''
+        if b.get('p95_ms') and a.get('p95_ms'):
+            change = f"{(a['p95_ms'] - b['p95_ms']) / b['p95_ms'] * 100:+.1f}%"
+        print(f"{route:<26} {b.get('p95_ms', '-'):>11} {a.get('p95_ms', '-'):>10} {change:>8} "
+              f"{b.get('throughput_rps', '-'):>11} {a.get('throughput_rps', '-'):>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--products', type=int, default=5_000)
+    parser.add_argument('--transactions', type=int, default=50_000)
+    parser.add_argument('--audit-logs', type=int, default=20_000)
+    parser.add_argument('--customers', type=int, default=500)
+    parser.add_argument('--db', default=None, help='SQLite file to use (default: a new temp file)')
+    parser.add_argument('--no-seed', action='store_true', help='reuse --db as it is')
+    parser.add_argument('--tills', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=20.0, help='seconds of measured load')
+    parser.add_argument('--report-every', type=int, default=10)
+    parser.add_argument('--login-every', type=int, default=50)
+    parser.add_argument('--server', choices=['client', 'wsgi'], default='client')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--username', default='admin')
+    parser.add_argument('--password', default='admin_password')
+    parser.add_argument('--output', help='write the JSON results here as well')
+    parser.add_argument('--compare', help='previous JSON results to diff against')
+    args = parser.parse_args()
+
+    db_path = os.path.abspath(args.db or os.path.join(tempfile.mkdtemp(prefix='pos-bench-'), 'bench.db'))
+    # Must be in place before the app is imported.
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+    os.environ['RATELIMIT_ENABLED'] = 'false'
+    os.environ.setdefault('JWT_SECRET_KEY', 'bench-secret')
+    sys.path.insert(0, BACKEND)
+    import seed
+    from app import app
+    from extensions import db
+    from models import Customer, Product
+    from rollups import rebuild_rollups
+
+    seed_seconds = 0.0
+    if not args.no_seed:
+        start = time.perf_counter()
+        seed.seed_database()
+        seed.seed_scale(args.products, args.transactions, args.audit_logs, args.customers, seed=args.seed)
+        with app.app_context():
+            rebuild_rollups()  # measure report reads, not the first catch-up
+        seed_seconds = round(time.perf_counter() - start, 2)
+
+    with app.app_context():
+        catalog = [tuple(row) for row in db.session.query(Product.id, Product.price, Product.name).limit(10_000)]
+        customer_ids = [c for (c,) in db.session.query(Customer.id).limit(10_000)]
+
+    server = None
+    if args.server == 'wsgi':
+        from werkzeug.serving import make_server
+        server = make_server('127.0.0.1', 0, app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f'http://127.0.0.1:{server.server_port}'
+        make_transport = lambda: HttpTransport(base_url)  # noqa: E731
+    else:
+        make_transport = lambda: ClientTransport(app)  # noqa: E731
+
+    # Warm-up: load the search index and caches outside the measured window.
+    Till(-1, make_transport(), catalog, customer_ids, args).round(0)
+
+    tills = [Till(i, make_transport(), catalog, customer_ids, args) for i in range(args.tills)]
+    start = time.perf_counter()
+    deadline = start + args.duration
+    threads = [threading.Thread(target=till.run, args=(deadline,)) for till in tills]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    if server is not None:
+        server.shutdown()
+
+    samples = defaultdict(list)
+    errors = defaultdict(int)
+    for till in tills:
+        for route, values in till.samples.items():
+            samples[route].extend(values)
+        for route, n in till.errors.items():
+            errors[route] += n
+
+    results = {
+        'config': {
+            'products': args.products, 'transactions': args.transactions, 'audit_logs': args.audit_logs,
+            'tills': args.tills, 'duration': args.duration, 'server': args.server,
+            'report_every': args.report_every, 'login_every': args.login_every, 'seed': args.seed,
+            'python': platform.python_version(), 'sqlite': sqlite3.sqlite_version, 'cpus': os.cpu_count()
+        },
+        'seed_seconds': seed_seconds,
+        'elapsed_seconds': round(elapsed, 2),
+        'routes': {route: summarize(values, errors[route], elapsed) for route, values in sorted(samples.items())},
+        'total': summarize([v for values in samples.values() for v in values], sum(errors.values()), elapsed)
+    }
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""Benchmark password verification throughput under concurrent logins.
+
+Compares verifying on the request threads (the old Employee.verify_password)
+with the bounded process pool in password_pool.py, and reports how many
+requests the pool sheds when admission is tight.
+
+Usage (from backend/):
+    python benchmarks/bench_login.py                        # 64 clients, 256 logins
+    python benchmarks/bench_login.py --clients 200 --workers 4 --max-pending 16
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api'))
+from password_pool import PASSWORD_HASH_METHOD, PasswordPool, PasswordPoolBusy, _hash, _verify  # noqa: E402
+
+PASSWORD = 'Sh1ft-Start!'
+SALT = 'bench-salt'
+
+
+def run(label, verify, clients, logins):
+    latencies = []
+    rejected = 0
+
+    def login(_):
+        start = time.perf_counter()
+        try:
+            ok = verify()
+        except PasswordPoolBusy:
+            return None
+        assert ok
+        return (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as threads:
+        for latency in threads.map(login, range(logins)):
+            if latency is None:
+                rejected += 1
+            else:
+                latencies.append(latency)
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1] if latencies else 0.0
+    p50 = statistics.median(latencies) if latencies else 0.0
+    print(f"{label:<10} {len(latencies) / elapsed:>10.1f} {p50:>9.1f} {p95:>9.1f} {rejected:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, default=64)
+    parser.add_argument('--logins', type=int, default=256)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--max-pending', type=int, default=None)
+    parser.add_argument('--wait', type=float, default=2.0)
+    parser.add_argument('--method', default=PASSWORD_HASH_METHOD)
+    args = parser.parse_args()
+
+    stored = _hash(f"{PASSWORD}{SALT}", args.method)
+    print(f"{args.method}, {args.clients} concurrent clients, {args.logins} logins")
+    print(f"{'mode':<10} {'logins/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'rejected':>9}")
+
+    run('inline', lambda: _verify(stored, f"{PASSWORD}{SALT}"), args.clients, args.logins)
+
+    pool = PasswordPool(workers=args.workers, max_pending=args.max_pending, wait_timeout=args.wait)
+    pool.verify(stored, PASSWORD, SALT)  # start the workers outside the timed run
+    try:
+        run('pool', lambda: pool.verify(stored, PASSWORD, SALT), args.clients, args.logins)
+        stats = pool.stats()
+        print(f"pool: {stats['workers']} workers, max_pending {stats['max_pending']}, "
+              f"peak in flight {stats['peak_in_flight']}, avg wait {stats['avg_wait_ms']} ms")
+    finally:
+        pool.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""Benchmark typeahead latency of the in-process product search index.
+
+Usage (from backend/):
+    python benchmarks/bench_search.py                    # 500k products
+    python benchmarks/bench_search.py --products 100000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api'))
+from search_index import SearchDoc, SearchIndex  # noqa: E402
+
+ADJECTIVES = ['fresh', 'organic', 'premium', 'classic', 'smart', 'wireless', 'mini', 'family',
+              'deluxe', 'compact', 'natural', 'extra', 'ultra', 'light', 'heavy', 'golden']
+NOUNS = ['milk', 'bread', 'laptop', 'blender', 'shirt', 'kettle', 'speaker', 'rice', 'sugar',
+         'coffee', 'charger', 'jacket', 'toaster', 'sneakers', 'yoghurt', 'monitor', 'cable',
+         'headphones', 'detergent', 'shampoo', 'notebook', 'printer', 'juice', 'biscuits']
+CATEGORIES = ['Electronics', 'Groceries', 'Clothing', 'Home Appliances', 'Beverages', 'Personal Care']
+
+QUERIES = ['m', 'mi', 'mil', 'milk', 'org', 'organic mi', 'lapt', 'lpatop', 'wireles head',
+           'premium coffee', 'elec', 'SKU-00012', 'deluxe toas', 'shampo', 'golden juice 12']
+
+
+def build_docs(count, rng):
+    for i in range(1, count + 1):
+        name = f"{rng.choice(ADJECTIVES).title()} {rng.choice(NOUNS).title()} {rng.randint(1, 500)}"
+        yield SearchDoc(i, name, f"SKU-{i:07d}", rng.randint(1, len(CATEGORIES)), round(rng.uniform(1, 999), 2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--products', type=int, default=500_000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    index = SearchIndex()
+    start = time.perf_counter()
+    index.load(build_docs(args.products, rng), enumerate(CATEGORIES, start=1))
+    print(f"built index for {args.products} products in {time.perf_counter() - start:.1f}s")
+
+    print(f"{'query':<18} {'hits':>8} {'p50 ms':>8} {'p95 ms':>8}")
+    for query in QUERIES:
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            hits, total = index.search(query, limit=10)
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        p95 = timings[int(len(timings) * 0.95) - 1]
+        print(f"{query:<18} {total:>8} {statistics.median(timings):>8.2f} {p95:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
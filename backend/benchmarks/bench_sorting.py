@@ -0,0 +1,91 @@
+"""Benchmark the old recursive quicksort against SQL ORDER BY, sorted() and heapq.nlargest.
+
+Usage (from backend/):
+    python benchmarks/bench_sorting.py                 # 10k, 100k and 1M rows
+    python benchmarks/bench_sorting.py --sizes 10000
+"""
+import argparse
+import heapq
+import random
+import sqlite3
+import time
+
+
+def legacy_quicksort(arr, key=lambda x: x):
+    """The recursive quicksort that utils.py used before (kept for comparison)."""
+    if len(arr) <= 1:
+        return arr
+    pivot = arr[len(arr) // 2]
+    left = [x for x in arr if key(x) < key(pivot)]
+    middle = [x for x in arr if key(x) == key(pivot)]
+    right = [x for x in arr if key(x) > key(pivot)]
+    return legacy_quicksort(left, key) + middle + legacy_quicksort(right, key)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def build_table(rows):
+    conn = sqlite3.connect(':memory:')
+    conn.execute(
+        'CREATE TABLE transactions (id INTEGER PRIMARY KEY, employee_id INTEGER, '
+        'total_amount REAL, transaction_date TEXT)'
+    )
+    conn.execute('CREATE INDEX ix_transactions_transaction_date ON transactions (transaction_date)')
+    rng = random.Random(42)
+    conn.executemany(
+        'INSERT INTO transactions (employee_id, total_amount, transaction_date) VALUES (?, ?, ?)',
+        (
+            (rng.randint(1, 50), round(rng.uniform(1, 500), 2),
+             f'2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} '
+             f'{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:{rng.randint(0, 59):02d}')
+            for _ in range(rows)
+        )
+    )
+    conn.commit()
+    return conn
+
+
+def run(rows):
+    conn = build_table(rows)
+    date_key = lambda row: row[3]  # noqa: E731
+
+    legacy, _ = timed(lambda: legacy_quicksort(
+        conn.execute('SELECT * FROM transactions').fetchall(), key=date_key))
+    sql, _ = timed(lambda: conn.execute(
+        'SELECT * FROM transactions ORDER BY transaction_date').fetchall())
+
+    loaded = conn.execute('SELECT * FROM transactions').fetchall()
+    legacy_mem, _ = timed(lambda: legacy_quicksort(loaded, key=date_key))
+    dsu, _ = timed(lambda: sorted(loaded, key=date_key))
+    legacy_top, _ = timed(lambda: legacy_quicksort(loaded, key=lambda r: r[2])[-10:])
+    heap_top, _ = timed(lambda: heapq.nlargest(10, loaded, key=lambda r: r[2]))
+    already_sorted = sorted(loaded, key=date_key)
+    legacy_sorted, _ = timed(lambda: legacy_quicksort(already_sorted, key=date_key))
+    dsu_sorted, _ = timed(lambda: sorted(already_sorted, key=date_key))
+    conn.close()
+
+    return [
+        ('load + quicksort vs ORDER BY (indexed)', legacy, sql),
+        ('in-memory quicksort vs sorted()', legacy_mem, dsu),
+        ('pre-sorted quicksort vs sorted()', legacy_sorted, dsu_sorted),
+        ('top-10 quicksort vs heapq.nlargest', legacy_top, heap_top),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    print(f"{'rows':>9}  {'case':<40} {'old (s)':>9} {'new (s)':>9} {'speed-up':>9}")
+    for rows in args.sizes:
+        for label, old, new in run(rows):
+            print(f"{rows:>9}  {label:<40} {old:>9.3f} {new:>9.3f} {old / new:>8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""Measure cold-start cost of the API: importing it, building the app and
+serving a first request, each in a fresh interpreter (as a gunicorn worker,
+a CLI command or seed.py would start).
+
+Every scenario runs --repeat times; min and median wall times are printed
+as JSON (and written to --output), so runs can be diffed with --compare.
+--importtime also lists the slowest imports of the "create" scenario.
+
+Usage (from backend/):
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --repeat 10 --output after.json --compare before.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+API = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api')
+
+SCENARIOS = {
+    # What every importer of app.py pays (seed.py, scripts, test collection).
+    'import': "import app",
+    # A gunicorn worker: the module plus a ready WSGI app.
+    'create': "from app import app; app.url_map",
+    # Worker start plus the first request through the full stack.
+    'first_request': "from app import app; app.test_client().get('/reorder-alerts')",
+}
+
+
+def run(code, env):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', code], cwd=API, env=env, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return (time.perf_counter() - start) * 1000
+
+
+def slowest_imports(code, env, top):
+    """(cumulative ms, module) for the slowest modules `code`'s own imports pull in."""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=API, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if len(name) - len(name.lstrip()) == 3:  # one level down: imported by app.py, wsgi.py...
+            rows.append((int(cumulative) / 1000, name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def compare(before, after):
+    print(f"{'scenario':<16} {'median before':>14} {'median after':>13} {'change':>8}")
+    for name in sorted(set(before['scenarios']) | set(after['scenarios'])):
+        b = before['scenarios'].get(name, {}).get('median_ms')
+        a = after['scenarios'].get(name, {}).get('median_ms')
+        change = f"{(a - b) / b * 100:+.1f}%" if a and b else ''
+        print(f"{name:<16} {b if b is not None else '-':>14} {a if a is not None else '-':>13} {change:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS),
+                        help='run only these (repeatable)')
+    parser.add_argument('--importtime', type=int, default=0, metavar='N',
+                        help='also list the N slowest imports of the create scenario')
+    parser.add_argument('--output', help='write the JSON results here as well')
+    parser.add_argument('--compare', help='previous JSON results to diff against')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='pos-startup-')
+    env = dict(os.environ)
+    env.update({
+        'DATABASE_URL': f"sqlite:///{os.path.join(workdir, 'startup.db')}",
+        'CREATE_SCHEMA_ON_START': 'true',  # first_request needs tables in the empty database
+        'RATELIMIT_ENABLED': 'false',
+        'JWT_SECRET_KEY': env.get('JWT_SECRET_KEY', 'bench-secret'),
+    })
+    run("import app", env)  # compile bytecode and create the schema outside the measurements
+
+    scenarios = {}
+    for name in args.scenario or SCENARIOS:
+        samples = [run(SCENARIOS[name], env) for _ in range(args.repeat)]
+        scenarios[name] = {
+            'min_ms': round(min(samples), 1),
+            'median_ms': round(statistics.median(samples), 1),
+            'max_ms': round(max(samples), 1)
+        }
+    results = {
+        'config': {'repeat': args.repeat, 'python': platform.python_version(), 'cpus': os.cpu_count()},
+        'baseline_ms': round(statistics.median(run("pass", env) for _ in range(args.repeat)), 1),
+        'scenarios': scenarios
+    }
+    if args.importtime:
+        results['slowest_imports'] = [
+            {'module': module, 'cumulative_ms': round(ms, 1)}
+            for ms, module in slowest_imports(SCENARIOS['create'], env, args.importtime)
+        ]
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), results)
+
+
+if __name__ == '__main__':
+    main()
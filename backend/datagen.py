@@ -0,0 +1,310 @@
+"""Generate production-size sales history: transactions, sale items and
+inventory movements for the catalog already in the database.
+
+Product popularity follows a Zipf law (a few best sellers, a long tail),
+trading follows time-of-day, day-of-week and month-of-year curves, and
+transaction ids increase with time like they do on a live till. Rows go in
+with large executemany batches (sqlite3 directly for SQLite, Core INSERTs
+otherwise), optionally from several processes at once.
+
+Usage (from backend/, after `python seed.py --products 50000`):
+    python datagen.py --transactions 10000000 --days 365 --workers 4
+    python datagen.py --url postgresql://pos@localhost/pos --transactions 20000000 --workers 8
+Then rebuild the rollups: `flask --app api/app.py rebuild-rollups`.
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta
+from itertools import accumulate
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.sql import column, table
+
+BATCH_SIZE = 20_000  # transactions per INSERT batch
+
+# Relative weights; only their shape matters.
+HOUR_WEIGHTS = (0.2, 0.1, 0.05, 0.05, 0.1, 0.3, 0.8, 1.5, 2.2, 2.6, 3.0, 3.6,
+                4.6, 4.4, 3.4, 3.0, 3.3, 4.2, 5.0, 4.8, 3.6, 2.4, 1.2, 0.5)
+WEEKDAY_WEIGHTS = (0.9, 0.85, 0.9, 0.95, 1.15, 1.35, 1.1)  # Monday first
+MONTH_WEIGHTS = (0.85, 0.85, 0.95, 1.0, 0.95, 0.95, 1.0, 1.0, 1.0, 1.0, 1.1, 1.45)
+BASKET_WEIGHTS = (30, 22, 15, 10, 7, 5, 4, 3, 2, 2)  # 1..10 distinct products
+QUANTITY_WEIGHTS = (70, 18, 7, 3, 2)  # 1..5 units per line
+PAYMENT_METHODS = (('cash', 45), ('mpesa', 40), ('card', 15))
+
+# Rows are tuples in these column orders.
+TRANSACTIONS = table('transactions', column('id'), column('employee_id'), column('customer_id'),
+                     column('total_amount'), column('discount'), column('payment_method'),
+                     column('transaction_date'))
+SALE_ITEMS = table('sale_items', column('transaction_id'), column('product_id'), column('quantity'),
+                   column('price'))
+MOVEMENTS = table('inventory_transactions', column('product_id'), column('change_quantity'),
+                  column('transaction_type'), column('reason'), column('timestamp'))
+
+
+def zipf_cum_weights(n, s=1.1):
+    """Cumulative Zipf weights for ranks 1..n (for random.choices)."""
+    return list(accumulate(1.0 / rank ** s for rank in range(1, n + 1)))
+
+
+def plan_days(transactions, end, days):
+    """[(day, count)] for the `days` whole days before `end`, oldest first;
+    counts follow the weekday and month curves and add up to exactly
+    `transactions` (largest remainder)."""
+    first = end.replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=days)
+    dates = [first + timedelta(days=i) for i in range(days)]
+    weights = [WEEKDAY_WEIGHTS[d.weekday()] * MONTH_WEIGHTS[d.month - 1] for d in dates]
+    scale = transactions / sum(weights)
+    exact = [w * scale for w in weights]
+    counts = [int(x) for x in exact]
+    by_remainder = sorted(range(days), key=lambda i: exact[i] - counts[i], reverse=True)
+    for i in by_remainder[:transactions - sum(counts)]:
+        counts[i] += 1
+    return [(d, c) for d, c in zip(dates, counts) if c]
+
+
+def split_plan(plan, first_id, parts):
+    """Cut the day plan into contiguous tasks of similar size, each with
+    its own first transaction id."""
+    total = sum(c for _, c in plan)
+    target = max(total // max(parts, 1), 1)
+    tasks, current, size, next_id = [], [], 0, first_id
+    for day, count in plan:
+        current.append((day, count))
+        size += count
+        if size >= target:
+            tasks.append((next_id, current))
+            next_id += size
+            current, size = [], 0
+    if current:
+        tasks.append((next_id, current))
+    return tasks
+
+
+# ------------------- Writers -------------------
+class SQLiteWriter:
+    """Plain sqlite3 executemany; the fastest path into a SQLite file."""
+
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path, timeout=600, isolation_level=None)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=OFF')  # a crash means re-running the generator
+        self.conn.execute('PRAGMA cache_size=-200000')
+        self.conn.execute('PRAGMA temp_store=MEMORY')
+
+    @staticmethod
+    def day(day):
+        return day.strftime('%Y-%m-%d ')
+
+    @staticmethod
+    def stamp(day, offset_us):
+        # SQLAlchemy's SQLite DateTime storage format
+        seconds, us = divmod(offset_us, 1_000_000)
+        minutes, s = divmod(seconds, 60)
+        h, m = divmod(minutes, 60)
+        return f"{day}{h:02d}:{m:02d}:{s:02d}.{us:06d}"
+
+    def write(self, transactions, items, movements):
+        self.conn.execute('BEGIN IMMEDIATE')
+        self.conn.executemany(
+            'INSERT INTO transactions (id, employee_id, customer_id, total_amount, discount, '
+            'payment_method, transaction_date) VALUES (?, ?, ?, ?, ?, ?, ?)', transactions)
+        self.conn.executemany(
+            'INSERT INTO sale_items (transaction_id, product_id, quantity, price) VALUES (?, ?, ?, ?)', items)
+        if movements:
+            self.conn.executemany(
+                'INSERT INTO inventory_transactions (product_id, change_quantity, transaction_type, '
+                'reason, timestamp) VALUES (?, ?, ?, ?, ?)', movements)
+        self.conn.execute('COMMIT')
+
+    def close(self):
+        self.conn.close()
+
+
+class CoreWriter:
+    """Core INSERT executemany (insertmanyvalues) for any other database."""
+
+    def __init__(self, url):
+        self.engine = create_engine(url)
+
+    @staticmethod
+    def day(day):
+        return day
+
+    @staticmethod
+    def stamp(day, offset_us):
+        return day + timedelta(microseconds=offset_us)
+
+    def write(self, transactions, items, movements):
+        with self.engine.begin() as conn:
+            for target, rows in ((TRANSACTIONS, transactions), (SALE_ITEMS, items), (MOVEMENTS, movements)):
+                if rows:
+                    names = [c.name for c in target.columns]
+                    conn.execute(insert(target), [dict(zip(names, row)) for row in rows])
+
+    def close(self):
+        self.engine.dispose()
+
+
+def make_writer(url):
+    if url.startswith('sqlite:///'):
+        return SQLiteWriter(url[len('sqlite:///'):])
+    return CoreWriter(url)
+
+
+# ------------------- Generation -------------------
+def _generate_task(job):
+    """Write one contiguous id range; runs in a worker process."""
+    url, first_id, days, catalog, employee_ids, customer_ids, options = job
+    rng = random.Random(options['seed'] * 1_000_003 + first_id)
+    writer = make_writer(url)
+    cum_popularity = zipf_cum_weights(len(catalog), options['zipf_s'])
+    ranks = range(len(catalog))
+    cum_hours = list(accumulate(HOUR_WEIGHTS))
+    baskets = range(1, len(BASKET_WEIGHTS) + 1)
+    cum_baskets = list(accumulate(BASKET_WEIGHTS))
+    quantities = range(1, len(QUANTITY_WEIGHTS) + 1)
+    cum_quantities = list(accumulate(QUANTITY_WEIGHTS))
+    methods = [m for m, _ in PAYMENT_METHODS]
+    cum_methods = list(accumulate(w for _, w in PAYMENT_METHODS))
+    customer_share = options['customer_share'] if customer_ids else 0.0
+    with_movements = options['movements']
+
+    transactions, items, movements = [], [], []
+    tid = first_id
+    written_items = 0
+    for day, count in days:
+        day = writer.day(day)
+        hours = rng.choices(range(24), cum_weights=cum_hours, k=count)
+        offsets = sorted(h * 3_600_000_000 + rng.randrange(3_600_000_000) for h in hours)
+        basket_sizes = rng.choices(baskets, cum_weights=cum_baskets, k=count)
+        for offset, basket in zip(offsets, basket_sizes):
+            stamp = writer.stamp(day, offset)
+            picked = set(rng.choices(ranks, cum_weights=cum_popularity, k=basket))
+            line_quantities = rng.choices(quantities, cum_weights=cum_quantities, k=len(picked))
+            subtotal = 0.0
+            for rank, quantity in zip(picked, line_quantities):
+                product_id, price = catalog[rank]
+                subtotal += price * quantity
+                items.append((tid, product_id, quantity, price))
+                if with_movements:
+                    movements.append((product_id, -quantity, 'remove', 'sale', stamp))
+            discount = round(subtotal * rng.choice((0.05, 0.1)), 2) if rng.random() < 0.05 else 0.0
+            transactions.append((
+                tid,
+                rng.choice(employee_ids),
+                rng.choice(customer_ids) if rng.random() < customer_share else None,
+                round(subtotal - discount, 2),
+                discount,
+                rng.choices(methods, cum_weights=cum_methods)[0],
+                stamp
+            ))
+            tid += 1
+            if len(transactions) >= options['batch_size']:
+                writer.write(transactions, items, movements)
+                written_items += len(items)
+                transactions, items, movements = [], [], []
+    if transactions:
+        writer.write(transactions, items, movements)
+        written_items += len(items)
+    writer.close()
+    return tid - first_id, written_items
+
+
+def load_catalog(url, seed):
+    """Products (in a seeded random popularity order), employees and customers."""
+    engine = create_engine(url)
+    with engine.connect() as conn:
+        catalog = [tuple(r) for r in conn.execute(text('SELECT id, price FROM products ORDER BY id'))]
+        employee_ids = [r[0] for r in conn.execute(text('SELECT id FROM employees'))]
+        customer_ids = [r[0] for r in conn.execute(text('SELECT id FROM customers'))]
+        next_id = (conn.execute(text('SELECT MAX(id) FROM transactions')).scalar() or 0) + 1
+    engine.dispose()
+    if not catalog or not employee_ids:
+        raise ValueError('Seed products and employees first (python seed.py --products N)')
+    random.Random(seed).shuffle(catalog)  # rank 0 is the best seller
+    return catalog, employee_ids, customer_ids, next_id
+
+
+def generate(url, transactions, days=365, end=None, workers=1, batch_size=BATCH_SIZE, seed=42,
+             zipf_s=1.1, customer_share=0.3, movements=True, progress=None):
+    """Append `transactions` sales (with items and movements) over the `days`
+    whole days before `end`.
+
+    Returns (transactions, sale_items, seconds). Work is split into
+    contiguous id ranges, so each process writes independently; SQLite
+    serializes the batches, PostgreSQL takes them in parallel.
+    """
+    started = time.perf_counter()
+    catalog, employee_ids, customer_ids, first_id = load_catalog(url, seed)
+    plan = plan_days(transactions, end or datetime.utcnow(), days)
+    tasks = split_plan(plan, first_id, workers * 4 if workers > 1 else 1)
+    options = {'seed': seed, 'zipf_s': zipf_s, 'customer_share': customer_share,
+               'movements': movements, 'batch_size': batch_size}
+    jobs = [(url, tid, task_days, catalog, employee_ids, customer_ids, options) for tid, task_days in tasks]
+
+    done_transactions = done_items = 0
+    if workers > 1:
+        with multiprocessing.get_context('spawn').Pool(workers) as pool:
+            results = pool.imap_unordered(_generate_task, jobs)
+            for n, m in results:
+                done_transactions += n
+                done_items += m
+                if progress:
+                    progress(done_transactions, done_items, time.perf_counter() - started)
+    else:
+        for job in jobs:
+            n, m = _generate_task(job)
+            done_transactions += n
+            done_items += m
+            if progress:
+                progress(done_transactions, done_items, time.perf_counter() - started)
+
+    if not url.startswith('sqlite'):
+        engine = create_engine(url)
+        with engine.begin() as conn:
+            if conn.dialect.name == 'postgresql':
+                # Explicit ids bypassed the sequence.
+                conn.execute(text("SELECT setval(pg_get_serial_sequence('transactions', 'id'), "
+                                  "(SELECT MAX(id) FROM transactions))"))
+        engine.dispose()
+    return done_transactions, done_items, time.perf_counter() - started
+
+
+def _default_url():
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'api'))
+    from app import app
+    from extensions import db
+    with app.app_context():
+        return db.engine.url.render_as_string(hide_password=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', help="database URL (default: the app's DATABASE_URL)")
+    parser.add_argument('--transactions', type=int, default=1_000_000)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--zipf', type=float, default=1.1, help='popularity exponent (higher = fewer best sellers)')
+    parser.add_argument('--customer-share', type=float, default=0.3, help='share of sales with a known customer')
+    parser.add_argument('--no-movements', action='store_true', help='skip inventory movements')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    def report(n, m, elapsed):
+        print(f"{n:,} transactions, {m:,} sale items in {elapsed:.1f}s ({n / elapsed:,.0f} transactions/s)")
+
+    n, m, elapsed = generate(
+        args.url or _default_url(), args.transactions, args.days, workers=args.workers,
+        batch_size=args.batch_size, seed=args.seed, zipf_s=args.zipf,
+        customer_share=args.customer_share, movements=not args.no_movements, progress=report
+    )
+    print(f"Done: {n:,} transactions, {m:,} sale items in {elapsed:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,13 +1,28 @@
-from api.app import create_app, db
-from werkzeug.security import generate_password_hash
+import argparse
+import os
+import random
+import sys
+import time
 from datetime import datetime, timedelta
-from api.models import (
+from itertools import islice
+
+# api/ uses flat imports (from models import ...), so import it the same way
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'api'))
+from sqlalchemy import insert, func  # noqa: E402
+import datagen  # noqa: E402
+from app import app, db  # noqa: E402
+from models import (  # noqa: E402
     Employee, Category, Product, Customer,
     Transaction, SaleItem, InventoryTransaction,
     MpesaToken, AuditLog
 )
 
-app = create_app()
+CHUNK_SIZE = 5000
+ADJECTIVES = ['Fresh', 'Organic', 'Premium', 'Classic', 'Smart', 'Wireless', 'Mini', 'Family',
+              'Deluxe', 'Compact', 'Natural', 'Extra', 'Ultra', 'Light', 'Golden', 'Spicy']
+NOUNS = ['Milk', 'Bread', 'Laptop', 'Blender', 'Shirt', 'Kettle', 'Speaker', 'Rice', 'Sugar',
+         'Coffee', 'Charger', 'Jacket', 'Toaster', 'Sneakers', 'Yoghurt', 'Monitor', 'Cable',
+         'Headphones', 'Detergent', 'Shampoo', 'Notebook', 'Printer', 'Juice', 'Biscuits']
 
 def seed_database():
     with app.app_context():
@@ -184,5 +199,98 @@ def seed_database():
         db.session.commit()
         print("✅ Database seeded successfully!")
 
+def _chunks(rows, size=CHUNK_SIZE):
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _bulk_insert(model, rows):
+    count = 0
+    for chunk in _chunks(rows):
+        db.session.execute(insert(model), chunk)
+        db.session.commit()
+        count += len(chunk)
+    return count
+
+
+def seed_scale(products=0, transactions=0, audit_logs=0, customers=100, days=90, seed=42,
+               workers=1, movements=False):
+    """Add N products, M transactions (with sale items) and K audit logs.
+
+    Runs on top of seed_database() with a fixed random seed, so two runs at
+    the same scale produce the same data. Rows go in with chunked Core
+    INSERTs; ids are assigned here so sale items need no round trip.
+    Transactions come from datagen (Zipf product popularity, busy hours
+    and weekends), across `workers` processes.
+    """
+    rng = random.Random(seed)
+    with app.app_context():
+        started = time.perf_counter()
+        employee_ids = [e.id for e in Employee.query.all()]
+        category_ids = [c.id for c in Category.query.all()]
+
+        first_customer = (db.session.query(func.max(Customer.id)).scalar() or 0) + 1
+        _bulk_insert(Customer, ({
+            'id': first_customer + i,
+            'name': f'Customer {first_customer + i}',
+            'email': f'customer{first_customer + i}@example.com',
+            'phone': f'555-{first_customer + i:07d}'
+        } for i in range(customers)))
+
+        first_product = (db.session.query(func.max(Product.id)).scalar() or 0) + 1
+
+        def product_rows():
+            for pid in range(first_product, first_product + products):
+                yield {
+                    'id': pid,
+                    'sku': f'BENCH-{pid:07d}',
+                    'name': f'{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {pid}',
+                    'price': round(rng.uniform(0.5, 500), 2),
+                    'stock_quantity': rng.randint(1_000, 1_000_000),  # enough for long checkout runs
+                    'min_stock_level': rng.randint(5, 50),
+                    'category_id': rng.choice(category_ids)
+                }
+        _bulk_insert(Product, product_rows())
+        print(f"Seeded {products} products")
+
+        now = datetime.utcnow()
+        url = db.engine.url.render_as_string(hide_password=False)
+        db.session.commit()
+        if transactions:
+            n, items, seconds = datagen.generate(url, transactions, days, end=now, workers=workers, seed=seed,
+                                                 movements=movements)
+            print(f"Seeded {n} transactions ({items} sale items) in {seconds:.1f}s")
+
+        _bulk_insert(AuditLog, ({
+            'user_id': rng.choice(employee_ids),
+            'action': rng.choice(['login', 'logout', 'sale', 'restock', 'price change', 'report']),
+            'timestamp': now - timedelta(seconds=rng.randint(0, days * 86400)),
+            'details': {'seq': i}
+        } for i in range(audit_logs)))
+        print(f"Seeded {audit_logs} audit logs in {time.perf_counter() - started:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Reset the database with demo data, optionally at scale.')
+    parser.add_argument('--products', type=int, default=0, help='extra products (N)')
+    parser.add_argument('--transactions', type=int, default=0, help='extra transactions (M)')
+    parser.add_argument('--audit-logs', type=int, default=0, help='extra audit log rows (K)')
+    parser.add_argument('--customers', type=int, default=100)
+    parser.add_argument('--days', type=int, default=90, help='spread transactions over this many days')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--workers', type=int, default=1, help='processes generating transactions')
+    parser.add_argument('--movements', action='store_true', help='also write an inventory movement per sale item')
+    args = parser.parse_args()
+
+    seed_database()
+    if args.products or args.transactions or args.audit_logs:
+        seed_scale(args.products, args.transactions, args.audit_logs, args.customers, args.days, args.seed,
+                   args.workers, args.movements)
+
+
 if __name__ == "__main__":
-    seed_database()
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -0,0 +1,58 @@
+# conftest.py - app, client and fresh-schema fixtures for the API tests
+import os
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api'))
+
+# Module globals (shared state, password pool, caches) read these at import.
+_DB_DIR = tempfile.mkdtemp()
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(_DB_DIR, 'test.db')
+os.environ['SHARED_STATE_URL'] = 'memory://'
+os.environ['JWT_SECRET_KEY'] = 'test-secret-' + 'x' * 32
+os.environ['PASSWORD_POOL_WORKERS'] = '0'
+os.environ['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:1000'
+os.environ['ROLLUP_REFRESH_INTERVAL'] = '0'
+os.environ['CREATE_SCHEMA_ON_START'] = 'false'
+os.environ['SWAGGER_UI_ENABLED'] = 'false'
+
+from flask_jwt_extended import create_access_token  # noqa: E402
+from app import create_app  # noqa: E402
+from extensions import db, limiter  # noqa: E402
+from identity_cache import identity_cache  # noqa: E402
+from receipts import receipt_cache  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def app():
+    return create_app()
+
+
+@pytest.fixture(autouse=True)
+def schema(app):
+    """Every test starts from empty tables, empty caches and fresh limits."""
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+    identity_cache.clear()
+    receipt_cache.clear()
+    limiter.reset()
+    yield
+    with app.app_context():
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def auth_headers(app):
+    def make(user_id=1, role='manager'):
+        with app.app_context():
+            token = create_access_token(identity={'id': user_id, 'role': role})
+        return {'Authorization': f'Bearer {token}'}
+    return make
@@ -0,0 +1,29 @@
+from sqlalchemy import insert
+
+from extensions import db
+from models import AuditLog, Employee
+from pagination import keyset_page
+from blueprints.reports import AUDIT_LOG_PAGE_KEY
+
+
+def test_audit_log_pages_reach_the_end_within_one_second(app):
+    with app.app_context():
+        employee = Employee(username='manager', email='manager@example.com', role='manager')
+        employee.password = 'Passw0rd!'
+        db.session.add(employee)
+        db.session.flush()
+        # The column default stores CURRENT_TIMESTAMP text, so all five rows
+        # share (or nearly share) one second.
+        db.session.execute(insert(AuditLog), [{'user_id': employee.id, 'action': f'action {i}'} for i in range(5)])
+        db.session.commit()
+
+        # The same call /audit-logs makes, page after page.
+        seen, cursor = [], None
+        for _ in range(5):
+            logs, cursor = keyset_page(AuditLog.query, *AUDIT_LOG_PAGE_KEY, cursor=cursor, limit=2, descending=True)
+            seen += [log.id for log in logs]
+            if cursor is None:
+                break
+
+    assert seen == [5, 4, 3, 2, 1]
+    assert cursor is None
@@ -0,0 +1,38 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from extensions import db
+from models import Employee
+
+ATTEMPTS = 15  # more than the default AUTH_RATE_LIMIT of 10 per minute
+
+
+def _employee(app):
+    with app.app_context():
+        employee = Employee(username='till', email='till@example.com', role='cashier')
+        employee.password = 'Passw0rd!'
+        db.session.add(employee)
+        db.session.commit()
+
+
+def _login(app, password):
+    response = app.test_client().post('/login', json={'username': 'till', 'password': password})
+    return response.status_code
+
+
+def test_successful_logins_from_one_address_are_not_throttled(app):
+    _employee(app)
+
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        statuses = list(pool.map(lambda _: _login(app, 'Passw0rd!'), range(ATTEMPTS)))
+
+    assert statuses == [200] * ATTEMPTS
+
+
+def test_failed_logins_are_throttled(app):
+    _employee(app)
+
+    statuses = [_login(app, 'wrong') for _ in range(ATTEMPTS)]
+
+    assert statuses[:10] == [401] * 10
+    assert set(statuses[10:]) == {429}
+    assert _login(app, 'Passw0rd!') == 429
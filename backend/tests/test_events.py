@@ -0,0 +1,62 @@
+import queue
+
+from flask_jwt_extended import decode_token
+from sqlalchemy import update
+
+import model_events
+from events import event_bus
+from extensions import db
+from models import Employee, Transaction
+from shared_state import revoke_token
+
+
+def _drain(subscriber):
+    events = []
+    while True:
+        try:
+            events.append(subscriber.queue.get_nowait())
+        except queue.Empty:
+            return events
+
+
+def test_sale_is_published_once_per_transaction(app):
+    subscriber = event_bus.subscribe()
+    try:
+        with app.app_context():
+            employee = Employee(username='till', email='till@example.com', role='cashier')
+            employee.password = 'Passw0rd!'
+            db.session.add(employee)
+            db.session.flush()
+            sale = Transaction(employee_id=employee.id, total_amount=12.5, payment_method='cash')
+            db.session.add(sale)
+            db.session.commit()
+
+            # payments._reconcile: Core UPDATE, recorded for the caches
+            row = db.session.execute(
+                update(Transaction).where(Transaction.id == sale.id).values(payment_method='mpesa')
+                .returning(*Transaction.__table__.columns)
+            ).first()
+            model_events.record(db.session, Transaction, 'upsert', row)
+            db.session.commit()
+
+            sale.total_amount = 10.0
+            db.session.commit()
+    finally:
+        event_bus.unsubscribe(subscriber)
+
+    sales = [data for _, event_type, data in _drain(subscriber) if event_type == 'sale']
+    assert [s['id'] for s in sales] == [1]
+
+
+def test_event_stream_rejects_revoked_query_token(app, client, auth_headers):
+    headers = auth_headers()
+    token = headers['Authorization'].split()[1]
+
+    for kwargs in ({'query_string': {'token': token}}, {'headers': headers}):
+        response = client.get('/events/stream', **kwargs)
+        assert response.status_code == 200
+        response.close()
+
+    with app.app_context():
+        revoke_token(decode_token(token))
+    assert client.get('/events/stream', query_string={'token': token}).status_code == 401
@@ -0,0 +1,39 @@
+from extensions import db
+from identity_cache import IdentityCache
+from models import Employee
+
+
+def test_change_on_one_worker_reaches_another_workers_cache(app):
+    # Both caches share this process's shared_values, as workers share
+    # SHARED_STATE_URL; only `this_worker` is subscribed to Employee commits.
+    other_worker = IdentityCache(check_interval=0)
+    with app.app_context():
+        employee = Employee(username='sam', email='sam@example.com', role='manager')
+        employee.password = 'Passw0rd!'
+        db.session.add(employee)
+        db.session.commit()
+        user_id = employee.id
+
+        assert other_worker.get(user_id).role == 'manager'
+        assert other_worker.get(user_id).role == 'manager'
+        assert other_worker.hits == 1
+
+        employee.role = 'cashier'
+        db.session.commit()
+
+        assert other_worker.get(user_id).role == 'cashier'
+        assert other_worker.misses == 2
+
+
+def test_unchanged_entries_stay_cached(app):
+    other_worker = IdentityCache(check_interval=0)
+    with app.app_context():
+        employee = Employee(username='kim', email='kim@example.com', role='cashier')
+        employee.password = 'Passw0rd!'
+        db.session.add(employee)
+        db.session.commit()
+
+        for _ in range(3):
+            other_worker.get(employee.id)
+
+    assert (other_worker.hits, other_worker.misses) == (2, 1)
@@ -0,0 +1,47 @@
+import json
+from datetime import datetime
+
+from extensions import db
+from exports import encode_json
+from models import InventoryTransaction, Product
+
+
+def test_inventory_keeps_original_fields_and_dates(app, client):
+    with app.app_context():
+        product = Product(sku='S1', name='Milk', price=1.5, stock_quantity=5)
+        db.session.add(product)
+        db.session.flush()
+        db.session.add(InventoryTransaction(
+            product_id=product.id, change_quantity=5, transaction_type='add',
+            reason='delivery', timestamp=datetime(2025, 3, 4, 5, 6, 7)
+        ))
+        db.session.commit()
+
+    response = client.get('/inventory')
+
+    assert response.status_code == 200
+    assert response.get_json() == {'transactions': [{
+        'id': 1,
+        'product_name': 'Milk',
+        'change_quantity': 5,
+        'transaction_type': 'add',
+        'reason': 'delivery',
+        'timestamp': 'Tue, 04 Mar 2025 05:06:07 GMT',
+    }]}
+
+
+def _failing_rows():
+    yield {'id': 1}
+    raise RuntimeError('database went away')
+
+
+def test_json_stream_ends_with_error_member():
+    document = json.loads(''.join(encode_json(_failing_rows(), ('id',), envelope='transactions')))
+
+    assert document == {'transactions': [{'id': 1}], 'error': 'database went away'}
+
+
+def test_json_array_ends_with_error_element():
+    document = json.loads(''.join(encode_json(_failing_rows(), ('id',))))
+
+    assert document == [{'id': 1}, {'error': 'database went away'}]
@@ -0,0 +1,24 @@
+import os
+
+from flask_migrate import Migrate, downgrade, stamp, upgrade
+
+from extensions import db
+from query_plans import check_query_plans
+
+MIGRATIONS = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api', 'migrations')
+# The first revision alters tables it does not create, so migrations start
+# from it rather than from an empty database.
+BASE_REVISION = 'aa2038b07000'
+
+
+def test_hot_queries_use_indexes_after_migrating(app):
+    Migrate(app, db, directory=MIGRATIONS)
+    with app.app_context():
+        stamp(MIGRATIONS, 'head')
+        downgrade(MIGRATIONS, BASE_REVISION)
+        upgrade(MIGRATIONS, 'head')
+
+        results = check_query_plans()
+
+    assert results
+    assert {r.name: r.problems for r in results if not r.ok} == {}
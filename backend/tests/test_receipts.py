@@ -0,0 +1,38 @@
+from sqlalchemy import update
+
+import model_events
+from extensions import db
+from models import Employee, Product, SaleItem, Transaction
+from receipts import ReceiptCache
+
+
+def test_payment_update_on_one_worker_reaches_another_workers_receipts(app):
+    # The module cache is subscribed to commits; `other_worker` only shares
+    # shared_values with it, as another worker shares SHARED_STATE_URL.
+    other_worker = ReceiptCache(check_interval=0)
+    with app.app_context():
+        employee = Employee(username='till', email='till@example.com', role='cashier')
+        employee.password = 'Passw0rd!'
+        product = Product(sku='S1', name='Bread', price=2.0, stock_quantity=10)
+        db.session.add_all([employee, product])
+        db.session.flush()
+        sale = Transaction(employee_id=employee.id, total_amount=4.0, payment_method='cash')
+        db.session.add(sale)
+        db.session.flush()
+        db.session.add(SaleItem(transaction_id=sale.id, product_id=product.id, quantity=2, price=2.0))
+        db.session.commit()
+        transaction_id = sale.id
+
+        assert other_worker.get(transaction_id).data['payment_method'] == 'cash'
+        assert other_worker.get(transaction_id).data['payment_method'] == 'cash'
+        assert other_worker.hits == 1
+
+        # payments._reconcile: Core UPDATE, recorded for the caches
+        row = db.session.execute(
+            update(Transaction).where(Transaction.id == transaction_id).values(payment_method='mpesa')
+            .returning(*Transaction.__table__.columns)
+        ).first()
+        model_events.record(db.session, Transaction, 'upsert', row)
+        db.session.commit()
+
+        assert other_worker.get(transaction_id).data['payment_method'] == 'mpesa'
@@ -1,6 +1,7 @@
 import { useState, useEffect } from 'react';
 import { Grid, Card, CardContent, Typography } from '@mui/material';
 import api from '../services/api';
+import { subscribeToEvents } from '../services/events';
 
 export default function AdminDashboard() {
   const [stats, setStats] = useState({
@@ -20,6 +21,14 @@ export default function AdminDashboard() {
       }
     };
     fetchStats();
+
+    // Apply pushed deltas instead of re-polling the summary.
+    return subscribeToEvents({
+      sale: (sale) => setStats((s) => ({ ...s, totalSales: s.totalSales + sale.total_amount })),
+      alert: () => setStats((s) => ({ ...s, criticalInventory: s.criticalInventory + 1 })),
+      cleared: () => setStats((s) => ({ ...s, criticalInventory: Math.max(s.criticalInventory - 1, 0) })),
+      resync: fetchStats
+    });
   }, []);
 
   return (
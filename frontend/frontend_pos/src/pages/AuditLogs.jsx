@@ -12,14 +12,25 @@ const columns = [
 
 export default function AuditLogs() {
   const [logs, setLogs] = useState([]);
-  const [page, setPage] = useState(1);
+  const [page, setPage] = useState(0);
+  const [total, setTotal] = useState(0);
+  // cursors[n] is the continuation token that loads page n
+  const [cursors, setCursors] = useState([null]);
 
   const fetchLogs = async () => {
     try {
       const { data } = await api.get('/audit-logs', {
-        params: { page, per_page: 10 }
+        params: { per_page: 10, cursor: cursors[page] || undefined, include_total: page === 0 }
       });
       setLogs(data.logs);
+      if (data.total !== undefined) setTotal(data.total);
+      if (data.next_cursor) {
+        setCursors(prev => {
+          const next = [...prev];
+          next[page + 1] = data.next_cursor;
+          return next;
+        });
+      }
     } catch (error) {
       console.error('Error fetching audit logs:', error);
     }
@@ -35,9 +46,11 @@ export default function AuditLogs() {
         rows={logs}
         columns={columns}
         pagination
+        paginationMode="server"
+        rowCount={total}
         pageSize={10}
         rowsPerPageOptions={[10]}
-        onPageChange={(newPage) => setPage(newPage + 1)}
+        onPageChange={(newPage) => setPage(newPage)}
       />
     </div>
   );
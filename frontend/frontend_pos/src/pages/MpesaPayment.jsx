@@ -2,6 +2,8 @@ import { useState } from 'react';
 import { TextField, Button, Container, Typography } from '@mui/material';
 import api from '../services/api';
 
+const FINAL_STATUSES = ['completed', 'failed'];
+
 export default function MpesaPayment() {
   const [paymentData, setPaymentData] = useState({
     phone: '',
@@ -10,10 +12,34 @@ export default function MpesaPayment() {
   });
   const [status, setStatus] = useState('');
 
+  // Long-poll the payment until the callback settles it (or we give up).
+  const awaitResult = async (payment) => {
+    let current = payment;
+    for (let attempt = 0; attempt < 6 && !FINAL_STATUSES.includes(current.status); attempt++) {
+      const { data } = await api.get(`/payments/mpesa/${current.id}`, {
+        params: { wait: 25, status: current.status }
+      });
+      current = data;
+    }
+    return current;
+  };
+
   const handlePayment = async () => {
     try {
-      await api.post('/payments/mpesa', paymentData);
+      const { data } = await api.post('/payments/mpesa', {
+        phone: paymentData.phone,
+        amount: paymentData.amount,
+        transaction_id: paymentData.transactionId
+      });
       setStatus('Payment initiated successfully! Check your phone to complete');
+      const result = await awaitResult(data.payment);
+      if (result.status === 'completed') {
+        setStatus(`Payment received successfully (receipt ${result.mpesa_receipt})`);
+      } else if (result.status === 'failed') {
+        setStatus(`Payment failed: ${result.result_desc || 'please try again.'}`);
+      } else {
+        setStatus('Still waiting for confirmation. Check the transaction later.');
+      }
     } catch (error) {
       setStatus('Payment failed. Please try again.');
       console.error('MPesa payment error:', error);
@@ -0,0 +1,24 @@
+import api from './api';
+
+const EVENT_TYPES = ['sale', 'stock', 'alert', 'cleared', 'resync'];
+
+// Subscribe to the server's change feed (/events/stream). `handlers` maps an
+// event type to a callback receiving the parsed payload. EventSource resumes
+// with Last-Event-ID on reconnect; on 'resync' callers should reload their
+// snapshot. Returns a function that closes the stream.
+export function subscribeToEvents(handlers) {
+  const token = localStorage.getItem('token');
+  const url = new URL('/events/stream', api.defaults.baseURL);
+  if (token) {
+    url.searchParams.set('token', token);
+  }
+  const source = new EventSource(url.toString(), { withCredentials: true });
+
+  EVENT_TYPES.forEach((type) => {
+    if (handlers[type]) {
+      source.addEventListener(type, (event) => handlers[type](JSON.parse(event.data)));
+    }
+  });
+
+  return () => source.close();
+}